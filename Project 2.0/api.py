@@ -0,0 +1,234 @@
+
+"""
+Headless JSON API over the same models, schemas and CRUD logic as the UI.
+
+    python api.py                      # uvicorn with API_WORKERS processes
+    uvicorn api:app --workers 4        # or any ASGI server
+    gunicorn api:app -k uvicorn.workers.UvicornWorker -w 4
+
+Responses over 1 KB are gzip-compressed when the client accepts it. Reads
+are not served from query_cache: it is per process, and with several workers
+a write handled by one of them would leave the others serving stale pages.
+"""
+import asyncio
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Optional
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.routing import Match
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from database import dispose_async_engine, get_async_db, get_db
+from task_repository import get_task as fetch_task
+from schemas import (
+    TaskCreate, TaskResponse, TaskListItem, TaskPage, TaskIds, BatchResult,
+    WeatherResponse, WeatherBatchRequest,
+)
+import crud_async
+from bulk_import import import_tasks
+from bulk_ops import bulk_delete_tasks
+from instrumentation import render_prometheus, track_view
+from export import FORMATS, export_columns, export_table, iter_chunks, iter_csv, iter_jsonl
+from pagination import paginate_tasks, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from search import search_tasks
+from weather_rollups import PERIODS, get_weather_history
+from weather_service import (
+    InvalidAPIKey, close_async_http_client, get_weather_async, get_weather_many, get_recent_weather_logs,
+)
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_WORKERS = int(os.getenv("API_WORKERS", "4"))
+MAX_BATCH_SIZE = int(os.getenv("API_MAX_BATCH_SIZE", "1000"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Per-worker resources created on first use
+    await close_async_http_client()
+    await dispose_async_engine()
+
+app = FastAPI(title="Task Summarizer Pro API", lifespan=lifespan)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    # Label by route template (/tasks/{task_id}), not the raw path, to keep cardinality bounded
+    path = next((r.path for r in app.router.routes if r.matches(request.scope)[0] == Match.FULL), "unmatched")
+    with track_view(f"{request.method} {path}"):
+        return await call_next(request)
+
+def _check_batch(items):
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(413, f"Batch too large (max {MAX_BATCH_SIZE} items).")
+
+def _raise(error):
+    code, message = error
+    raise HTTPException(code, message)
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text exposition of query, view and outbound HTTP latencies."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# --- TASKS ---
+
+@app.get("/tasks", response_model=TaskPage)
+def list_tasks(status: Optional[List[str]] = Query(None), priority: Optional[List[str]] = Query(None),
+               search: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+               after: Optional[str] = None, before: Optional[str] = None, db: Session = Depends(get_db)):
+    """Cursor-paginated listing; pass next_cursor as `after` or prev_cursor as `before`."""
+    try:
+        page = paginate_tasks(db, status, priority, search, limit, after, before)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return TaskPage(
+        items=[TaskListItem(**row._asdict()) for row in page["items"]],
+        next_cursor=page["next_cursor"], prev_cursor=page["prev_cursor"],
+    )
+
+@app.get("/tasks/search", response_model=List[TaskListItem])
+def search(q: str, status: Optional[List[str]] = Query(None), priority: Optional[List[str]] = Query(None),
+           limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE), archived: bool = False, db: Session = Depends(get_db)):
+    """Ranked full-text search over title, content and summary; `archived=true` searches the archive."""
+    rows = search_tasks(db, q, status, priority, limit, archived=archived)
+    return [TaskListItem(**{k: v for k, v in row._asdict().items() if k != "score"}) for row in rows]
+
+@app.get("/tasks/{task_id}", response_model=TaskResponse)
+def get_task(task_id: int, db: Session = Depends(get_db)):
+    task = fetch_task(db, task_id, full=True)
+    if task is None:
+        raise HTTPException(404, "Task not found")
+    return task
+
+@app.post("/tasks", response_model=TaskResponse, status_code=201)
+async def create(payload: TaskCreate, db: AsyncSession = Depends(get_async_db)):
+    task, error = await crud_async.create_task(db, payload.title, payload.content, payload.priority,
+                                               payload.status, payload.due_date)
+    if error:
+        _raise(error)
+    return task
+
+@app.post("/tasks/batch", response_model=BatchResult, status_code=201)
+def create_batch(payload: List[dict], db: Session = Depends(get_db)):
+    """Creates many tasks with chunked multi-row inserts; invalid rows are reported, not fatal."""
+    _check_batch(payload)
+    report = import_tasks(db, enumerate(payload))
+    return BatchResult(
+        succeeded=report["imported"], failed=report["failed"],
+        errors=[{"index": index, "error": message} for index, message in report["errors"]],
+    )
+
+@app.delete("/tasks/{task_id}")
+async def delete(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    success, error = await crud_async.delete_task(db, task_id)
+    if not success:
+        _raise(error)
+    return {"deleted": task_id}
+
+@app.post("/tasks/batch-delete", response_model=BatchResult)
+def delete_batch(payload: TaskIds, db: Session = Depends(get_db)):
+    """Deletes the given ids with set-wise DELETEs; ids that do not exist are counted as failed."""
+    _check_batch(payload.ids)
+    ids = set(payload.ids)
+    deleted = bulk_delete_tasks(db, ids=ids) if ids else 0
+    return BatchResult(succeeded=deleted, failed=len(ids) - deleted)
+
+# --- WEATHER ---
+
+@app.get("/weather", response_model=WeatherResponse)
+async def weather(city: str, api_key: Optional[str] = None, log: bool = False,
+                  db: AsyncSession = Depends(get_async_db)):
+    """Current weather; `log=true` also records it (a stale last-known value is never logged)."""
+    try:
+        if log:
+            return await crud_async.fetch_and_log_weather(db, city, api_key)
+        return await get_weather_async(city, api_key)
+    except InvalidAPIKey as e:
+        raise HTTPException(401, str(e))
+    except ValueError as e:
+        raise HTTPException(404, str(e))
+    except SQLAlchemyError as e:
+        raise HTTPException(500, f"Database Error: {e}")
+    except Exception as e:
+        raise HTTPException(502, f"Weather provider error: {e}")
+
+@app.post("/weather/batch")
+async def weather_batch(payload: WeatherBatchRequest):
+    """Per-city results: {"city": {"data": {...}} or {"error": "..."}}; a rejected API key is a 401."""
+    _check_batch(payload.cities)
+    try:
+        results = await asyncio.to_thread(get_weather_many, payload.cities, payload.api_key)
+    except InvalidAPIKey as e:
+        raise HTTPException(401, str(e))
+    return {
+        city: ({"data": data} if data else {"error": error})
+        for city, (data, error) in results.items()
+    }
+
+@app.get("/weather/logs")
+def weather_logs(limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    rows = get_recent_weather_logs(db, limit)
+    return [row._asdict() for row in rows]
+
+@app.get("/weather/history")
+def weather_history(city: str, period: str = "hour", since: Optional[datetime] = None, db: Session = Depends(get_db)):
+    """Hourly or daily temperature aggregates for one city, oldest first."""
+    if period not in PERIODS:
+        raise HTTPException(400, f"period must be one of {', '.join(PERIODS)}")
+    rows = get_weather_history(db, city, period, since)
+    return [row._asdict() for row in rows]
+
+@app.delete("/weather/logs/{log_id}")
+async def delete_log(log_id: int, db: AsyncSession = Depends(get_async_db)):
+    success, error = await crud_async.delete_weather_log(db, log_id)
+    if not success:
+        _raise(error)
+    return {"deleted": log_id}
+
+# --- EXPORT ---
+
+MEDIA_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+@app.get("/export/{table}")
+def export(table: str, format: str = "csv", columns: Optional[str] = None, db: Session = Depends(get_db)):
+    """Streams a whole table; `columns` is a comma-separated projection (e.g. to skip content)."""
+    if format not in FORMATS:
+        raise HTTPException(400, f"format must be one of {', '.join(FORMATS)}")
+    names = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    try:
+        selected = export_columns(table, names)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    filename = f"{table}.{format}"
+
+    if format == "parquet":
+        # Parquet needs its footer written last, so spool to disk rather than memory
+        fd, path = tempfile.mkstemp(suffix=".parquet")
+        os.close(fd)
+        try:
+            export_table(db, table, path, format, names)
+        except Exception as e:
+            os.remove(path)
+            raise HTTPException(500, f"Export failed: {e}")
+        return FileResponse(path, media_type=MEDIA_TYPES[format], filename=filename,
+                            background=BackgroundTask(os.remove, path))
+
+    writer = iter_csv if format == "csv" else iter_jsonl
+    body = writer(iter_chunks(db, selected), [column.key for column in selected])
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("api:app", host=API_HOST, port=API_PORT, workers=API_WORKERS)
@@ -1,17 +1,21 @@
+import os
 import streamlit as st
-from streamlit_option_menu import option_menu
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from database import get_db, init_db, engine
-from models import Task, WeatherLog
-from schemas import TaskCreate, TaskUpdate
-from summarizer import summarize_text
-from weather_service import get_weather, log_weather, delete_weather_log
-from pydantic import ValidationError
-from datetime import date
-import pandas as pd
-import requests
-import altair as alt
+from database import SessionLocal, session_scope, get_pool_metrics
+from crud import create_task, delete_task
+from summary_cache import get_summary_cache_stats
+from summary_queue import SUMMARY_ASYNC, SummaryWorker, get_queue_stats
+from dashboard_stats import get_dashboard_stats
+from task_stats import rebuild_task_stats
+from query_cache import TASKS, WEATHER, cached_query, get_query_cache_stats
+from pagination import paginate_tasks, estimate_task_count
+from instrumentation import METRICS_FILE, track_view, get_metrics_snapshot, reset_metrics, render_prometheus, write_prometheus
+from datetime import date, datetime, timedelta
+
+# pandas, altair, streamlit_option_menu and the weather/bulk modules (requests) are
+# imported inside the views that use them, so a cold start only pays for what it renders.
+
+PERF_PANEL = os.getenv("PERF_PANEL", "false").lower() in ("1", "true", "yes")
 
 # Page Config
 st.set_page_config(page_title="Task Summarizer Pro", layout="wide", page_icon="✨")
@@ -42,9 +46,6 @@ st.markdown("""
 
 # --- HELPER FUNCTIONS ---
 
-def get_session():
-    return next(get_db())
-
 def display_status(code: int, message: str):
     """Simulates HTTP Status Codes in the UI."""
     if 200 <= code < 300:
@@ -56,58 +57,25 @@ def display_status(code: int, message: str):
     else:
         st.info(f"**{code}**: {message}")
 
-# --- DB OPERATIONS ---
-
-def create_task(db: Session, title: str, content: str, priority: str, status: str, due_date: date):
-    try:
-        task_data = TaskCreate(
-            title=title, content=content, priority=priority,
-            status=status, due_date=due_date
-        )
-        summary = summarize_text(task_data.content)
-        db_task = Task(
-            title=task_data.title, content=task_data.content, summary=summary,
-            priority=task_data.priority, status=task_data.status, due_date=task_data.due_date
-        )
-        db.add(db_task)
-        db.commit()
-        db.refresh(db_task)
-        return db_task, None
-    except ValidationError as e:
-        return None, (422, f"Validation Error: {e}")
-    except Exception as e:
-        return None, (500, f"Database Error: {str(e)}")
-
-def delete_task(db: Session, task_id: int):
-    try:
-        task = db.query(Task).filter(Task.id == task_id).first()
-        if not task: return False, (404, "Task not found")
-        db.delete(task)
-        db.commit()
-        return True, (200, "Task deleted")
-    except Exception as e:
-        return False, (500, f"Database Error: {str(e)}")
-
 # --- UI VIEWS ---
 
 def dashboard_view(db: Session):
+    import pandas as pd
+    import altair as alt
     st.title("📊 Executive Dashboard")
     
     try:
-        # Fetch Data
-        df = pd.read_sql(db.query(Task).statement, db.bind)
+        # Fetch pre-aggregated data (GROUP BY / LIMIT in SQL)
+        stats = cached_query(TASKS, ("dashboard",), lambda: get_dashboard_stats(db))
         
         # Metrics Row
-        total = len(df)
-        completed = len(df[df['status'] == 'Done']) if not df.empty else 0
-        pending = total - completed
-        high = len(df[(df['priority'] == 'High') & (df['status'] != 'Done')]) if not df.empty else 0
-        
         c1, c2, c3, c4 = st.columns(4)
-        c1.metric("Total Tasks", total, "All time")
-        c2.metric("Pending", pending, "Needs Action", delta_color="inverse")
-        c3.metric("Completed", completed, "Done")
-        c4.metric("High Priority", high, "Critical", delta_color="inverse")
+        c1.metric("Total Tasks", stats["total"], "All time")
+        c2.metric("Pending", stats["pending"], "Needs Action", delta_color="inverse")
+        c3.metric("Completed", stats["completed"], "Done")
+        c4.metric("High Priority", stats["high_priority"], "Critical", delta_color="inverse")
+        if stats["archived"]:
+            st.caption(f"Totals include {stats['archived']} archived tasks.")
         
         st.divider()
         
@@ -116,11 +84,12 @@ def dashboard_view(db: Session):
         
         with col_charts_1:
             st.subheader("Task Status Distribution")
-            if not df.empty:
-                status_chart = alt.Chart(df).mark_arc(innerRadius=50).encode(
-                    theta=alt.Theta(field="status", type="nominal", aggregate="count"),
+            if stats["by_status"]:
+                status_df = pd.DataFrame(list(stats["by_status"].items()), columns=["status", "count"])
+                status_chart = alt.Chart(status_df).mark_arc(innerRadius=50).encode(
+                    theta=alt.Theta(field="count", type="quantitative"),
                     color=alt.Color(field="status", type="nominal"),
-                    tooltip=["status", "count()"]
+                    tooltip=["status", "count"]
                 ).properties(height=300)
                 st.altair_chart(status_chart, use_container_width=True)
             else:
@@ -128,12 +97,13 @@ def dashboard_view(db: Session):
 
         with col_charts_2:
             st.subheader("Priority Breakdown")
-            if not df.empty:
-                priority_chart = alt.Chart(df).mark_bar().encode(
+            if stats["by_priority"]:
+                priority_df = pd.DataFrame(list(stats["by_priority"].items()), columns=["priority", "count"])
+                priority_chart = alt.Chart(priority_df).mark_bar().encode(
                     x=alt.X("priority", sort=["Low", "Medium", "High"]),
-                    y="count()",
+                    y="count",
                     color="priority",
-                    tooltip=["priority", "count()"]
+                    tooltip=["priority", "count"]
                 ).properties(height=300)
                 st.altair_chart(priority_chart, use_container_width=True)
             else:
@@ -141,11 +111,14 @@ def dashboard_view(db: Session):
 
         st.divider()
         st.subheader("Recent Activity Log")
-        if not df.empty:
-            recent_df = df.sort_values(by="created_at", ascending=False).head(5)
+        if stats["recent"]:
+            recent_df = pd.DataFrame(
+                [tuple(row) for row in stats["recent"]],
+                columns=["title", "status", "priority", "created_at"]
+            )
             # Display as a clean table
             st.dataframe(
-                recent_df[["title", "status", "priority", "created_at"]],
+                recent_df,
                 use_container_width=True,
                 hide_index=True
             )
@@ -180,10 +153,14 @@ def create_task_view(db: Session):
                 if not title or not content:
                     display_status(422, "Title and Content are required.")
                 else:
-                    task, error = create_task(db, title, content, priority, status, due_date)
+                    task, error = create_task(db, title, content, priority, status, due_date,
+                                              defer_summary=SUMMARY_ASYNC)
                     if task:
                         display_status(201, "Task Created successfully.")
-                        st.info(f"**AI Summary:** {task.summary}")
+                        if task.summary is None:
+                            st.info("**AI Summary:** queued, it will appear once the background worker finishes.")
+                        else:
+                            st.info(f"**AI Summary:** {task.summary}")
                     elif error:
                         display_status(error[0], error[1])
 
@@ -195,21 +172,48 @@ def view_tasks_view(db: Session):
         st.header("🔍 Filter Data")
         status_filter = st.multiselect("Status", ["Todo", "In Progress", "Done"], default=["Todo", "In Progress"])
         priority_filter = st.multiselect("Priority", ["Low", "Medium", "High"])
-        search = st.text_input("Search Title")
+        search = st.text_input("Search", help="Matches title, content and summary")
+        search_archive = st.checkbox("Also search archived tasks", help="Tasks moved out by the archival job")
+        page_size = st.selectbox("Rows per page", [10, 25, 50, 100], index=1)
     
+    # Reset to the first page whenever the filters change
+    filter_key = (tuple(status_filter), tuple(priority_filter), search, page_size)
+    if st.session_state.get("task_filter_key") != filter_key:
+        st.session_state["task_filter_key"] = filter_key
+        st.session_state["task_cursor"] = (None, None)
+    after, before = st.session_state.get("task_cursor", (None, None))
+
     try:
-        # Build Query
-        query = db.query(Task)
-        if status_filter: query = query.filter(Task.status.in_(status_filter))
-        if priority_filter: query = query.filter(Task.priority.in_(priority_filter))
-        if search: query = query.filter(Task.title.contains(search))
-        
-        tasks = query.all()
+        if search and search_archive:
+            from search import search_tasks
+            archived = cached_query(TASKS, ("archive_search", search), lambda: search_tasks(db, search, archived=True))
+            with st.expander(f"🗄️ {len(archived)} archived match(es)", expanded=bool(archived)):
+                st.dataframe([row._asdict() for row in archived], use_container_width=True, hide_index=True)
+
+        # Fetch one page only (keyset pagination on created_at, id)
+        page = cached_query(
+            TASKS, ("page", filter_key, after, before),
+            lambda: paginate_tasks(
+                db, status_filter, priority_filter, search,
+                page_size=page_size, after=after, before=before
+            )
+        )
+        tasks = page["items"]
         
+        if not tasks and (after or before):
+            # The page emptied out (e.g. rows deleted); start over from the top
+            st.session_state["task_cursor"] = (None, None)
+            st.rerun()
         if not tasks:
             st.info("No matching records found.")
             return
 
+        count, exact = cached_query(
+            TASKS, ("count", filter_key),
+            lambda: estimate_task_count(db, status_filter, priority_filter, search)
+        )
+        st.caption(f"{count}{'' if exact else '+'} matching tasks · showing {len(tasks)}")
+
         # Header
         c1, c2, c3, c4, c5, c6 = st.columns([0.5, 2, 1, 1, 1, 0.5])
         c1.markdown("**ID**")
@@ -243,16 +247,29 @@ def view_tasks_view(db: Session):
                 success, error = delete_task(db, task.id)
                 if success:
                     st.toast(f"Task {task.id} deleted successfully!")
-                    st.experimental_rerun()
+                    st.rerun()
                 else:
                     st.error(error[1])
             
             st.divider() # Separator between rows
+
+        # Pager
+        p1, p2 = st.columns(2)
+        if p1.button("⬅️ Previous", disabled=not page["prev_cursor"], use_container_width=True):
+            st.session_state["task_cursor"] = (None, page["prev_cursor"])
+            st.rerun()
+        if p2.button("Next ➡️", disabled=not page["next_cursor"], use_container_width=True):
+            st.session_state["task_cursor"] = (page["next_cursor"], None)
+            st.rerun()
         
     except Exception as e:
         display_status(500, f"Error fetching data: {e}")
 
 def weather_view(db: Session):
+    import pandas as pd
+    import altair as alt
+    from weather_rollups import get_weather_history, get_rollup_cities
+    from weather_service import get_weather, get_weather_many, get_recent_weather_logs, log_weather, delete_weather_log
     st.title("🌦 Global Weather Context")
     
     col_input, col_display = st.columns([1, 2])
@@ -273,10 +290,15 @@ def weather_view(db: Session):
                 # Pass optional API Key
                 data = get_weather(city, api_key)
                 
-                log_weather(db, city, data['temperature'], data['condition'])
+                # A stale fallback is not a new observation
+                if not data.get("stale"):
+                    log_weather(db, city, data['temperature'], data['condition'])
                 
                 with col_display:
-                    st.success(f"Weather in **{city}**")
+                    if data.get("stale"):
+                        st.warning(f"Weather providers unavailable; last known weather in **{city}** (as of {data['as_of']}).")
+                    else:
+                        st.success(f"Weather in **{city}**")
                     st.caption(f"Source: {data.get('source', 'Unknown')}")
                     
                     m1, m2 = st.columns(2)
@@ -285,10 +307,54 @@ def weather_view(db: Session):
             except Exception as e:
                 st.error(str(e))
 
+    with st.expander("Batch Refresh (multiple cities)"):
+        with st.form("weather_batch_form"):
+            cities_text = st.text_area("Cities (one per line)", placeholder="London\nParis\nTokyo")
+            batch_key = st.text_input("OpenWeatherMap API Key", type="password", key="batch_api_key")
+            batch_submit = st.form_submit_button("Fetch All")
+        if batch_submit:
+            cities = [c.strip() for c in cities_text.splitlines() if c.strip()]
+            try:
+                with st.spinner(f"Fetching {len(cities)} cities..."):
+                    results = get_weather_many(cities, batch_key or None)
+            except ValueError as e:  # rejected API key
+                st.error(str(e))
+                results = {}
+            rows = []
+            for city, (data, error) in results.items():
+                if data:
+                    note = f"Stale (as of {data['as_of']})" if data.get("stale") else ""
+                    if not note:
+                        log_weather(db, city, data['temperature'], data['condition'])
+                    rows.append({"City": city, "Temperature": data['temperature'], "Condition": data['condition'], "Error": note})
+                else:
+                    rows.append({"City": city, "Temperature": "", "Condition": "", "Error": error})
+            if rows:
+                st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+    cities = cached_query(WEATHER, ("rollup_cities",), lambda: get_rollup_cities(db))
+    if cities:
+        st.markdown("### Temperature History")
+        h1, h2 = st.columns([2, 1])
+        history_city = h1.selectbox("City", cities)
+        period = h2.radio("Resolution", ["hour", "day"], horizontal=True)
+        since = datetime.now() - (timedelta(days=7) if period == "hour" else timedelta(days=365))
+        history = cached_query(WEATHER, ("history", history_city, period, since.date()),
+                               lambda: get_weather_history(db, history_city, period, since))
+        if history:
+            history_df = pd.DataFrame([row._asdict() for row in history])
+            band = alt.Chart(history_df).mark_area(opacity=0.25).encode(
+                x=alt.X("bucket_start:T", title=None), y=alt.Y("temp_min:Q", title="°C"), y2="temp_max:Q"
+            )
+            line = alt.Chart(history_df).mark_line(point=True).encode(
+                x="bucket_start:T", y="temp_avg:Q", tooltip=["bucket_start:T", "temp_avg:Q", "temp_min:Q", "temp_max:Q", "samples:Q"]
+            )
+            st.altair_chart(band + line, use_container_width=True)
+
     st.markdown("### Search History")
     
     # Fetch logs
-    logs = db.query(WeatherLog).order_by(WeatherLog.timestamp.desc()).limit(10).all()
+    logs = cached_query(WEATHER, ("recent_logs", 10), lambda: get_recent_weather_logs(db, 10))
     
     if not logs:
         st.info("No search history available.")
@@ -315,12 +381,16 @@ def weather_view(db: Session):
             success, error = delete_weather_log(db, log.id)
             if success:
                 st.toast(f"Log {log.id} deleted.")
-                st.experimental_rerun()
+                st.rerun()
             else:
                 st.error(error)
         st.divider()
 
 def manage_tasks_view(db: Session):
+    from archive import ARCHIVE_AFTER_DAYS, archive_done_tasks, get_archive_stats
+    from bulk_ops import TASK_STATUSES, bulk_delete_tasks, bulk_update_status
+    from weather_rollups import WEATHER_RETENTION_DAYS, prune_weather
+    from weather_service import get_weather_cache_stats, get_weather_provider_stats, clear_weather_cache
     st.title("🛠 Operations")
     col1, col2 = st.columns(2)
     
@@ -334,6 +404,50 @@ def manage_tasks_view(db: Session):
             else:
                 display_status(error[0], error[1])
 
+        st.subheader("Bulk Operations")
+        bulk_status = st.multiselect("Status", list(TASK_STATUSES), default=["Done"], key="bulk_status")
+        bulk_priority = st.multiselect("Priority", ["Low", "Medium", "High"], key="bulk_priority")
+        due_to = st.date_input("Due on or before", value=None, key="bulk_due_to")
+        action = st.radio("Action", ["Delete", "Set status"], horizontal=True)
+        new_status = st.selectbox("New status", TASK_STATUSES) if action == "Set status" else None
+        filters = dict(status=bulk_status, priority=bulk_priority, due_to=due_to)
+        try:
+            if action == "Delete":
+                matching = bulk_delete_tasks(db, dry_run=True, **filters)
+            else:
+                matching = bulk_update_status(db, new_status, dry_run=True, **filters)
+            st.caption(f"{matching} task(s) match.")
+            if st.button(f"{action} {matching} task(s)", disabled=not matching):
+                if action == "Delete":
+                    count = bulk_delete_tasks(db, **filters)
+                else:
+                    count = bulk_update_status(db, new_status, **filters)
+                display_status(200, f"{count} task(s) affected.")
+        except ValueError as e:
+            st.caption(str(e))
+        except Exception as e:
+            display_status(500, f"Database Error: {e}")
+
+        days = st.number_input("Keep raw weather logs for (days)", min_value=1, value=WEATHER_RETENTION_DAYS, step=1)
+        if st.button("Apply Weather Retention"):
+            try:
+                deleted = prune_weather(db, retention_days=int(days))
+                display_status(200, f"{deleted['raw']} weather log(s) and {deleted['hourly']} hourly bucket(s) pruned.")
+            except Exception as e:
+                display_status(500, f"Database Error: {e}")
+
+        st.subheader("Archive")
+        archive_days = st.number_input("Archive tasks Done for more than (days)", min_value=1,
+                                       value=ARCHIVE_AFTER_DAYS, step=1)
+        try:
+            archive_stats = get_archive_stats(db, int(archive_days))
+            st.caption(f"{archive_stats['hot']} task(s) in the active table, {archive_stats['archived']} archived.")
+            if st.button(f"Archive {archive_stats['eligible']} task(s)", disabled=not archive_stats["eligible"]):
+                count = archive_done_tasks(db, int(archive_days))
+                display_status(200, f"{count} task(s) archived.")
+        except Exception as e:
+            display_status(500, f"Database Error: {e}")
+
     with col2:
         st.subheader("System")
         if st.button("Reset Database (Hard Reset)"):
@@ -345,20 +459,95 @@ def manage_tasks_view(db: Session):
             except Exception as e:
                 st.error(f"Reset Failed: {e}")
 
+        if st.button("Rebuild Dashboard Counters"):
+            try:
+                drift = rebuild_task_stats(db)
+                st.success(f"Counters rebuilt ({len(drift)} bucket(s) corrected).")
+            except Exception as e:
+                st.error(f"Rebuild Failed: {e}")
+
+        with st.expander("Connection Pool"):
+            st.json(get_pool_metrics())
+
+        with st.expander("Summary Queue"):
+            st.json(get_queue_stats(db))
+            st.caption("Summary cache")
+            st.json(get_summary_cache_stats())
+
+        with st.expander("Query Cache"):
+            st.json(get_query_cache_stats())
+
+        with st.expander("Weather Cache"):
+            st.json(get_weather_cache_stats())
+            st.caption("Provider circuit breakers")
+            st.json(get_weather_provider_stats())
+            if st.button("Clear Weather Cache"):
+                clear_weather_cache()
+                st.toast("Weather cache cleared.")
+
+def performance_view(db: Session):
+    import pandas as pd
+    st.title("⏱ Performance")
+    snapshot = get_metrics_snapshot()
+
+    c1, c2 = st.columns([4, 1])
+    c1.caption("Latency histograms since the server started (or the last reset). Percentiles are bucket estimates.")
+    if c2.button("Reset Metrics"):
+        reset_metrics()
+        st.rerun()
+
+    st.subheader("Views")
+    if snapshot["views"]:
+        views_df = pd.DataFrame.from_dict(snapshot["views"], orient="index")
+        st.dataframe(views_df.rename(columns={"queries_avg": "statements/run"}), use_container_width=True)
+    else:
+        st.info("No views recorded yet.")
+
+    if snapshot["n_plus_one"]:
+        st.subheader("Possible N+1 Patterns")
+        st.warning("These views ran the same statement many times in a single render.")
+        st.dataframe(pd.DataFrame(snapshot["n_plus_one"]), use_container_width=True, hide_index=True)
+
+    st.subheader("Slowest Statements (total time)")
+    if snapshot["top_statements"]:
+        st.dataframe(pd.DataFrame(snapshot["top_statements"]), use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Queries by View")
+        if snapshot["queries"]:
+            st.dataframe(pd.DataFrame(snapshot["queries"]), use_container_width=True, hide_index=True)
+    with col2:
+        st.subheader("Outbound HTTP")
+        if snapshot["http"]:
+            st.dataframe(pd.DataFrame(snapshot["http"]), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No weather API calls yet.")
+
+    st.download_button("Download Prometheus Metrics", render_prometheus(), file_name="metrics.prom", mime="text/plain")
+
+@st.cache_resource
+def start_summary_worker():
+    """One background summarizer per server process (only when SUMMARY_ASYNC is on)."""
+    return SummaryWorker(SessionLocal).start()
+
 # Main App Loop
 def main():
-    try:
-        db = get_session()
-    except Exception as e:
-        st.error(f"Database Connection Error: {e}")
-        return
+    from streamlit_option_menu import option_menu
+    if SUMMARY_ASYNC:
+        start_summary_worker()
 
     # Premium Sidebar Navigation
     with st.sidebar:
+        options = ["Dashboard", "Create Task", "Process View", "Weather", "Manage"]
+        icons = ["kanban", "plus-circle", "table", "cloud-lightning", "gear"]
+        if PERF_PANEL:
+            options.append("Performance")
+            icons.append("speedometer")
         selected = option_menu(
             menu_title="Task Pro",
-            options=["Dashboard", "Create Task", "Process View", "Weather", "Manage"],
-            icons=["kanban", "plus-circle", "table", "cloud-lightning", "gear"],
+            options=options,
+            icons=icons,
             menu_icon="cast",
             default_index=0,
             styles={
@@ -366,16 +555,22 @@ def main():
             }
         )
 
-    if selected == "Dashboard":
-        dashboard_view(db)
-    elif selected == "Create Task":
-        create_task_view(db)
-    elif selected == "Process View":
-        view_tasks_view(db)
-    elif selected == "Weather":
-        weather_view(db)
-    elif selected == "Manage":
-        manage_tasks_view(db)
+    # One session per rerun, always closed so its connection returns to the pool
+    with track_view(selected), session_scope() as db:
+        if selected == "Dashboard":
+            dashboard_view(db)
+        elif selected == "Create Task":
+            create_task_view(db)
+        elif selected == "Process View":
+            view_tasks_view(db)
+        elif selected == "Weather":
+            weather_view(db)
+        elif selected == "Manage":
+            manage_tasks_view(db)
+        elif selected == "Performance":
+            performance_view(db)
+    if METRICS_FILE:
+        write_prometheus()
 
 if __name__ == "__main__":
     main()
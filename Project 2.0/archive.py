@@ -0,0 +1,136 @@
+
+"""
+Hot/cold archival of completed tasks.
+
+Tasks that have been Done for more than ARCHIVE_AFTER_DAYS are moved from
+`tasks` to `archived_tasks` in id-ordered batches. Each batch copies its
+rows with INSERT ... SELECT, deletes them (and their summary jobs) from
+`tasks` and moves their counts from task_stats.count to task_stats.archived
+in one transaction, so an interrupted run leaves no duplicates and the next
+run simply carries on. `tasks` and its indexes then only hold active work
+plus recently finished tasks, while the dashboard totals stay all-time.
+
+    python archive.py                      # archive tasks Done for over ARCHIVE_AFTER_DAYS days
+    python archive.py --days 30 --dry-run  # count only
+    python archive.py --restore 42         # move one task back to `tasks`
+    python archive.py --search "budget review"
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, insert, literal, select
+from sqlalchemy.orm import Session
+from models import ArchivedTask, SummaryJob, Task
+from bulk_ops import count_matching, iter_locked_chunks
+from task_stats import apply_archive_deltas, count_deltas
+from query_cache import TASKS, invalidate
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+# Columns copied between the hot and the cold table
+COPIED_COLUMNS = ("id", "title", "content", "summary", "status", "priority", "due_date", "created_at", "completed_at")
+
+def archive_conditions(older_than_days: int = ARCHIVE_AFTER_DAYS, now: datetime = None):
+    cutoff = (now or datetime.now()) - timedelta(days=older_than_days)
+    return [Task.status == "Done", Task.completed_at < cutoff]
+
+def archive_done_tasks(db: Session, older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE,
+                       max_batches: int = None, dry_run: bool = False, progress=None) -> int:
+    """
+    Moves tasks Done for more than `older_than_days` to archived_tasks, one
+    committed batch at a time; stops after `max_batches` if given.
+    `progress(archived_so_far)` is called after each batch. Returns the
+    number of tasks archived (or, with `dry_run`, that would be).
+    """
+    conditions = archive_conditions(older_than_days)
+    if dry_run:
+        return count_matching(db, Task, conditions)
+
+    archived = 0
+    try:
+        for batch, rows in enumerate(iter_locked_chunks(db, (Task.id, Task.status, Task.priority), conditions,
+                                                        batch_size), start=1):
+            ids = [row.id for row in rows]
+            source = select(*[getattr(Task, name) for name in COPIED_COLUMNS],
+                            literal(datetime.now(), DateTime)).where(Task.id.in_(ids))
+            db.execute(insert(ArchivedTask).from_select(COPIED_COLUMNS + ("archived_at",), source))
+            db.query(SummaryJob).filter(SummaryJob.task_id.in_(ids)).delete(synchronize_session=False)
+            db.query(Task).filter(Task.id.in_(ids)).delete(synchronize_session=False)
+            apply_archive_deltas(db, count_deltas((row.status, row.priority) for row in rows))
+            db.commit()
+            invalidate(TASKS)
+            archived += len(ids)
+            if progress:
+                progress(archived)
+            if max_batches and batch >= max_batches:
+                break
+    except Exception:
+        db.rollback()
+        raise
+    return archived
+
+def restore_task(db: Session, task_id: int):
+    """
+    Moves an archived task back to `tasks`, under its original id unless a
+    newer task has taken it. Its completion time is reset so the next
+    archival run does not move it straight back. Returns (task, None) or
+    (None, (code, message)).
+    """
+    try:
+        archived = (
+            db.query(ArchivedTask).filter(ArchivedTask.id == task_id)
+            .order_by(ArchivedTask.archive_id.desc()).first()
+        )
+        if not archived: return None, (404, "Archived task not found")
+        fields = {name: getattr(archived, name) for name in COPIED_COLUMNS}
+        fields["completed_at"] = datetime.now()
+        if db.get(Task, task_id) is not None:
+            del fields["id"]
+        task = Task(**fields)
+        db.add(task)
+        apply_archive_deltas(db, count_deltas([(archived.status, archived.priority)], -1))
+        db.delete(archived)
+        db.commit()
+        invalidate(TASKS)
+        return task, None
+    except Exception as e:
+        db.rollback()
+        return None, (500, f"Database Error: {str(e)}")
+
+def get_archive_stats(db: Session, older_than_days: int = ARCHIVE_AFTER_DAYS):
+    """Rows in the hot and cold tables, and how many hot tasks are due for archival."""
+    return {
+        "hot": count_matching(db, Task, []),
+        "archived": count_matching(db, ArchivedTask, []),
+        "eligible": count_matching(db, Task, archive_conditions(older_than_days)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Move long-completed tasks to the archive table.")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="Archive tasks Done for longer than this")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, help="Stop after this many batches (resume later)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count eligible tasks")
+    parser.add_argument("--restore", type=int, metavar="TASK_ID", help="Move an archived task back")
+    parser.add_argument("--search", metavar="QUERY", help="Full-text search over archived tasks")
+    args = parser.parse_args()
+
+    from database import session_scope
+    with session_scope() as db:
+        if args.restore:
+            task, error = restore_task(db, args.restore)
+            print(error[1] if error else f"Restored task #{task.id}.")
+        elif args.search:
+            from search import search_tasks
+            for row in search_tasks(db, args.search, archived=True):
+                print(f"{row.score:8.3f}  #{row.id:<6} [{row.status}] {row.title}")
+        elif args.dry_run:
+            print(f"{archive_done_tasks(db, args.days, dry_run=True)} task(s) would be archived.")
+        else:
+            count = archive_done_tasks(db, args.days, args.batch_size, args.max_batches,
+                                       progress=lambda n: print(f"\r{n} archived", end="", flush=True))
+            print(f"\nArchived {count} task(s) Done for more than {args.days} days.")
+
+if __name__ == "__main__":
+    main()
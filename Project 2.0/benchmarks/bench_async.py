@@ -0,0 +1,137 @@
+
+"""
+Concurrency of the sync write path (thread pool) against the async one (one event loop).
+
+    python benchmarks/bench_async.py --requests 500 --http-latency-ms 200
+    python benchmarks/bench_async.py --threads 40 --concurrency 200 --json async.json
+    python benchmarks/bench_async.py --url mysql+pymysql://user:pw@localhost/bench_db
+
+Each simulated request does what `GET /weather?log=true` plus `POST /tasks`
+do: look up the weather for a city not in the cache (a stubbed geocoding
+round-trip of --http-latency-ms), log it and create a task. The sync path runs
+requests on a pool of --threads threads, like a threaded ASGI endpoint;
+the async path runs up to --concurrency of them on one event loop with
+crud_async and an AsyncEngine on the same database, which is wiped first.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from database import Base, create_app_engine, create_async_app_engine
+from bench_suite import percentile, stub_http_get
+from query_cache import query_cache
+import crud
+import crud_async
+import migrations
+import weather_service
+
+def stub_http_get_async(latency_ms: float):
+    sync_stub = stub_http_get()
+
+    async def http_get_async(url, params=None, timeout=5):
+        await asyncio.sleep(latency_ms / 1000)
+        return sync_stub(url, params, timeout)
+    return http_get_async
+
+def _summary(timings, elapsed):
+    timings.sort()
+    return {
+        "requests": len(timings),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(timings) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+    }
+
+def run_sync(engine, requests: int, threads: int, latency_ms: float):
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    def handle(i):
+        t0 = time.perf_counter()
+        data = weather_service.get_weather(f"Sync City {i}")
+        with Session() as db:
+            weather_service.log_weather(db, f"Sync City {i}", data["temperature"], data["condition"])
+            _, error = crud.create_task(db, f"Sync task {i}", "Benchmark body.", "Medium", "Todo", None,
+                                        defer_summary=True)
+            if error:
+                raise RuntimeError(error[1])
+        return (time.perf_counter() - t0) * 1000
+
+    with patch.object(weather_service, "http_get", stub_http_get(latency_ms)):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            timings = list(pool.map(handle, range(requests)))
+        return _summary(timings, time.perf_counter() - started)
+
+async def run_async(url, requests: int, concurrency: int, latency_ms: float):
+    engine = create_async_app_engine(url)
+    Session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def handle(i):
+        async with limit:
+            t0 = time.perf_counter()
+            async with Session() as db:
+                await crud_async.fetch_and_log_weather(db, f"Async City {i}")
+                _, error = await crud_async.create_task(db, f"Async task {i}", "Benchmark body.", "Medium", "Todo",
+                                                        None, defer_summary=True)
+                if error:
+                    raise RuntimeError(error[1])
+            return (time.perf_counter() - t0) * 1000
+
+    try:
+        with patch.object(weather_service, "http_get_async", stub_http_get_async(latency_ms)):
+            started = time.perf_counter()
+            timings = await asyncio.gather(*(handle(i) for i in range(requests)))
+            return _summary(list(timings), time.perf_counter() - started)
+    finally:
+        await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=8, help="Worker threads of the sync path")
+    parser.add_argument("--concurrency", type=int, default=50, help="In-flight requests on the async path")
+    parser.add_argument("--http-latency-ms", type=float, default=200.0)
+    parser.add_argument("--url", help="SQLAlchemy URL of a scratch database (it will be wiped)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_async.db')}"
+    engine = create_app_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    migrations.upgrade(engine)
+    query_cache.enabled = False
+
+    results = {
+        "meta": {"backend": engine.url.drivername, "requests": args.requests, "threads": args.threads,
+                 "concurrency": args.concurrency, "http_latency_ms": args.http_latency_ms},
+        "sync": run_sync(engine, args.requests, args.threads, args.http_latency_ms),
+        "async": asyncio.run(run_async(url, args.requests, args.concurrency, args.http_latency_ms)),
+    }
+    engine.dispose()
+
+    for name in ("sync", "async"):
+        stats = results[name]
+        print(f"{name:<6} {stats['requests_per_second']:>8.1f} req/s  p50 {stats['p50_ms']:>8.1f}  "
+              f"p95 {stats['p95_ms']:>8.1f}  p99 {stats['p99_ms']:>8.1f} ms")
+    speedup = results["async"]["requests_per_second"] / results["sync"]["requests_per_second"]
+    print(f"async/sync throughput: {speedup:.2f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Query plans and latencies for the hot task / weather queries, before and
+after migration 1 (filter/sort indexes).
+
+    python benchmarks/bench_indexes.py --rows 200000
+    python benchmarks/bench_indexes.py --url mysql+pymysql://user:pw@localhost/bench_db
+
+The target database is wiped. Without --url a temporary SQLite file is used.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from database import Base
+from models import Task, WeatherLog
+import migrations
+
+STATUSES = ["Todo", "In Progress", "Done"]
+PRIORITIES = ["Low", "Medium", "High"]
+CITIES = ["London", "Paris", "Berlin", "Tokyo", "Chennai", "Toronto", "Sydney", "Lagos"]
+
+QUERIES = {
+    "process_view_default": (
+        "SELECT id, title, status, priority, due_date, created_at FROM tasks "
+        "WHERE status IN ('Todo', 'In Progress') "
+        "ORDER BY created_at DESC, id DESC LIMIT 25"
+    ),
+    "process_view_status_priority": (
+        "SELECT id, title, status, priority, due_date, created_at FROM tasks "
+        "WHERE status = 'Todo' AND priority = 'High' "
+        "ORDER BY created_at DESC, id DESC LIMIT 25"
+    ),
+    "dashboard_recent": (
+        "SELECT title, status, priority, created_at FROM tasks "
+        "ORDER BY created_at DESC, id DESC LIMIT 5"
+    ),
+    "weather_history": (
+        "SELECT id, city, temperature, `condition` FROM weather_logs "
+        "ORDER BY timestamp DESC LIMIT 10"
+    ),
+}
+
+def seed(engine, rows: int, batch: int = 10000):
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch):
+            conn.execute(Task.__table__.insert(), [
+                {
+                    "title": f"Task {i}", "content": "Lorem ipsum dolor sit amet. " * 4,
+                    "status": rng.choice(STATUSES), "priority": rng.choice(PRIORITIES),
+                    "created_at": start + timedelta(seconds=rng.randint(0, 10**8)),
+                }
+                for i in range(offset, min(offset + batch, rows))
+            ])
+            conn.execute(WeatherLog.__table__.insert(), [
+                {
+                    "city": rng.choice(CITIES), "temperature": f"{rng.uniform(-10, 35):.1f}°C",
+                    "condition": "Clear sky",
+                    "timestamp": start + timedelta(seconds=rng.randint(0, 10**8)),
+                }
+                for _ in range(offset, min(offset + batch, rows))
+            ])
+
+def drop_migrated_indexes(engine):
+    """Puts the schema back into its pre-migration-1 shape."""
+    with engine.begin() as conn:
+        for model in (Task, WeatherLog):
+            for index in model.__table__.indexes:
+                if index.name in ("ix_tasks_status_priority_created_at", "ix_tasks_created_at", "ix_weather_logs_timestamp"):
+                    index.drop(bind=conn)
+        conn.execute(migrations.models.SchemaMigration.__table__.delete())
+
+def explain(conn, sql: str):
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    return [" | ".join(str(col) for col in row) for row in conn.execute(text(prefix + sql))]
+
+def measure(engine, repeats: int):
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            sql = sql if conn.dialect.name == "mysql" else sql.replace("`", '"')
+            timings = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                conn.execute(text(sql)).fetchall()
+                timings.append((time.perf_counter() - t0) * 1000)
+            results[name] = {"median_ms": round(statistics.median(timings), 3), "plan": explain(conn, sql)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--url", help="SQLAlchemy URL of a scratch database (it will be wiped)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_indexes.db')}"
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    drop_migrated_indexes(engine)
+
+    print(f"Seeding {args.rows} tasks and weather logs into {engine.url.drivername}...")
+    seed(engine, args.rows)
+
+    before = measure(engine, args.repeats)
+    migrations.upgrade(engine)
+    after = measure(engine, args.repeats)
+
+    for name in QUERIES:
+        b, a = before[name], after[name]
+        print(f"\n== {name}: {b['median_ms']:.2f} ms -> {a['median_ms']:.2f} ms")
+        print("  before: " + "\n          ".join(b["plan"]))
+        print("  after:  " + "\n          ".join(a["plan"]))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"rows": args.rows, "backend": engine.url.drivername, "before": before, "after": after}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
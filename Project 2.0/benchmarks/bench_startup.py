@@ -0,0 +1,101 @@
+
+"""
+Cold-start cost of the UI process and of the logic-only modules.
+
+    python benchmarks/bench_startup.py --runs 5 --json startup.json
+    python benchmarks/bench_startup.py --modules crud,api,app --top 15
+
+Each module is imported in a fresh interpreter with `python -X importtime`.
+The total import time, the heaviest direct imports and the resident
+memory after import are reported (median over --runs).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ("crud", "database", "api", "app")
+
+PROBE = (
+    "import resource, sys, time; t = time.perf_counter(); import {module}; "
+    "elapsed = time.perf_counter() - t; "
+    "rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss; "
+    "print('STARTUP', elapsed, rss if sys.platform == 'darwin' else rss * 1024, "
+    "'engine' in vars(sys.modules.get('database', object)), len(sys.modules))"
+)
+
+def parse_importtime(stderr: str, module: str):
+    """{child: cumulative_us} for the modules `module` imported directly, from -X importtime output."""
+    children = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # One leading space, plus two per nesting level; children are listed before their parent
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children[name.strip()] = int(cumulative_us)
+        elif depth == 0:
+            if name.strip() == module:
+                return children
+            children = {}
+    return children
+
+def run_once(module: str):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    line = next(l for l in proc.stdout.splitlines() if l.startswith("STARTUP"))
+    _, seconds, rss_bytes, engine_created, module_count = line.split()
+    return {
+        "import_ms": float(seconds) * 1000,
+        "rss_mb": int(rss_bytes) / (1024 * 1024),
+        "engine_created": engine_created == "True",
+        "modules_loaded": int(module_count),
+        "top_imports": parse_importtime(proc.stderr, module),
+    }
+
+def measure(module: str, runs: int, top: int):
+    samples = [run_once(module) for _ in range(runs)]
+    heaviest = {}
+    for sample in samples:
+        for name, us in sample["top_imports"].items():
+            heaviest.setdefault(name, []).append(us)
+    ranked = sorted(((name, statistics.median(v) / 1000) for name, v in heaviest.items()), key=lambda kv: -kv[1])
+    return {
+        "import_ms": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "rss_mb": round(statistics.median(s["rss_mb"] for s in samples), 1),
+        "modules_loaded": samples[-1]["modules_loaded"],
+        "engine_created": any(s["engine_created"] for s in samples),
+        "heaviest_imports_ms": {name: round(ms, 1) for name, ms in ranked[:top]},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Heaviest direct imports to list")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for module in [m.strip() for m in args.modules.split(",") if m.strip()]:
+        stats = results[module] = measure(module, args.runs, args.top)
+        print(f"{module:<10} {stats['import_ms']:>8.1f} ms  {stats['rss_mb']:>7.1f} MB RSS  "
+              f"{stats['modules_loaded']:>5} modules  engine created: {stats['engine_created']}")
+        for name, ms in stats["heaviest_imports_ms"].items():
+            print(f"    {ms:>8.1f} ms  {name}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": sys.version.split()[0], "runs": args.runs, "modules": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
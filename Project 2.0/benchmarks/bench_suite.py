@@ -0,0 +1,239 @@
+
+"""
+End-to-end benchmark of the application hot paths on a seeded database.
+
+    python benchmarks/bench_suite.py --tasks 100000 --json results.json
+    python benchmarks/bench_suite.py --json new.json --compare results.json
+    python benchmarks/bench_suite.py --url mysql+pymysql://user:pw@localhost/bench_db
+
+Each scenario reports p50/p95/p99 latency, throughput and the peak Python
+allocation of a traced pass. Weather HTTP calls are answered by an
+in-process stub (optionally with --http-latency-ms of simulated delay).
+The target database is wiped. Without --url a temporary SQLite file is used.
+With --compare, scenarios whose p95 grew by more than --threshold percent
+are listed and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker
+from database import Base, create_app_engine
+from datagen import CITIES, PRIORITIES, STATUSES, WORDS, seed_database, sentence
+from query_cache import query_cache
+from crud import create_task
+from dashboard_stats import get_dashboard_stats
+from pagination import paginate_tasks, estimate_task_count
+from search import search_tasks
+import weather_service
+
+class _StubResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+def stub_http_get(latency_ms: float = 0.0):
+    """Replacement for weather_service.http_get answering geocoding and forecast requests."""
+    def http_get(url, params=None, timeout=5):
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        if url == weather_service.GEOCODING_URL:
+            return _StubResponse({"results": [{"latitude": 51.5, "longitude": -0.12}]})
+        return _StubResponse({"current_weather": {"temperature": 12.3, "weathercode": 2}})
+    return http_get
+
+def build_scenarios(session_factory, rng: random.Random):
+    """{name: callable} of the operations the UI and API run most."""
+    db = session_factory()
+    cursors = {}
+
+    def process_view_page():
+        statuses = rng.choice([["Todo", "In Progress"], ["Done"], None])
+        page = paginate_tasks(db, statuses, None, None, 25, cursors.get("after"))
+        cursors["after"] = page["next_cursor"] if rng.random() < 0.8 else None
+
+    def process_view_filtered():
+        paginate_tasks(db, [rng.choice(STATUSES)], [rng.choice(PRIORITIES)], None, 25)
+        estimate_task_count(db, [rng.choice(STATUSES)], None, None)
+
+    def search():
+        search_tasks(db, " ".join(rng.sample(WORDS, 2)))
+
+    def dashboard():
+        get_dashboard_stats(db)
+
+    def create():
+        content = " ".join(sentence(rng) for _ in range(rng.randint(2, 6)))
+        task, error = create_task(db, sentence(rng, 2, 5), content, rng.choice(PRIORITIES), "Todo", None)
+        if error:
+            raise RuntimeError(error[1])
+
+    def weather_cold():
+        weather_service.clear_weather_cache()
+        weather_service.get_weather(rng.choice(CITIES))
+
+    def weather_cached():
+        weather_service.get_weather(rng.choice(CITIES))
+
+    def weather_log():
+        weather_service.log_weather(db, rng.choice(CITIES), f"{rng.uniform(-10, 35):.1f}°C", "Clear sky")
+
+    scenarios = {
+        "process_view_page": process_view_page,
+        "process_view_filtered": process_view_filtered,
+        "search": search,
+        "dashboard_stats": dashboard,
+        "create_task": create,
+        "weather_cold": weather_cold,
+        "weather_cached": weather_cached,
+        "weather_log": weather_log,
+    }
+    return db, scenarios
+
+def percentile(sorted_ms, q: float) -> float:
+    if len(sorted_ms) == 1:
+        return sorted_ms[0]
+    position = (len(sorted_ms) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(sorted_ms) - 1)
+    return sorted_ms[low] + (sorted_ms[high] - sorted_ms[low]) * (position - low)
+
+def run_scenario(fn, iterations: int, warmup: int, traced: int):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+
+    # Separate pass: tracemalloc slows allocation-heavy code, so it is not timed
+    tracemalloc.start()
+    for _ in range(traced):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "ops_per_second": round(iterations / elapsed, 1) if elapsed else 0.0,
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(results, baseline, threshold: float):
+    """Returns [(scenario, old_p95, new_p95, change_percent)] for regressions beyond `threshold`."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old or not old["p95_ms"]:
+            continue
+        change = (current["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+        print(f"  {name:<24} p95 {old['p95_ms']:>9.3f} -> {current['p95_ms']:>9.3f} ms ({change:+.1f}%)")
+        if change > threshold:
+            regressions.append((name, old["p95_ms"], current["p95_ms"], round(change, 1)))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--weather", type=int, default=20000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--traced", type=int, default=20, help="Iterations of the memory-tracing pass")
+    parser.add_argument("--only", help="Comma-separated scenario names")
+    parser.add_argument("--http-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", help="SQLAlchemy URL of a scratch database (it will be wiped)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Allowed p95 growth in percent")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_suite.db')}"
+    engine = create_app_engine(url)
+    Base.metadata.drop_all(bind=engine)
+
+    print(f"Seeding {args.tasks} tasks and {args.weather} weather logs into {engine.url.drivername}...")
+    seed_seconds = seed_database(engine, args.tasks, args.weather, seed=args.seed)
+
+    # Measure the database paths, not the process-wide read cache in front of them
+    query_cache.enabled = False
+    db, scenarios = build_scenarios(sessionmaker(bind=engine), random.Random(args.seed))
+    if args.only:
+        wanted = {name.strip() for name in args.only.split(",")}
+        scenarios = {name: fn for name, fn in scenarios.items() if name in wanted}
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "backend": engine.url.drivername,
+            "python": platform.python_version(),
+            "tasks": args.tasks,
+            "weather_logs": args.weather,
+            "iterations": args.iterations,
+            "http_latency_ms": args.http_latency_ms,
+            "seed_seconds": round(seed_seconds, 2),
+        },
+        "scenarios": {},
+    }
+    try:
+        with patch.object(weather_service, "http_get", stub_http_get(args.http_latency_ms)):
+            for name, fn in scenarios.items():
+                stats = run_scenario(fn, args.iterations, args.warmup, args.traced)
+                results["scenarios"][name] = stats
+                print(f"{name:<24} p50 {stats['p50_ms']:>8.3f}  p95 {stats['p95_ms']:>8.3f}  "
+                      f"p99 {stats['p99_ms']:>8.3f} ms  {stats['ops_per_second']:>9.1f} ops/s  "
+                      f"peak {stats['peak_alloc_kb']:>8.1f} KB")
+    finally:
+        db.close()
+    # ru_maxrss is KB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["meta"]["max_rss_mb"] = round(max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} ({baseline.get('meta', {}).get('commit')}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} scenario(s) regressed by more than {args.threshold:.0f}% at p95.")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Throughput of the extractive summarizer versus the original first-sentence mock.
+
+    python benchmarks/bench_summarizer.py --docs 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from summarizer import summarize_text, summarize_many
+
+WORDS = (
+    "budget report client deploy release review invoice vendor meeting schedule roadmap "
+    "migrate database backup audit security patch hiring onboarding training quarterly "
+    "forecast revenue cost customer ticket escalate contract renewal design prototype"
+).split()
+
+def legacy_summarize(text: str) -> str:
+    """The original mock summarizer, kept here as the baseline."""
+    doc_len = len(text)
+    if doc_len < 50:
+        return f"Summary: {text} (Short text)"
+    sentences = text.split('.')
+    summary = sentences[0] + "." if sentences else text[:50] + "..."
+    return f"AI Generated Summary: {summary} [Analyzed {doc_len} chars]"
+
+def make_docs(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(n):
+        sentences = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))).capitalize() + "."
+            for _ in range(rng.randint(2, 8))
+        ]
+        docs.append(" ".join(sentences))
+    return docs
+
+def timed(label: str, fn, docs):
+    start = time.perf_counter()
+    fn(docs)
+    seconds = time.perf_counter() - start
+    rate = len(docs) / seconds
+    print(f"{label:<28} {seconds * 1000:9.1f} ms  {rate:12,.0f} docs/s")
+    return {"seconds": round(seconds, 4), "docs_per_second": round(rate, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    docs = make_docs(args.docs)
+    print(f"{args.docs} synthetic task descriptions, avg {sum(map(len, docs)) // len(docs)} chars\n")
+    results = {
+        "legacy_mock": timed("legacy mock (per doc)", lambda d: [legacy_summarize(t) for t in d], docs),
+        "summarize_text": timed("summarize_text (per doc)", lambda d: [summarize_text(t) for t in d], docs),
+        "summarize_many": timed("summarize_many (batch)", summarize_many, docs),
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"docs": args.docs, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+
+"""
+Weather lookup latency and availability under upstream faults, direct vs resilient.
+
+    python benchmarks/bench_weather.py --requests 30
+    python benchmarks/bench_weather.py --slow-ms 4000 --flaky-rate 0.5 --json weather.json
+
+Runs against weather_stub_server. OpenWeatherMap (with a key) is the
+preferred provider and gets the faults of each profile; Open-Meteo stays
+healthy except in "all_down". "direct" calls get_weather_openweathermap,
+as get_weather did before the provider layer; "resilient" calls
+get_weather (breakers, hedging, latency budget, last known value). The
+conditions cache is cleared before every lookup; every other lookup is for
+a city with a last known value. Errors count failed lookups, stale the
+answers served from the last known value. Injected failures are 503s, which
+the HTTP layer retries before a lookup sees them.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_suite import percentile
+from weather_stub_server import OPEN_METEO, OPENWEATHERMAP, StubWeatherServer
+import weather_providers
+import weather_service
+
+def profiles(slow_ms: float, flaky_rate: float):
+    down = {"failure_rate": 1.0}
+    return {
+        "healthy": {},
+        "slow": {OPENWEATHERMAP: {"latency_ms": slow_ms}},
+        "flaky": {OPENWEATHERMAP: {"failure_rate": flaky_rate}},
+        "down": {OPENWEATHERMAP: down},
+        "all_down": {OPENWEATHERMAP: down, OPEN_METEO: down},
+    }
+
+def run(lookup, requests: int, profile: str):
+    timings, errors, stale = [], 0, 0
+    for i in range(requests):
+        city = "Warm City" if i % 2 else f"{profile} City {i}"
+        weather_service.current_weather_cache.clear()
+        t0 = time.perf_counter()
+        try:
+            stale += bool(lookup(city).get("stale"))
+        except Exception:
+            errors += 1
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(percentile(timings, 0.50), 1),
+        "p95_ms": round(percentile(timings, 0.95), 1),
+        "max_ms": round(timings[-1], 1),
+        "errors": errors,
+        "stale": stale,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="Lookups per profile and path")
+    parser.add_argument("--slow-ms", type=float, default=2500.0, help="Latency of the slow profile")
+    parser.add_argument("--flaky-rate", type=float, default=0.3, help="Failure rate of the flaky profile")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    paths = {
+        "direct": lambda city: weather_service.get_weather_openweathermap(city, "bench-key"),
+        "resilient": lambda city: weather_service.get_weather(city, "bench-key"),
+    }
+    results = {"meta": {"requests": args.requests, "budget_ms": weather_providers.WEATHER_LATENCY_BUDGET_MS,
+                        "hedge_after_ms": weather_providers.WEATHER_HEDGE_AFTER_MS,
+                        "http_timeout_s": weather_service.WEATHER_HTTP_TIMEOUT}}
+    with StubWeatherServer(seed=1) as stub, stub.patched():
+        for profile, faults in profiles(args.slow_ms, args.flaky_rate).items():
+            for path, lookup in paths.items():
+                weather_service.clear_weather_cache()
+                weather_service.reset_weather_providers()
+                for provider in (OPEN_METEO, OPENWEATHERMAP):
+                    stub.configure(provider, latency_ms=0, failure_rate=0)
+                weather_service.get_weather("Warm City", "bench-key")  # seed the last known value
+                for provider, settings in faults.items():
+                    stub.configure(provider, **settings)
+                stats = results.setdefault(profile, {})[path] = run(lookup, args.requests, profile)
+                print(f"{profile:<9} {path:<10} p50 {stats['p50_ms']:>8.1f}  p95 {stats['p95_ms']:>8.1f}  "
+                      f"max {stats['max_ms']:>8.1f} ms  errors {stats['errors']:>3}  stale {stats['stale']:>3}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+
+"""
+Deterministic synthetic tasks and weather logs for benchmarks.
+
+    python benchmarks/datagen.py --tasks 100000 --weather 50000 --url sqlite:///bench.db
+
+Rows are written with multi-row INSERTs; the task_stats and weather rollups
+are rebuilt afterwards so every read path sees a consistent database.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker
+from database import create_app_engine
+from models import Task, WeatherLog
+from task_stats import rebuild_task_stats
+from weather_rollups import parse_temperature, rebuild_weather_rollups
+import migrations
+
+STATUSES = ["Todo", "In Progress", "Done"]
+PRIORITIES = ["Low", "Medium", "High"]
+CITIES = ["London", "Paris", "Berlin", "Tokyo", "Chennai", "Toronto", "Sydney", "Lagos"]
+CONDITIONS = ["Clear sky", "Partly cloudy", "Fog", "Drizzle", "Rain", "Snow", "Thunderstorm"]
+WORDS = (
+    "budget report client deploy release review invoice vendor meeting schedule roadmap "
+    "migrate database backup audit security patch hiring onboarding training quarterly "
+    "forecast revenue cost customer ticket escalate contract renewal design prototype"
+).split()
+
+START = datetime(2024, 1, 1)
+SPAN_SECONDS = 365 * 24 * 3600
+
+def sentence(rng: random.Random, low: int = 6, high: int = 16) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize() + "."
+
+def generate_tasks(n: int, seed: int = 42):
+    """Yields `n` task rows (dicts for Task.__table__.insert()) with a realistic status/priority mix."""
+    rng = random.Random(seed)
+    for i in range(n):
+        content = " ".join(sentence(rng) for _ in range(rng.randint(2, 8)))
+        created_at = START + timedelta(seconds=rng.randint(0, SPAN_SECONDS))
+        status = rng.choices(STATUSES, weights=(5, 2, 3))[0]
+        yield {
+            "title": f"{sentence(rng, 2, 5)[:-1]} #{i}",
+            "content": content,
+            "summary": f"AI Generated Summary: {content.split('.')[0]}.",
+            "status": status,
+            "priority": rng.choices(PRIORITIES, weights=(3, 5, 2))[0],
+            "due_date": (created_at + timedelta(days=rng.randint(1, 60))).date() if rng.random() < 0.7 else None,
+            "created_at": created_at,
+            "completed_at": created_at + timedelta(days=rng.randint(0, 30)) if status == "Done" else None,
+        }
+
+def generate_weather_logs(n: int, seed: int = 43):
+    rng = random.Random(seed)
+    for _ in range(n):
+        temperature = f"{rng.uniform(-10, 35):.1f}°C"
+        yield {
+            "city": rng.choice(CITIES),
+            "temperature": temperature,
+            "temperature_c": parse_temperature(temperature),
+            "condition": rng.choice(CONDITIONS),
+            "timestamp": START + timedelta(seconds=rng.randint(0, SPAN_SECONDS)),
+        }
+
+def _insert(conn, table, rows, batch: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= batch:
+            conn.execute(table.insert(), chunk)
+            chunk = []
+    if chunk:
+        conn.execute(table.insert(), chunk)
+
+def seed_database(engine, tasks: int, weather: int, batch: int = 5000, seed: int = 42):
+    """Migrates `engine`, inserts synthetic rows and rebuilds the rollups. Returns seconds taken."""
+    t0 = time.perf_counter()
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        _insert(conn, Task.__table__, generate_tasks(tasks, seed), batch)
+        _insert(conn, WeatherLog.__table__, generate_weather_logs(weather, seed + 1), batch)
+    db = sessionmaker(bind=engine)()
+    try:
+        rebuild_task_stats(db)
+        rebuild_weather_rollups(db)
+    finally:
+        db.close()
+    return time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--weather", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", required=True, help="SQLAlchemy URL of the database to fill")
+    args = parser.parse_args()
+
+    engine = create_app_engine(args.url)
+    seconds = seed_database(engine, args.tasks, args.weather, seed=args.seed)
+    print(f"Seeded {args.tasks} tasks and {args.weather} weather logs in {seconds:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+
+"""
+Streaming bulk import of tasks from CSV or JSONL.
+
+    python bulk_import.py tasks.csv
+    python bulk_import.py tasks.jsonl --chunk-size 5000
+
+Rows are validated with `schemas.TaskCreate`, summarized a chunk at a time
+and written with one multi-row INSERT and one commit per chunk.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from models import Task
+from schemas import TaskCreate
+from summary_cache import cached_summarize_many
+from task_stats import apply_task_deltas, count_deltas
+from query_cache import TASKS, invalidate
+
+CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+OPTIONAL_FIELDS = ("priority", "status", "due_date")
+
+def read_csv(path: str):
+    """Yields (line_number, row_dict) from a CSV file with a header row."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+
+def read_jsonl(path: str):
+    """Yields (line_number, row_dict) from a JSON-lines file, skipping blank lines."""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, e
+
+def read_rows(path: str):
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        return read_jsonl(path)
+    return read_csv(path)
+
+def _chunks(rows, size: int):
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _validate(row):
+    if isinstance(row, Exception):
+        raise ValueError(f"Invalid JSON: {row}")
+    # Blank optional cells (common in CSV) fall back to the schema defaults
+    data = {k: v for k, v in row.items() if not (k in OPTIONAL_FIELDS and v in ("", None))}
+    return TaskCreate(**data)
+
+def summarize_batch(texts):
+    return cached_summarize_many(texts)
+
+def import_chunk(db: Session, chunk):
+    """
+    Validates, summarizes and inserts one chunk in a single transaction.
+    Returns (inserted_count, [(line_number, message), ...]).
+    """
+    valid, valid_lines, errors = [], [], []
+    for line_no, row in chunk:
+        try:
+            valid.append(_validate(row))
+            valid_lines.append(line_no)
+        except ValidationError as e:
+            details = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            errors.append((line_no, f"Validation Error: {details}"))
+        except Exception as e:
+            errors.append((line_no, str(e)))
+
+    if not valid:
+        return 0, errors
+
+    summaries = summarize_batch([task.content for task in valid])
+    records = [
+        {
+            "title": task.title, "content": task.content, "summary": summary,
+            "priority": task.priority, "status": task.status, "due_date": task.due_date,
+        }
+        for task, summary in zip(valid, summaries)
+    ]
+    try:
+        db.execute(insert(Task), records)
+        apply_task_deltas(db, count_deltas((r["status"], r["priority"]) for r in records))
+        db.commit()
+        invalidate(TASKS)
+    except Exception as e:
+        db.rollback()
+        return 0, errors + [(line_no, f"Database Error: {e}") for line_no in valid_lines]
+    return len(records), errors
+
+def import_tasks(db: Session, rows, chunk_size: int = CHUNK_SIZE, progress=None):
+    """
+    Imports an iterable of (line_number, row_dict) in chunks.
+    `progress(report)` is called after each chunk. Returns a report dict.
+    """
+    report = {"imported": 0, "failed": 0, "errors": [], "seconds": 0.0, "rows_per_second": 0.0}
+    start = time.perf_counter()
+    for chunk in _chunks(rows, chunk_size):
+        inserted, errors = import_chunk(db, chunk)
+        report["imported"] += inserted
+        report["failed"] += len(errors)
+        report["errors"].extend(errors)
+        report["seconds"] = time.perf_counter() - start
+        report["rows_per_second"] = report["imported"] / report["seconds"] if report["seconds"] else 0.0
+        if progress:
+            progress(report)
+    return report
+
+def import_file(db: Session, path: str, chunk_size: int = CHUNK_SIZE, progress=None):
+    return import_tasks(db, read_rows(path), chunk_size, progress)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import tasks from CSV or JSONL.")
+    parser.add_argument("path")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--max-errors", type=int, default=20, help="Errors to print (all are counted)")
+    args = parser.parse_args()
+
+    from database import session_scope
+
+    def progress(report):
+        print(f"\r{report['imported']} imported, {report['failed']} failed "
+              f"({report['rows_per_second']:.0f} rows/s)", end="", flush=True)
+
+    with session_scope() as db:
+        report = import_file(db, args.path, args.chunk_size, progress)
+    print()
+    for line_no, message in report["errors"][:args.max_errors]:
+        print(f"  line {line_no}: {message}")
+    print(f"Done: {report['imported']} imported, {report['failed']} failed in {report['seconds']:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+
+"""
+Set-wise bulk operations on tasks and weather logs.
+
+Matching rows are processed in id-ordered chunks: each chunk is one SELECT
+of the ids, one DELETE/UPDATE ... WHERE id IN (...) and one commit, so a
+transaction never holds more than `chunk_size` rows. The task_stats rollup
+is adjusted in the same transaction and the query cache is invalidated
+after every commit.
+
+    python bulk_ops.py delete-tasks --status Done --due-to 2024-12-31
+    python bulk_ops.py set-status Done --ids 4,8,15
+    python bulk_ops.py delete-weather --before 2025-01-01 --city London
+    python bulk_ops.py delete-tasks --status Done --dry-run   # count only
+"""
+import argparse
+import os
+from datetime import date, datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models import Task, WeatherLog, SummaryJob
+from task_stats import apply_task_deltas, count_deltas
+from query_cache import TASKS, WEATHER, invalidate
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+TASK_STATUSES = ("Todo", "In Progress", "Done")
+
+def task_conditions(status=None, priority=None, due_from: date = None, due_to: date = None, ids=None):
+    """WHERE clauses for the bulk task filters; every given filter must match."""
+    conditions = []
+    if status: conditions.append(Task.status.in_(status))
+    if priority: conditions.append(Task.priority.in_(priority))
+    if due_from: conditions.append(Task.due_date >= due_from)
+    if due_to: conditions.append(Task.due_date <= due_to)
+    if ids is not None: conditions.append(Task.id.in_(list(ids)))
+    return conditions
+
+def weather_conditions(before: datetime = None, city: str = None, ids=None):
+    conditions = []
+    if before: conditions.append(WeatherLog.timestamp < before)
+    if city: conditions.append(WeatherLog.city == city)
+    if ids is not None: conditions.append(WeatherLog.id.in_(list(ids)))
+    return conditions
+
+def _require_filter(conditions):
+    if not conditions:
+        raise ValueError("At least one filter is required for a bulk operation.")
+
+def count_matching(db: Session, model, conditions) -> int:
+    return db.query(func.count(model.id)).filter(*conditions).scalar()
+
+def iter_locked_chunks(db: Session, columns, conditions, chunk_size: int):
+    """
+    Yields successive id-ordered chunks of matching rows, locked for update
+    where the backend supports it. The caller commits between chunks.
+    """
+    id_column = columns[0]
+    last_id = 0
+    while True:
+        rows = (
+            db.query(*columns)
+            .filter(*conditions, id_column > last_id)
+            .order_by(id_column)
+            .limit(chunk_size)
+            .with_for_update()
+            .all()
+        )
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+def bulk_delete_tasks(db: Session, chunk_size: int = BULK_CHUNK_SIZE, dry_run: bool = False, **filters) -> int:
+    """Deletes every task matching `filters` (see task_conditions). Returns the number deleted."""
+    conditions = task_conditions(**filters)
+    _require_filter(conditions)
+    if dry_run:
+        return count_matching(db, Task, conditions)
+
+    deleted = 0
+    try:
+        for rows in iter_locked_chunks(db, (Task.id, Task.status, Task.priority), conditions, chunk_size):
+            ids = [row.id for row in rows]
+            db.query(SummaryJob).filter(SummaryJob.task_id.in_(ids)).delete(synchronize_session=False)
+            deleted += db.query(Task).filter(Task.id.in_(ids)).delete(synchronize_session=False)
+            apply_task_deltas(db, count_deltas(((row.status, row.priority) for row in rows), -1))
+            db.commit()
+            invalidate(TASKS)
+    except Exception:
+        db.rollback()
+        raise
+    return deleted
+
+def bulk_update_status(db: Session, new_status: str, chunk_size: int = BULK_CHUNK_SIZE,
+                       dry_run: bool = False, **filters) -> int:
+    """Sets the status of every task matching `filters`. Returns the number of rows changed."""
+    if new_status not in TASK_STATUSES:
+        raise ValueError(f"Unknown status '{new_status}'.")
+    conditions = task_conditions(**filters) + [Task.status != new_status]
+    _require_filter(conditions[:-1])
+    if dry_run:
+        return count_matching(db, Task, conditions)
+
+    updated = 0
+    completed_at = datetime.now() if new_status == "Done" else None
+    try:
+        for rows in iter_locked_chunks(db, (Task.id, Task.status, Task.priority), conditions, chunk_size):
+            ids = [row.id for row in rows]
+            updated += (
+                db.query(Task).filter(Task.id.in_(ids))
+                .update({Task.status: new_status, Task.completed_at: completed_at}, synchronize_session=False)
+            )
+            deltas = count_deltas(((row.status, row.priority) for row in rows), -1)
+            deltas.update(count_deltas((new_status, row.priority) for row in rows))
+            apply_task_deltas(db, deltas)
+            db.commit()
+            invalidate(TASKS)
+    except Exception:
+        db.rollback()
+        raise
+    return updated
+
+def bulk_delete_weather_logs(db: Session, chunk_size: int = BULK_CHUNK_SIZE, dry_run: bool = False,
+                             **filters) -> int:
+    """Deletes every weather log matching `filters` (see weather_conditions). Returns the number deleted."""
+    conditions = weather_conditions(**filters)
+    _require_filter(conditions)
+    if dry_run:
+        return count_matching(db, WeatherLog, conditions)
+
+    deleted = 0
+    try:
+        for rows in iter_locked_chunks(db, (WeatherLog.id,), conditions, chunk_size):
+            ids = [row.id for row in rows]
+            deleted += db.query(WeatherLog).filter(WeatherLog.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+            invalidate(WEATHER)
+    except Exception:
+        db.rollback()
+        raise
+    return deleted
+
+# --- CLI ---
+
+def _csv(value):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+def _ids(value):
+    return [int(v) for v in _csv(value)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk delete / update tasks and weather logs.")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Only count matching rows")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def task_filters(sub):
+        sub.add_argument("--status", type=_csv, help="Comma-separated statuses")
+        sub.add_argument("--priority", type=_csv, help="Comma-separated priorities")
+        sub.add_argument("--due-from", type=date.fromisoformat)
+        sub.add_argument("--due-to", type=date.fromisoformat)
+        sub.add_argument("--ids", type=_ids, help="Comma-separated task ids")
+
+    task_filters(commands.add_parser("delete-tasks"))
+    set_status = commands.add_parser("set-status")
+    set_status.add_argument("new_status", choices=TASK_STATUSES)
+    task_filters(set_status)
+    weather = commands.add_parser("delete-weather")
+    weather.add_argument("--before", type=datetime.fromisoformat)
+    weather.add_argument("--city")
+    weather.add_argument("--ids", type=_ids, help="Comma-separated log ids")
+    args = parser.parse_args()
+
+    from database import session_scope
+
+    options = dict(chunk_size=args.chunk_size, dry_run=args.dry_run)
+    with session_scope() as db:
+        if args.command == "delete-weather":
+            count = bulk_delete_weather_logs(db, before=args.before, city=args.city, ids=args.ids, **options)
+        else:
+            filters = dict(status=args.status, priority=args.priority, due_from=args.due_from,
+                           due_to=args.due_to, ids=args.ids)
+            if args.command == "set-status":
+                count = bulk_update_status(db, args.new_status, **filters, **options)
+            else:
+                count = bulk_delete_tasks(db, **filters, **options)
+    print(f"{count} row(s) {'match' if args.dry_run else 'affected'}.")
+
+if __name__ == "__main__":
+    main()
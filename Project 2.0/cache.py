@@ -0,0 +1,172 @@
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class SQLiteStore:
+    """
+    Optional on-disk tier for LRUCache. Values must be JSON-serializable.
+    Several caches can share one file by using different table names.
+    Expired rows are purged on open and every `purge_every` writes.
+    """
+
+    def __init__(self, path: str, table: str = "cache", purge_every: int = 500, clock=time.time):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table!r}")
+        self.table = table
+        self.purge_every = purge_every
+        self._clock = clock
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+        self.purge_expired()
+
+    def get(self, key: str):
+        """Returns (value, expires_at) or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value, expires_at):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+            self._writes += 1
+            due = self.purge_every and self._writes % self.purge_every == 0
+        if due:
+            self.purge_expired()
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def purge_expired(self) -> int:
+        """Deletes every entry whose TTL has passed. Returns the count."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at <= ?", (self._clock(),)
+            )
+            return cur.rowcount
+
+    def prune(self, keep_prefix: str):
+        """Deletes every entry whose key does not start with `keep_prefix`. Returns the count."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE substr(key, 1, ?) != ?", (len(keep_prefix), keep_prefix)
+            )
+            return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with an optional per-entry TTL and an optional
+    persistent `store` (e.g. SQLiteStore) used as a write-through second tier.
+    Keys evicted from memory are deleted from the store too, so it stays
+    bounded by `maxsize`.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None, store=None, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store = store
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.RLock()
+        self.hits = self.misses = self.evictions = self.expirations = self.store_hits = 0
+
+    @staticmethod
+    def _store_key(key) -> str:
+        return key if isinstance(key, str) else repr(key)
+
+    def _expired(self, expires_at) -> bool:
+        return expires_at is not None and expires_at <= self._clock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if not self._expired(entry[1]):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._data[key]
+                self.expirations += 1
+
+            if self.store is not None:
+                stored = self.store.get(self._store_key(key))
+                if stored is not None:
+                    if not self._expired(stored[1]):
+                        self._put(key, stored[0], stored[1])
+                        self.hits += 1
+                        self.store_hits += 1
+                        return stored[0]
+                    self.store.delete(self._store_key(key))
+
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._put(key, value, expires_at)
+            if self.store is not None:
+                self.store.set(self._store_key(key), value, expires_at)
+
+    def _put(self, key, value, expires_at):
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            evicted, _ = self._data.popitem(last=False)
+            self.evictions += 1
+            if self.store is not None:
+                self.store.delete(self._store_key(evicted))
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            if self.store is not None:
+                self.store.delete(self._store_key(key))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            if self.store is not None:
+                self.store.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "store_hits": self.store_hits,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,61 @@
+
+"""
+Task CRUD shared by the Streamlit UI, the JSON API and the tools.
+
+Kept free of UI imports so API workers, CLIs and tests can use it without
+loading Streamlit, pandas or altair.
+"""
+from datetime import date
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from models import Task, SummaryJob
+from schemas import TaskCreate
+from summary_cache import cached_summarize
+from summary_queue import enqueue_summary
+from task_stats import apply_task_delta
+from query_cache import TASKS, invalidate
+from task_repository import get_task
+
+def create_task(db: Session, title: str, content: str, priority: str, status: str, due_date: date,
+                defer_summary: bool = False):
+    """
+    Validates and inserts a task. With `defer_summary` the summary is left
+    empty and a background summary job is queued in the same transaction.
+    """
+    try:
+        task_data = TaskCreate(
+            title=title, content=content, priority=priority,
+            status=status, due_date=due_date
+        )
+        summary = None if defer_summary else cached_summarize(task_data.content)
+        db_task = Task(
+            title=task_data.title, content=task_data.content, summary=summary,
+            priority=task_data.priority, status=task_data.status, due_date=task_data.due_date
+        )
+        db.add(db_task)
+        apply_task_delta(db, db_task.status, db_task.priority, +1)
+        if defer_summary:
+            db.flush()
+            enqueue_summary(db, db_task.id)
+        db.commit()
+        invalidate(TASKS)
+        db.refresh(db_task)
+        return db_task, None
+    except ValidationError as e:
+        return None, (422, f"Validation Error: {e}")
+    except Exception as e:
+        return None, (500, f"Database Error: {str(e)}")
+
+def delete_task(db: Session, task_id: int):
+    try:
+        # Only status and priority are needed for the stats delta; content/summary stay unloaded
+        task = get_task(db, task_id)
+        if not task: return False, (404, "Task not found")
+        db.query(SummaryJob).filter(SummaryJob.task_id == task_id).delete(synchronize_session=False)
+        apply_task_delta(db, task.status, task.priority, -1)
+        db.delete(task)
+        db.commit()
+        invalidate(TASKS)
+        return True, (200, "Task deleted")
+    except Exception as e:
+        return False, (500, f"Database Error: {str(e)}")
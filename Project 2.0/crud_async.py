@@ -0,0 +1,103 @@
+
+"""
+Async counterparts of the task and weather-log writes, for AsyncSession.
+
+Same validation, rollup maintenance, cache invalidation and (result, error)
+return shape as crud.create_task / crud.delete_task and the weather_service
+log functions. The rollup helpers are shared with the sync path through
+`AsyncSession.run_sync`, which runs them on the session's connection inside
+the same transaction; the CPU-bound summarizer runs on a worker thread so it
+does not stall the event loop.
+
+    async with AsyncSessionLocal() as db:
+        task, error = await create_task(db, "Title", "Content", "High", "Todo", None)
+"""
+import asyncio
+from datetime import date, datetime
+from pydantic import ValidationError
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Task, SummaryJob, WeatherLog
+from schemas import TaskCreate
+from summary_cache import cached_summarize
+from summary_queue import enqueue_summary
+from task_stats import apply_task_delta
+from task_repository import load_options
+from query_cache import TASKS, WEATHER, invalidate
+from weather_rollups import apply_weather_samples, parse_temperature
+from weather_service import get_weather_async
+
+async def create_task(db: AsyncSession, title: str, content: str, priority: str, status: str, due_date: date,
+                      defer_summary: bool = False):
+    try:
+        task_data = TaskCreate(
+            title=title, content=content, priority=priority,
+            status=status, due_date=due_date
+        )
+        summary = None if defer_summary else await asyncio.to_thread(cached_summarize, task_data.content)
+        db_task = Task(
+            title=task_data.title, content=task_data.content, summary=summary,
+            priority=task_data.priority, status=task_data.status, due_date=task_data.due_date
+        )
+        db.add(db_task)
+        await db.run_sync(apply_task_delta, db_task.status, db_task.priority, +1)
+        if defer_summary:
+            await db.flush()
+            await db.run_sync(enqueue_summary, db_task.id)
+        await db.commit()
+        invalidate(TASKS)
+        await db.refresh(db_task)
+        return db_task, None
+    except ValidationError as e:
+        return None, (422, f"Validation Error: {e}")
+    except Exception as e:
+        await db.rollback()
+        return None, (500, f"Database Error: {str(e)}")
+
+async def delete_task(db: AsyncSession, task_id: int):
+    try:
+        task = await db.get(Task, task_id, options=load_options())
+        if not task: return False, (404, "Task not found")
+        await db.execute(delete(SummaryJob).where(SummaryJob.task_id == task_id))
+        await db.run_sync(apply_task_delta, task.status, task.priority, -1)
+        await db.delete(task)
+        await db.commit()
+        invalidate(TASKS)
+        return True, (200, "Task deleted")
+    except Exception as e:
+        await db.rollback()
+        return False, (500, f"Database Error: {str(e)}")
+
+async def log_weather(db: AsyncSession, city: str, temperature: str, condition: str):
+    """Logs the weather inquiry and folds it into the hourly/daily rollups."""
+    temperature_c = parse_temperature(temperature)
+    log = WeatherLog(city=city, temperature=temperature, temperature_c=temperature_c,
+                     condition=condition, timestamp=datetime.now())
+    db.add(log)
+    await db.run_sync(apply_weather_samples, [(city, temperature_c, log.timestamp)])
+    await db.commit()
+    invalidate(WEATHER)
+    return log
+
+async def delete_weather_log(db: AsyncSession, log_id: int):
+    try:
+        result = await db.execute(delete(WeatherLog).where(WeatherLog.id == log_id))
+        if not result.rowcount:
+            await db.rollback()
+            return False, (404, "Log not found")
+        await db.commit()
+        invalidate(WEATHER)
+        return True, (200, "Log deleted")
+    except Exception as e:
+        await db.rollback()
+        return False, (500, f"Database Error: {str(e)}")
+
+async def fetch_and_log_weather(db: AsyncSession, city: str, api_key: str = None):
+    """
+    Current weather for `city`, logged; the HTTP wait and the insert both
+    yield to other callers. A stale last-known value is returned unlogged.
+    """
+    data = await get_weather_async(city, api_key)
+    if not data.get("stale"):
+        await log_weather(db, city, data["temperature"], data["condition"])
+    return data
@@ -0,0 +1,45 @@
+
+from sqlalchemy.orm import Session
+from models import Task
+from task_stats import get_stat_rows
+
+def get_recent_tasks(db: Session, limit: int = 5):
+    """Latest tasks, selecting only the columns the activity log shows."""
+    return (
+        db.query(Task.title, Task.status, Task.priority, Task.created_at)
+        .order_by(Task.created_at.desc(), Task.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+def get_dashboard_stats(db: Session, recent_limit: int = 5):
+    """
+    Computes every number the dashboard needs with two small queries: the
+    task_stats rollup (a handful of counter rows) and one ORDER BY ... LIMIT.
+    Totals are all-time: archived tasks are counted through the rollup.
+    """
+    by_status = {}
+    by_priority = {}
+    total = completed = high = archived = 0
+
+    for status, priority, hot, cold in get_stat_rows(db):
+        count = hot + cold
+        archived += cold
+        total += count
+        by_status[status] = by_status.get(status, 0) + count
+        by_priority[priority] = by_priority.get(priority, 0) + count
+        if status == "Done":
+            completed += count
+        elif priority == "High":
+            high += count
+
+    return {
+        "total": total,
+        "completed": completed,
+        "pending": total - completed,
+        "high_priority": high,
+        "archived": archived,
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "recent": get_recent_tasks(db, recent_limit),
+    }
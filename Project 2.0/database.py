@@ -1,10 +1,16 @@
 
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, StaticPool
 from dotenv import load_dotenv
 import sqlalchemy
 from urllib.parse import quote_plus
+from instrumentation import instrument_engine
 
 load_dotenv()
 
@@ -13,21 +19,271 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_NAME = os.getenv("DB_NAME", "task_manager_db")
 
+# Connection pool settings (see README for the environment variables)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
 # URL encode credentials to handle special characters
 encoded_user = quote_plus(DB_USER) if DB_USER else ""
 encoded_password = quote_plus(DB_PASSWORD) if DB_PASSWORD else ""
 
-# Construct connection URL
-DATABASE_URL = f"mysql+pymysql://{encoded_user}:{encoded_password}@{DB_HOST}/{DB_NAME}"
+# Backend selection: DATABASE_URL wins (e.g. sqlite:///data/tasks.db); otherwise MySQL from the DB_* variables
+DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+pymysql://{encoded_user}:{encoded_password}@{DB_HOST}/{DB_NAME}"
+
+# Embedded SQLite tuning (ignored for other backends)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+
+# --- POOL METRICS ---
+
+class PoolMetrics:
+    """Thread-safe counters for connection pool activity."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.checked_out = 0
+            self.peak_checked_out = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def record_checkout(self, wait_seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def record_checkin(self):
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+            }
+
+pool_metrics = PoolMetrics()
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited (queueing, connect and pre-ping)."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except sqlalchemy.exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - start)
+        return conn
+
+def instrument_pool(engine):
+    """Attaches pool event listeners that feed `pool_metrics`."""
+    event.listen(engine, "checkin", lambda dbapi_conn, record: pool_metrics.record_checkin())
+    event.listen(engine, "connect", lambda dbapi_conn, record: pool_metrics.record_connect())
+    event.listen(engine, "invalidate", lambda dbapi_conn, record, exc: pool_metrics.record_invalidation())
+    return engine
+
+# --- ENGINE ---
+
+def is_memory_sqlite(url) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def configure_sqlite(engine):
+    """
+    Per-connection pragmas for an embedded SQLite database: WAL so readers
+    never block the writer, synchronous=NORMAL (durable at checkpoints, much
+    cheaper commits), memory-mapped reads, a larger page cache, a busy
+    timeout instead of immediate "database is locked" errors, and foreign keys.
+    """
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_conn, record):
+        cursor = dbapi_conn.cursor()
+        if not is_memory_sqlite(engine.url):
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+    return engine
+
+def create_app_engine(url: str = DATABASE_URL, **overrides):
+    """
+    Engine for `url` with the metered pool and instrumentation attached.
+    SQLite files share a pool of WAL connections across threads; an
+    in-memory SQLite database uses one shared connection (StaticPool).
+    """
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        if is_memory_sqlite(url):
+            options = dict(poolclass=StaticPool)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+            options = dict(poolclass=MeteredQueuePool, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                           pool_timeout=DB_POOL_TIMEOUT, pool_pre_ping=DB_POOL_PRE_PING)
+        options["connect_args"] = {"check_same_thread": False}
+        options.update(overrides)
+        engine = configure_sqlite(create_engine(url, **options))
+    else:
+        options = dict(
+            poolclass=MeteredQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+        options.update(overrides)
+        engine = create_engine(url, **options)
+    return instrument_engine(instrument_pool(engine))
+
+# The engine is built on first use (get_engine(), `database.engine` or the first
+# SessionLocal()), so importing this module never touches the driver or the network.
+_engine_lock = threading.Lock()
 
-# Create the engine
-# We might need to create the database first if it doesn't exist.
-# A common pattern is to connect to the server without a DB to create it.
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def get_engine():
+    """The process-wide application engine, created on first call."""
+    global engine
+    if "engine" not in globals():
+        with _engine_lock:
+            if "engine" not in globals():
+                engine = create_app_engine(DATABASE_URL)
+                SessionLocal.configure(bind=engine)
+    return engine
+
+def __getattr__(name):
+    # PEP 562: `from database import engine` / `database.engine` create it lazily
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class LazySessionMaker(sessionmaker):
+    """sessionmaker that binds to the application engine the first time a session is made."""
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None and "bind" not in local_kw:
+            get_engine()
+        return super().__call__(**local_kw)
+
+SessionLocal = LazySessionMaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
+# --- ASYNC ENGINE ---
+# Optional asyncio engine (needs greenlet plus aiosqlite / aiomysql), used by crud_async.
+# ASYNC_DATABASE_URL defaults to DATABASE_URL with the matching async driver.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "mysql": "mysql+aiomysql"}
+
+def async_url(url):
+    """`url` with its driver swapped for the async one of the same backend."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}'.")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def create_async_app_engine(url=None, **overrides):
+    """
+    AsyncEngine for `url` (default ASYNC_DATABASE_URL, else DATABASE_URL)
+    with the same pool settings, SQLite pragmas and SQL instrumentation as
+    create_app_engine. Pool counters are not fed, since the async pool has
+    its own checkout path.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+    url = async_url(url or ASYNC_DATABASE_URL or DATABASE_URL)
+    if is_memory_sqlite(url):
+        options = dict(poolclass=StaticPool)
+    else:
+        options = dict(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                       pool_timeout=DB_POOL_TIMEOUT, pool_pre_ping=DB_POOL_PRE_PING)
+        if url.get_backend_name() == "sqlite":
+            os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+        else:
+            options["pool_recycle"] = DB_POOL_RECYCLE
+    options.update(overrides)
+    engine = create_async_engine(url, **options)
+    if url.get_backend_name() == "sqlite":
+        configure_sqlite(engine.sync_engine)
+    instrument_engine(engine.sync_engine)
+    return engine
+
+_async_lock = threading.Lock()
+_async_engine = None
+_async_sessionmaker = None
+
+def get_async_engine():
+    """The process-wide AsyncEngine, created on first call."""
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        with _async_lock:
+            if _async_engine is None:
+                from sqlalchemy.ext.asyncio import async_sessionmaker
+                engine = create_async_app_engine()
+                # Objects stay readable after commit without an implicit (awaitable) refresh
+                _async_sessionmaker = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+                _async_engine = engine
+    return _async_engine
+
+async def dispose_async_engine():
+    """Closes the process-wide AsyncEngine's connections, if it was created; the next use creates a new one."""
+    global _async_engine, _async_sessionmaker
+    with _async_lock:
+        engine, _async_engine, _async_sessionmaker = _async_engine, None, None
+    if engine is not None:
+        await engine.dispose()
+
+def AsyncSessionLocal():
+    """New AsyncSession on the application's async engine."""
+    get_async_engine()
+    return _async_sessionmaker()
+
+async def get_async_db():
+    """FastAPI dependency yielding an AsyncSession."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def get_db():
     db = SessionLocal()
     try:
@@ -35,14 +291,44 @@ def get_db():
     finally:
         db.close()
 
+@contextmanager
+def session_scope():
+    """
+    One session per unit of work (e.g. a Streamlit rerun). The session is
+    always closed on exit, returning its connection to the pool, and any
+    uncommitted transaction is rolled back.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def get_pool_metrics():
+    """Pool counters plus the live pool state, for monitoring."""
+    pool = get_engine().pool
+    metrics = pool_metrics.snapshot()
+    metrics.update({
+        "pool_size": pool.size() if hasattr(pool, "size") else None,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+        "idle": pool.checkedin() if hasattr(pool, "checkedin") else None,
+    })
+    return metrics
+
 def init_db():
-    # Helper to create database if not exists
-    # Connect to default database (mysql or sys) to create the target db
-    server_url = f"mysql+pymysql://{encoded_user}:{encoded_password}@{DB_HOST}"
-    server_engine = create_engine(server_url)
-    with server_engine.connect() as conn:
-        conn.execute(sqlalchemy.text(f"CREATE DATABASE IF NOT EXISTS {DB_NAME}"))
-    
-    # Now create tables
-    import models
-    models.Base.metadata.create_all(bind=engine)
+    """Creates the database if the backend needs it, then tables and pending migrations."""
+    engine = get_engine()
+    url = engine.url
+    if url.get_backend_name() == "mysql":
+        # Connect to the server without a database to create the target one
+        server_engine = create_engine(url.set(database=None))
+        with server_engine.connect() as conn:
+            conn.execute(sqlalchemy.text(f"CREATE DATABASE IF NOT EXISTS `{url.database}`"))
+        server_engine.dispose()
+
+    # Now create tables and apply any pending schema migrations
+    import migrations
+    migrations.upgrade(engine)
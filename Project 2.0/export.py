@@ -0,0 +1,180 @@
+
+"""
+Streaming export of tasks, archived tasks and weather logs to CSV, JSONL or
+Parquet. `tasks` holds only live tasks; once archive.py has run, export
+`archived_tasks` as well for the full history.
+
+    python export.py tasks tasks.csv
+    python export.py archived_tasks archive.csv
+    python export.py tasks tasks.parquet --columns id,title,status,priority,due_date
+    python export.py weather_logs weather.jsonl --chunk-size 5000
+
+Rows are read with a server-side cursor (`stream_results` + `yield_per`)
+and written one chunk at a time, so memory stays flat regardless of table
+size. Parquet output needs `pyarrow` and gets one row group per chunk.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, Float, Integer, select
+from sqlalchemy.orm import Session
+from models import ArchivedTask, Task, WeatherLog
+
+CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+FORMATS = ("csv", "jsonl", "parquet")
+
+TABLES = {
+    "tasks": (Task, ("id", "title", "content", "summary", "status", "priority", "due_date", "created_at",
+                     "completed_at")),
+    "archived_tasks": (ArchivedTask, ("archive_id", "id", "title", "content", "summary", "status", "priority",
+                                      "due_date", "created_at", "completed_at", "archived_at")),
+    "weather_logs": (WeatherLog, ("id", "city", "temperature", "temperature_c", "condition", "timestamp")),
+}
+
+def export_columns(table: str, columns=None):
+    """Validates a table name and optional column projection; returns the SQLAlchemy columns."""
+    if table not in TABLES:
+        raise ValueError(f"Unknown table '{table}' (choose from {', '.join(TABLES)}).")
+    model, default = TABLES[table]
+    names = list(columns or default)
+    unknown = [name for name in names if name not in default]
+    if unknown:
+        raise ValueError(f"Unknown column(s) for {table}: {', '.join(unknown)}")
+    return [getattr(model, name) for name in names]
+
+def format_for_path(path: str):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    fmt = {"ndjson": "jsonl", "pq": "parquet"}.get(extension, extension)
+    if fmt not in FORMATS:
+        raise ValueError(f"Cannot infer export format from '{path}' (use .csv, .jsonl or .parquet).")
+    return fmt
+
+def iter_chunks(db: Session, columns, chunk_size: int = CHUNK_SIZE):
+    """Yields lists of row tuples in primary-key order, `chunk_size` rows at a time, from a server-side cursor."""
+    stmt = select(*columns).order_by(*columns[0].class_.__mapper__.primary_key)
+    result = db.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+def iter_csv(chunks, names):
+    """CSV text, one string per chunk (the header comes with the first)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for rows in chunks:
+        writer.writerows([_plain(v) for v in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def iter_jsonl(chunks, names):
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(names, (_plain(v) for v in row))), ensure_ascii=False) + "\n" for row in rows
+        )
+
+def _arrow_schema(columns):
+    import pyarrow as pa
+    fields = []
+    for column in columns:
+        if isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column.type, Date):
+            arrow_type = pa.date32()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.key, arrow_type))
+    return pa.schema(fields)
+
+def write_parquet(chunks, columns, path, progress_rows=None):
+    """Writes each chunk as one Parquet row group."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow).")
+    schema = _arrow_schema(columns)
+    with pq.ParquetWriter(path, schema, compression="snappy") as writer:
+        for rows in chunks:
+            arrays = [
+                pa.array([row[i].replace(tzinfo=None) if isinstance(row[i], datetime) else row[i] for row in rows],
+                         type=field.type)
+                for i, field in enumerate(schema)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            if progress_rows:
+                progress_rows(len(rows))
+
+def export_table(db: Session, table: str, path: str, fmt: str = None, columns=None,
+                 chunk_size: int = CHUNK_SIZE, progress=None):
+    """
+    Streams `table` to `path`. `progress(report)` is called after each chunk.
+    Returns a report dict with rows, seconds and rows_per_second.
+    """
+    fmt = fmt or format_for_path(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'.")
+    selected = export_columns(table, columns)
+    names = [column.key for column in selected]
+    report = {"rows": 0, "seconds": 0.0, "rows_per_second": 0.0}
+    start = time.perf_counter()
+
+    def counted(chunks):
+        for rows in chunks:
+            yield rows
+            report["rows"] += len(rows)
+            report["seconds"] = time.perf_counter() - start
+            report["rows_per_second"] = report["rows"] / report["seconds"] if report["seconds"] else 0.0
+            if progress:
+                progress(report)
+
+    chunks = counted(iter_chunks(db, selected, chunk_size))
+    if fmt == "parquet":
+        write_parquet(chunks, selected, path)
+    else:
+        writer = iter_csv if fmt == "csv" else iter_jsonl
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            for text in writer(chunks, names):
+                f.write(text)
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream tasks, archived tasks or weather logs to CSV, JSONL or Parquet.")
+    parser.add_argument("table", choices=list(TABLES),
+                        help="tasks holds live tasks only; archived ones are in archived_tasks")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--columns", help="Comma-separated columns to export (e.g. skip content)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    columns = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None
+
+    from database import session_scope
+
+    def progress(report):
+        print(f"\r{report['rows']} rows ({report['rows_per_second']:.0f} rows/s)", end="", flush=True)
+
+    with session_scope() as db:
+        report = export_table(db, args.table, args.path, args.format, columns, args.chunk_size, progress)
+    print()
+    print(f"Done: {report['rows']} rows written to {args.path} in {report['seconds']:.2f}s")
+
+if __name__ == "__main__":
+    main()
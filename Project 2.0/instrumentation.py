@@ -0,0 +1,302 @@
+
+"""
+In-process performance instrumentation.
+
+`instrument_engine(engine)` times every SQL statement through engine
+events; `observe_http()` is called by weather_service for each outbound
+request. Work done inside `track_view(name)` (a Streamlit rerun of one view
+or one API request) is also attributed to that view, and a view that runs
+the same statement N_PLUS_ONE_THRESHOLD or more times in one pass is
+recorded as a likely N+1 pattern.
+
+Metrics are kept in fixed-bucket histograms and can be rendered in the
+Prometheus text format with `render_prometheus()` (served by the API at
+/metrics, or written to METRICS_FILE by the Streamlit app).
+"""
+import bisect
+import contextvars
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from sqlalchemy import event
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_FILE = os.getenv("METRICS_FILE")
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+MAX_TRACKED_STATEMENTS = 200
+
+# Upper bounds in seconds, shared by every latency histogram
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_IN_LIST_RE = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_sql(statement: str) -> str:
+    """Collapses whitespace and IN-lists so the same query shape always maps to one key."""
+    return _IN_LIST_RE.sub("(?)", _WHITESPACE_RE.sub(" ", statement).strip())
+
+def statement_kind(statement: str) -> str:
+    word = statement.lstrip().split(" ", 1)[0].upper()
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, n in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if n and seen + n >= rank:
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+            lower = upper
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+class ViewRun:
+    """What one pass of a view did; lives in a context variable while the view runs."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queries = 0
+        self.statements = {}
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.queries = {}        # (view, kind) -> Histogram
+            self.rows = {}           # (view, kind) -> rows reported by the driver
+            self.http = {}           # (host, status) -> Histogram
+            self.views = {}          # view -> Histogram
+            self.view_queries = {}   # view -> Histogram of statements per run (unit: count)
+            self.statements = OrderedDict()  # normalized sql -> [count, seconds, max, rows]
+            self.n_plus_one = {}     # (view, sql) -> occurrences
+            self.recent_n_plus_one = deque(maxlen=20)
+
+    def observe_query(self, view: str, statement: str, seconds: float, rows: int):
+        kind = statement_kind(statement)
+        key = normalize_sql(statement)
+        with self._lock:
+            self.queries.setdefault((view, kind), Histogram()).observe(seconds)
+            if rows >= 0:
+                self.rows[(view, kind)] = self.rows.get((view, kind), 0) + rows
+            entry = self.statements.pop(key, None) or [0, 0.0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] += max(rows, 0)
+            self.statements[key] = entry
+            if len(self.statements) > MAX_TRACKED_STATEMENTS:
+                self.statements.popitem(last=False)
+
+    def observe_http(self, host: str, status, seconds: float):
+        with self._lock:
+            self.http.setdefault((host, str(status)), Histogram()).observe(seconds)
+
+    def observe_view(self, run: ViewRun, seconds: float):
+        with self._lock:
+            self.views.setdefault(run.name, Histogram()).observe(seconds)
+            self.view_queries.setdefault(run.name, Histogram(buckets=(1, 2, 5, 10, 20, 50, 100, 200))).observe(run.queries)
+            for sql, count in run.statements.items():
+                if count >= N_PLUS_ONE_THRESHOLD:
+                    self.n_plus_one[(run.name, sql)] = self.n_plus_one.get((run.name, sql), 0) + 1
+                    self.recent_n_plus_one.append({"view": run.name, "count": count, "sql": sql[:300]})
+
+    def snapshot(self):
+        """Plain-data view of everything recorded, for the Performance panel."""
+        with self._lock:
+            return {
+                "views": {
+                    name: dict(h.summary(), queries_avg=round(self.view_queries[name].sum / h.count, 1))
+                    for name, h in sorted(self.views.items())
+                },
+                "queries": [
+                    dict(view=view, kind=kind, rows=self.rows.get((view, kind), 0), **h.summary())
+                    for (view, kind), h in sorted(self.queries.items())
+                ],
+                "http": [dict(host=host, status=status, **h.summary()) for (host, status), h in sorted(self.http.items())],
+                "top_statements": [
+                    {"sql": sql[:300], "count": c, "total_ms": round(s * 1000, 3),
+                     "avg_ms": round(s / c * 1000, 3), "max_ms": round(m * 1000, 3), "rows": r}
+                    for sql, (c, s, m, r) in sorted(self.statements.items(), key=lambda kv: -kv[1][1])[:25]
+                ],
+                "n_plus_one": list(self.recent_n_plus_one),
+            }
+
+metrics = Metrics()
+_current_view = contextvars.ContextVar("current_view", default=None)
+
+def current_view_name() -> str:
+    run = _current_view.get()
+    return run.name if run else "-"
+
+@contextmanager
+def track_view(name: str):
+    """Attributes statements and time spent inside the block to view `name`."""
+    if not METRICS_ENABLED:
+        yield None
+        return
+    run = ViewRun(name)
+    token = _current_view.set(run)
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        _current_view.reset(token)
+        metrics.observe_view(run, time.perf_counter() - start)
+
+def instrument_engine(engine):
+    """Times every statement executed on `engine` (no-op when METRICS_ENABLED is off)."""
+    if not METRICS_ENABLED:
+        return engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_start"].pop()
+        run = _current_view.get()
+        if run is not None:
+            run.queries += 1
+            key = normalize_sql(statement)
+            run.statements[key] = run.statements.get(key, 0) + 1
+        # rowcount is the number of rows fetched on MySQL drivers; SQLite reports -1 for SELECT
+        rows = cursor.rowcount if cursor.rowcount is not None else -1
+        metrics.observe_query(run.name if run else "-", statement, seconds, rows)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+    return engine
+
+def observe_http(host: str, status, seconds: float):
+    if METRICS_ENABLED:
+        metrics.observe_http(host, status, seconds)
+
+def get_metrics_snapshot():
+    return metrics.snapshot()
+
+def reset_metrics():
+    metrics.reset()
+
+# --- PROMETHEUS ---
+
+def _labels(**labels):
+    inner = ",".join(
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in labels.items()
+    )
+    return "{" + inner + "}" if inner else ""
+
+def _histogram_lines(name: str, help_text: str, series):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, h in series:
+        cumulative = 0
+        for bound, n in zip(list(h.buckets) + ["+Inf"], h.counts):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(**labels)} {h.sum:.6f}")
+        lines.append(f"{name}_count{_labels(**labels)} {h.count}")
+    return lines
+
+def _gauges():
+    """Pool and cache gauges from the other modules' existing stats."""
+    from database import get_pool_metrics
+    from query_cache import get_query_cache_stats
+    from weather_service import get_weather_provider_stats
+    pool = get_pool_metrics()
+    cache = get_query_cache_stats()
+    breakers = get_weather_provider_stats().values()
+    return {
+        "app_db_pool_checked_out": pool.get("checked_out", 0),
+        "app_db_pool_size": pool.get("pool_size") or 0,
+        "app_db_pool_overflow": pool.get("overflow") or 0,
+        "app_db_pool_timeouts_total": pool.get("timeouts", 0),
+        "app_query_cache_hits_total": cache["hits"],
+        "app_query_cache_misses_total": cache["misses"],
+        "app_query_cache_bytes": cache["bytes"],
+        "app_weather_circuits_open": sum(b["state"] != "closed" for b in breakers),
+        "app_weather_circuit_trips_total": sum(b["trips"] for b in breakers),
+    }
+
+def render_prometheus(gauges=None) -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    gauges = _gauges() if gauges is None else gauges
+    with metrics._lock:
+        lines = _histogram_lines(
+            "app_db_query_duration_seconds", "SQL statement latency by view and statement kind.",
+            [({"view": v, "kind": k}, h) for (v, k), h in sorted(metrics.queries.items())],
+        )
+        lines += ["# HELP app_db_rows_total Rows reported by the driver.", "# TYPE app_db_rows_total counter"]
+        lines += [f"app_db_rows_total{_labels(view=v, kind=k)} {n}" for (v, k), n in sorted(metrics.rows.items())]
+        lines += _histogram_lines(
+            "app_view_duration_seconds", "Wall time of one view render or API request.",
+            [({"view": v}, h) for v, h in sorted(metrics.views.items())],
+        )
+        lines += _histogram_lines(
+            "app_http_request_duration_seconds", "Outbound HTTP latency by host and status.",
+            [({"host": host, "status": status}, h) for (host, status), h in sorted(metrics.http.items())],
+        )
+        lines += ["# HELP app_n_plus_one_total View runs that repeated one statement N+ times.",
+                  "# TYPE app_n_plus_one_total counter"]
+        per_view = {}
+        for (view, _), n in metrics.n_plus_one.items():
+            per_view[view] = per_view.get(view, 0) + n
+        lines += [f"app_n_plus_one_total{_labels(view=v)} {n}" for v, n in sorted(per_view.items())]
+    for name, value in gauges.items():
+        lines += [f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path: str = None):
+    """Atomically writes the metrics to `path` (METRICS_FILE by default), e.g. for node_exporter's textfile collector."""
+    path = path or METRICS_FILE
+    if not path:
+        return
+    # A unique temp file per call: concurrent Streamlit sessions write this after every rerun
+    with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(os.path.abspath(path)),
+                                     prefix=f".{os.path.basename(path)}.", suffix=".tmp", delete=False) as f:
+        f.write(render_prometheus())
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.remove(f.name)
+        raise
@@ -0,0 +1,169 @@
+
+"""
+Versioned, additive schema migrations.
+
+`upgrade()` brings an existing database up to date without dropping data
+(unlike reset_db.reset_database). Each migration is idempotent: it checks
+the live schema before changing it, so it is safe on databases created by
+an older `create_all()` as well as on fresh ones.
+
+Usage:
+    python migrations.py            # apply pending migrations
+    python migrations.py --status   # show applied / pending versions
+"""
+import sys
+from sqlalchemy import bindparam, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from database import Base
+import models
+import search
+import weather_rollups
+
+MIGRATIONS = []
+
+def migration(version: int, description: str):
+    """Registers a migration function `fn(conn)` under a version number."""
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+# --- HELPERS ---
+
+def _index_names(conn: Connection, table_name: str):
+    return {ix["name"] for ix in inspect(conn).get_indexes(table_name)}
+
+def create_index_if_missing(conn: Connection, index):
+    """Creates a model-declared `Index` unless the table already has it."""
+    if index.name not in _index_names(conn, index.table.name):
+        index.create(bind=conn)
+
+def analyze_tables(conn: Connection, *table_names: str):
+    """Refreshes planner statistics so new indexes are actually chosen."""
+    if conn.dialect.name == "sqlite":
+        conn.execute(text("ANALYZE"))
+    elif conn.dialect.name == "mysql":
+        conn.execute(text(f"ANALYZE TABLE {', '.join(table_names)}"))
+
+def _column_names(conn: Connection, table_name: str):
+    return {column["name"] for column in inspect(conn).get_columns(table_name)}
+
+def _model_index(model, name: str):
+    return next(ix for ix in model.__table__.indexes if ix.name == name)
+
+# --- MIGRATIONS ---
+
+@migration(1, "Add task filter/sort indexes and weather_logs.timestamp index")
+def _add_filter_indexes(conn: Connection):
+    create_index_if_missing(conn, _model_index(models.Task, "ix_tasks_status_priority_created_at"))
+    create_index_if_missing(conn, _model_index(models.Task, "ix_tasks_created_at"))
+    create_index_if_missing(conn, _model_index(models.WeatherLog, "ix_weather_logs_timestamp"))
+    analyze_tables(conn, "tasks", "weather_logs")
+
+@migration(2, "Add full-text search index over task title, content and summary")
+def _add_search_index(conn: Connection):
+    search.create_search_index(conn)
+
+@migration(3, "Add summary_jobs table for background summarization")
+def _add_summary_jobs(conn: Connection):
+    models.SummaryJob.__table__.create(bind=conn, checkfirst=True)
+
+@migration(4, "Add task_stats rollup and backfill it from tasks")
+def _add_task_stats(conn: Connection):
+    models.TaskStat.__table__.create(bind=conn, checkfirst=True)
+    conn.execute(models.TaskStat.__table__.delete())
+    conn.execute(text(
+        "INSERT INTO task_stats (status, priority, count) "
+        "SELECT COALESCE(status, 'Todo'), COALESCE(priority, 'Medium'), COUNT(*) FROM tasks "
+        "GROUP BY COALESCE(status, 'Todo'), COALESCE(priority, 'Medium')"
+    ))
+
+@migration(5, "Add numeric weather_logs.temperature_c and hourly/daily weather rollups")
+def _add_weather_rollups(conn: Connection):
+    if "temperature_c" not in _column_names(conn, "weather_logs"):
+        conn.execute(text("ALTER TABLE weather_logs ADD COLUMN temperature_c FLOAT NULL"))
+    create_index_if_missing(conn, _model_index(models.WeatherLog, "ix_weather_logs_city_timestamp"))
+    models.WeatherRollup.__table__.create(bind=conn, checkfirst=True)
+
+    # Backfill the numeric column from the display strings, a chunk at a time
+    logs = models.WeatherLog.__table__
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(logs.c.id, logs.c.temperature)
+            .where(logs.c.id > last_id, logs.c.temperature_c.is_(None))
+            .order_by(logs.c.id).limit(1000)
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(
+            logs.update().where(logs.c.id == bindparam("log_id")).values(temperature_c=bindparam("value")),
+            [{"log_id": row.id, "value": weather_rollups.parse_temperature(row.temperature)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+    with Session(bind=conn) as db:
+        weather_rollups.rollup_raw_logs(db)
+        db.flush()
+
+@migration(6, "Add tasks.completed_at, the archived_tasks table and archived counts in task_stats")
+def _add_task_archive(conn: Connection):
+    if "completed_at" not in _column_names(conn, "tasks"):
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN completed_at DATETIME NULL"))
+        # The real completion time is unknown for existing Done tasks; creation time is its lower bound
+        conn.execute(text("UPDATE tasks SET completed_at = created_at WHERE status = 'Done'"))
+    create_index_if_missing(conn, _model_index(models.Task, "ix_tasks_status_completed_at"))
+    if "archived" not in _column_names(conn, "task_stats"):
+        conn.execute(text("ALTER TABLE task_stats ADD COLUMN archived INTEGER NOT NULL DEFAULT 0"))
+    models.ArchivedTask.__table__.create(bind=conn, checkfirst=True)
+    search.create_search_index(conn, "archived_tasks", rowid="archive_id")
+
+# --- RUNNER ---
+
+def applied_versions(engine: Engine):
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(models.SchemaMigration.__tablename__):
+            return set()
+        rows = conn.execute(models.SchemaMigration.__table__.select()).fetchall()
+        return {row.version for row in rows}
+
+def upgrade(engine: Engine = None, verbose: bool = False):
+    """
+    Creates missing tables, then applies every pending migration in order,
+    each in its own transaction. Returns the list of versions applied.
+    """
+    if engine is None:
+        from database import engine
+    Base.metadata.create_all(bind=engine)
+
+    done = applied_versions(engine)
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            fn(conn)
+            conn.execute(models.SchemaMigration.__table__.insert().values(
+                version=version, description=description
+            ))
+        applied.append(version)
+        if verbose:
+            print(f"Applied migration {version}: {description}")
+    return applied
+
+def status(engine: Engine = None):
+    """Returns [(version, description, is_applied)] for every known migration."""
+    if engine is None:
+        from database import engine
+    done = applied_versions(engine)
+    return [(version, description, version in done) for version, description, _ in MIGRATIONS]
+
+if __name__ == "__main__":
+    if "--status" in sys.argv:
+        for version, description, is_applied in status():
+            print(f"[{'x' if is_applied else ' '}] {version:03d} {description}")
+    else:
+        applied = upgrade(verbose=True)
+        print(f"Database up to date ({len(applied)} migration(s) applied).")
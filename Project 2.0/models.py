@@ -1,8 +1,13 @@
 
-from sqlalchemy import Column, Integer, String, Text, Date, DateTime
+from sqlalchemy import Column, Integer, Float, String, Text, Date, DateTime, Index, ForeignKey
 from sqlalchemy.sql import func
+from datetime import datetime
 from database import Base
 
+def _completed_at_default(context):
+    # Rows inserted already Done (form, import, API) count as completed now
+    return datetime.now() if context.get_current_parameters().get("status") == "Done" else None
+
 class Task(Base):
     __tablename__ = "tasks"
 
@@ -13,14 +18,105 @@ class Task(Base):
     status = Column(String(50), default="Todo")
     priority = Column(String(50), default="Medium")
     due_date = Column(Date, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side too, so SQLite stores the same text format as bound datetimes (keyset cursors compare them)
+    created_at = Column(DateTime(timezone=True), default=datetime.now, server_default=func.now())
+    # When the task last became Done (NULL otherwise); drives archival
+    completed_at = Column(DateTime, nullable=True, default=_completed_at_default)
+
+    __table_args__ = (
+        # Process View filters (status, priority) and sorts newest first
+        Index("ix_tasks_status_priority_created_at", "status", "priority", "created_at"),
+        # Dashboard "recent activity" and unfiltered pagination
+        Index("ix_tasks_created_at", "created_at"),
+        # Archival scans Done tasks by completion time
+        Index("ix_tasks_status_completed_at", "status", "completed_at"),
+    )
+
+class ArchivedTask(Base):
+    """Cold copy of a task moved out of `tasks` by archive.py."""
+    __tablename__ = "archived_tasks"
+
+    # Own key: `id` keeps the original tasks.id, which a backend that reuses freed ids could hand out again
+    archive_id = Column(Integer, primary_key=True)
+    id = Column(Integer, nullable=False, index=True)
+    title = Column(String(255), nullable=False)
+    content = Column(Text, nullable=False)
+    summary = Column(Text, nullable=True)
+    status = Column(String(50), default="Done")
+    priority = Column(String(50), default="Medium")
+    due_date = Column(Date, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        Index("ix_archived_tasks_completed_at", "completed_at"),
+    )
 
 class WeatherLog(Base):
     __tablename__ = "weather_logs"
 
     id = Column(Integer, primary_key=True, index=True)
     city = Column(String(100), nullable=False)
-    temperature = Column(String(50), nullable=False)
+    temperature = Column(String(50), nullable=False)  # display text, e.g. "12.3°C"
+    temperature_c = Column(Float, nullable=True)
     condition = Column(String(100), nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), default=datetime.now, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_weather_logs_timestamp", "timestamp"),
+        Index("ix_weather_logs_city_timestamp", "city", "timestamp"),
+    )
+
+class SummaryJob(Base):
+    __tablename__ = "summary_jobs"
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime, nullable=False)  # naive UTC, set by summary_queue
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Workers claim the oldest available pending jobs
+        Index("ix_summary_jobs_status_available_at", "status", "available_at"),
+    )
+
+class TaskStat(Base):
+    """
+    Rollup of task counts per (status, priority), maintained by every write
+    path. `count` covers `tasks`; `archived` covers `archived_tasks`.
+    """
+    __tablename__ = "task_stats"
+
+    status = Column(String(50), primary_key=True)
+    priority = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    archived = Column(Integer, nullable=False, default=0, server_default="0")  # moved to archived_tasks
+
+class WeatherRollup(Base):
+    """Per-city temperature aggregates per hour or day, maintained by log_weather."""
+    __tablename__ = "weather_rollups"
+
+    city = Column(String(100), primary_key=True)
+    period = Column(String(10), primary_key=True)  # "hour" or "day"
+    bucket_start = Column(DateTime, primary_key=True)
+    samples = Column(Integer, nullable=False, default=0)
+    temp_sum = Column(Float, nullable=False, default=0)
+    temp_min = Column(Float, nullable=True)
+    temp_max = Column(Float, nullable=True)
+
+    __table_args__ = (
+        # Retention prunes old hourly buckets across all cities
+        Index("ix_weather_rollups_period_bucket_start", "period", "bucket_start"),
+    )
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
 
+    version = Column(Integer, primary_key=True)
+    description = Column(String(255), nullable=False)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,93 @@
+
+import base64
+import os
+from datetime import datetime
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from models import Task
+from search import search_clause
+from task_repository import list_query, to_task_rows
+
+DEFAULT_PAGE_SIZE = int(os.getenv("TASK_PAGE_SIZE", "25"))
+MAX_PAGE_SIZE = 200
+COUNT_ESTIMATE_CAP = int(os.getenv("TASK_COUNT_CAP", "10000"))
+
+def encode_cursor(created_at: datetime, task_id: int) -> str:
+    """Opaque cursor for the (created_at, id) sort key."""
+    raw = f"{created_at.isoformat()}|{task_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, task_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(task_id)
+    except Exception:
+        raise ValueError("Invalid page cursor.")
+
+def apply_task_filters(query, status=None, priority=None, search=None):
+    """Applies the Process View filters (status, priority, full-text search) to a query."""
+    if status: query = query.filter(Task.status.in_(status))
+    if priority: query = query.filter(Task.priority.in_(priority))
+    if search:
+        clause = search_clause(query.session, search)
+        if clause is not None: query = query.filter(clause)
+    return query
+
+def estimate_task_count(db: Session, status=None, priority=None, search=None, cap: int = COUNT_ESTIMATE_CAP):
+    """
+    Counts matching tasks, but stops after `cap` rows so the cost is bounded.
+    Returns (count, is_exact).
+    """
+    inner = apply_task_filters(db.query(Task.id), status, priority, search).limit(cap + 1).subquery()
+    count = db.query(func.count()).select_from(inner).scalar()
+    if count > cap:
+        return cap, False
+    return count, True
+
+def paginate_tasks(db: Session, status=None, priority=None, search=None,
+                   page_size: int = DEFAULT_PAGE_SIZE, after: str = None, before: str = None):
+    """
+    Keyset (seek) pagination over tasks ordered newest first by (created_at, id).
+
+    Pass `after` (the previous page's next_cursor) to move forward or `before`
+    (its prev_cursor) to move back. Each call reads at most page_size + 1 rows,
+    returned as TaskRow objects (content and summary are never fetched).
+    """
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    query = apply_task_filters(list_query(db), status, priority, search)
+
+    if before:
+        created_at, task_id = decode_cursor(before)
+        query = query.filter(or_(
+            Task.created_at > created_at,
+            and_(Task.created_at == created_at, Task.id > task_id),
+        )).order_by(Task.created_at.asc(), Task.id.asc())
+    else:
+        if after:
+            created_at, task_id = decode_cursor(after)
+            query = query.filter(or_(
+                Task.created_at < created_at,
+                and_(Task.created_at == created_at, Task.id < task_id),
+            ))
+        query = query.order_by(Task.created_at.desc(), Task.id.desc())
+
+    rows = to_task_rows(query.limit(page_size + 1))
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if before:
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, bool(after)
+
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if rows and has_next else None
+    prev_cursor = encode_cursor(rows[0].created_at, rows[0].id) if rows and has_prev else None
+
+    return {
+        "items": rows,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "page_size": page_size,
+    }
@@ -0,0 +1,123 @@
+
+"""
+Process-wide cache for read queries that Streamlit re-runs on every click.
+
+Entries are grouped into namespaces ("tasks", "weather"). Every write path
+calls `invalidate(namespace)` right after its commit, which drops all
+entries of that namespace, so within one process a cached read never
+outlives the data it was computed from. Writes made by other processes (the
+API, the bulk/archive CLIs, a standalone summary worker) cannot invalidate
+this cache, so every entry also expires QUERY_CACHE_TTL seconds after it was
+loaded. The cache is bounded by the approximate pickled size of its values
+and evicts least-recently-used entries first.
+
+Cached values must be plain data (dicts, lists, Row tuples), never live ORM
+objects, because they are shared across sessions and threads.
+"""
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "5"))
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+TASKS = "tasks"
+WEATHER = "weather"
+
+def _size_of(value) -> int:
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+class QueryCache:
+    def __init__(self, max_bytes: int = QUERY_CACHE_MAX_BYTES, enabled: bool = QUERY_CACHE_ENABLED,
+                 ttl: float = QUERY_CACHE_TTL, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (namespace, key) -> (value, size, expires_at)
+        self._generations = {}
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get_or_load(self, namespace: str, key, loader):
+        """Returns the cached value for (namespace, key), calling `loader()` on a miss."""
+        if not self.enabled:
+            return loader()
+        full_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[2] <= self._clock():
+                del self._entries[full_key]
+                self.bytes -= entry[1]
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generations.get(namespace, 0)
+
+        loaded_at = self._clock()
+        value = loader()
+        size = _size_of(value)
+
+        with self._lock:
+            # Skip the store if a write invalidated the namespace while we were loading
+            if self._generations.get(namespace, 0) != generation or size > self.max_bytes:
+                return value
+            old = self._entries.pop(full_key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[full_key] = (value, size, loaded_at + self.ttl)
+            self.bytes += size
+            while self.bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def invalidate(self, *namespaces: str):
+        """Drops every entry in the given namespaces (all namespaces if none given)."""
+        with self._lock:
+            targets = set(namespaces) or {ns for ns, _ in self._entries} | set(self._generations)
+            for namespace in targets:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            for full_key in [k for k in self._entries if k[0] in targets]:
+                self.bytes -= self._entries.pop(full_key)[1]
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "ttl": self.ttl,
+                "invalidations": self.invalidations,
+            }
+
+query_cache = QueryCache()
+
+def cached_query(namespace: str, key, loader):
+    return query_cache.get_or_load(namespace, key, loader)
+
+def invalidate(*namespaces: str):
+    query_cache.invalidate(*namespaces)
+
+def get_query_cache_stats():
+    return query_cache.stats()
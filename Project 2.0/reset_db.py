@@ -1,12 +1,16 @@
 
 from database import engine, Base
 import models
+import migrations
+import search
 
 def reset_database():
     print("Dropping all tables...")
     Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        search.drop_search_index(conn)
     print("Creating all tables...")
-    Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
     print("Database reset complete.")
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date, datetime
 
 class TaskBase(BaseModel):
@@ -22,4 +22,37 @@ class TaskResponse(TaskBase):
     created_at: datetime
 
     class Config:
-        orm_mode = True
+        orm_mode = True         # pydantic v1
+        from_attributes = True  # pydantic v2
+
+class TaskListItem(BaseModel):
+    id: int
+    title: str
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    due_date: Optional[date] = None
+    created_at: Optional[datetime] = None
+
+class TaskPage(BaseModel):
+    items: List[TaskListItem]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+class TaskIds(BaseModel):
+    ids: List[int]
+
+class BatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    errors: List[dict] = []
+
+class WeatherResponse(BaseModel):
+    temperature: str
+    condition: str
+    source: Optional[str] = None
+    stale: bool = False  # last known value, served while every provider is down
+    as_of: Optional[datetime] = None
+
+class WeatherBatchRequest(BaseModel):
+    cities: List[str]
+    api_key: Optional[str] = None
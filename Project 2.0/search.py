@@ -0,0 +1,159 @@
+
+import re
+import sys
+from sqlalchemy import and_, literal_column, or_, select, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+from models import ArchivedTask, Task
+from task_repository import LIST_COLUMNS
+
+# Relative weight of a match in title / content / summary (SQLite bm25 only)
+BM25_WEIGHTS = (10.0, 1.0, 2.0)
+
+def tokenize(query: str):
+    """Splits user input into plain word tokens; all FTS operators are dropped."""
+    return re.findall(r"\w+", (query or "").lower())
+
+def _dialect(db: Session):
+    return db.get_bind().dialect.name
+
+def _fts_expression(db: Session, tokens):
+    # Every token must match, as a prefix, in any of the indexed columns
+    if _dialect(db) == "mysql":
+        return " ".join(f"+{t}*" for t in tokens)
+    return " ".join(f'"{t}"*' for t in tokens)
+
+def _mysql_match(expression: str, model=Task):
+    return match(model.title, model.content, model.summary, against=expression).in_boolean_mode()
+
+def _fts_table(model) -> str:
+    return f"{model.__tablename__}_fts"
+
+def _fts_rowid(model):
+    # archived_tasks is keyed by archive_id; `id` there is the original task id
+    return model.archive_id if model is ArchivedTask else model.id
+
+def search_clause(db: Session, query: str, model=Task):
+    """
+    WHERE clause restricting `model` (Task or ArchivedTask) to rows matching
+    `query` in title, content or summary. Returns None for an empty query.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    dialect = _dialect(db)
+    expression = _fts_expression(db, tokens)
+    if dialect == "mysql":
+        return _mysql_match(expression, model)
+    if dialect == "sqlite":
+        fts = _fts_table(model)
+        matches = select(literal_column("rowid")).select_from(text(fts)).where(
+            text(f"{fts} MATCH :fts_query").bindparams(fts_query=expression)
+        )
+        return _fts_rowid(model).in_(matches)
+    # Other backends: unindexed substring match over the same columns, every token required
+    return and_(*[
+        or_(model.title.contains(t), model.content.contains(t), model.summary.contains(t))
+        for t in tokens
+    ])
+
+def search_tasks(db: Session, query: str, status=None, priority=None, limit: int = 20, archived: bool = False):
+    """
+    Full-text search over title, content and summary, best matches first.
+    Returns rows of the list columns plus `score` (higher is more relevant).
+    With `archived`, searches the archived_tasks table instead of `tasks`.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    dialect = _dialect(db)
+    model = ArchivedTask if archived else Task
+    columns = [getattr(model, column.key) for column in LIST_COLUMNS]
+    expression = _fts_expression(db, tokens)
+
+    if dialect == "mysql":
+        score = _mysql_match(expression, model)
+        q = db.query(*columns, score.label("score")).filter(score).order_by(score.desc())
+    elif dialect == "sqlite":
+        weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+        fts = _fts_table(model)
+        ranked = (
+            select(
+                literal_column("rowid").label("task_id"),
+                literal_column(f"-bm25({fts}, {weights})").label("score"),
+            )
+            .select_from(text(fts))
+            .where(text(f"{fts} MATCH :fts_query").bindparams(fts_query=expression))
+            .subquery()
+        )
+        q = (
+            db.query(*columns, ranked.c.score)
+            .join(ranked, ranked.c.task_id == _fts_rowid(model))
+            .order_by(ranked.c.score.desc())
+        )
+    else:
+        q = db.query(*columns, literal_column("0").label("score")).filter(search_clause(db, query, model))
+        q = q.order_by(model.created_at.desc())
+
+    if status: q = q.filter(model.status.in_(status))
+    if priority: q = q.filter(model.priority.in_(priority))
+    return q.limit(limit).all()
+
+# --- INDEX DDL (used by migrations) ---
+
+def create_search_index(conn, table: str = "tasks", rowid: str = "id"):
+    """
+    Creates the full-text index on `table` (tasks, or archived_tasks with
+    rowid="archive_id") for the connection's backend and backfills it.
+    """
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        existing = {
+            row[2] for row in conn.execute(text(f"SHOW INDEX FROM {table} WHERE Index_type = 'FULLTEXT'"))
+        }
+        if f"ft_{table}_title_content_summary" not in existing:
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD FULLTEXT INDEX ft_{table}_title_content_summary (title, content, summary)"
+            ))
+    elif dialect == "sqlite":
+        # External-content FTS5 table kept in sync with `table` by triggers, so
+        # every insert/update/delete path (ORM or bulk SQL) updates it incrementally.
+        fts = f"{table}_fts"
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"title, content, summary, content='{table}', content_rowid='{rowid}')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, title, content, summary) "
+            f"VALUES (new.{rowid}, new.title, new.content, new.summary); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, title, content, summary) "
+            f"VALUES ('delete', old.{rowid}, old.title, old.content, old.summary); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF title, content, summary ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, title, content, summary) "
+            f"VALUES ('delete', old.{rowid}, old.title, old.content, old.summary); "
+            f"INSERT INTO {fts}(rowid, title, content, summary) "
+            f"VALUES (new.{rowid}, new.title, new.content, new.summary); END"
+        ))
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+def drop_search_index(conn):
+    """Drops the SQLite FTS tables, which are not part of the ORM metadata (MySQL's indexes go with their tables)."""
+    if conn.dialect.name == "sqlite":
+        conn.execute(text("DROP TABLE IF EXISTS tasks_fts"))
+        conn.execute(text("DROP TABLE IF EXISTS archived_tasks_fts"))
+
+if __name__ == "__main__":
+    from database import SessionLocal
+    db = SessionLocal()
+    archived = "--archived" in sys.argv  # search archived_tasks instead
+    try:
+        for row in search_tasks(db, " ".join(a for a in sys.argv[1:] if a != "--archived"), archived=archived):
+            print(f"{row.score:8.3f}  #{row.id:<6} [{row.status}] {row.title}")
+    finally:
+        db.close()
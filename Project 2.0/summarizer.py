@@ -1,18 +1,122 @@
 
-import random
+import re
+import numpy as np
+
+# Bump whenever the summarization logic changes; cached summaries are keyed by it.
+SUMMARIZER_VERSION = "tfidf-2"  # tfidf-1 entries could be keyed without line breaks
+
+SHORT_TEXT_CHARS = 50
+MAX_SUMMARY_CHARS = 300
+# Earlier sentences get a mild boost: score * (1 + POSITION_WEIGHT / (1 + index))
+POSITION_WEIGHT = 0.5
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset("""
+a an and are as at be been but by can do for from has have he her his i if in into is it its
+me my no not of on or our she so that the their them then there these they this to too us was
+we were what when which who will with would you your
+""".split())
+
+def split_sentences(text: str):
+    """Splits text on sentence punctuation and line breaks, dropping empty pieces."""
+    return [s.strip() for s in SENTENCE_RE.split(text.strip()) if s.strip()]
+
+def _sentences_per_summary(n_sentences: int) -> int:
+    return 1 if n_sentences <= 3 else 2
+
+def _format(summary: str) -> str:
+    if len(summary) > MAX_SUMMARY_CHARS:
+        summary = summary[:MAX_SUMMARY_CHARS].rsplit(" ", 1)[0] + "..."
+    return f"AI Generated Summary: {summary}"
+
+def summarize_many(texts):
+    """
+    Extractive TF-IDF summaries for a batch of documents.
+
+    Each sentence is scored by the TF-IDF weight of its distinct terms, where
+    term frequency is taken over its document and inverse frequency over that
+    document's sentences, normalized by sqrt(#terms) and boosted by position.
+    The best 1-2 sentences are returned in their original order. All scoring
+    for the batch is done with a few NumPy passes; results for a document do
+    not depend on what else is in the batch.
+    """
+    texts = list(texts)
+    results = [None] * len(texts)
+    vocab = {}
+    sentences, sent_doc, sent_pos = [], [], []
+    tok_ids, tok_sent = [], []
+
+    for doc, text in enumerate(texts):
+        if len(text) < SHORT_TEXT_CHARS:
+            results[doc] = _format(text.strip())
+            continue
+        doc_sentences = split_sentences(text)
+        if len(doc_sentences) <= 1:
+            results[doc] = _format(doc_sentences[0] if doc_sentences else text.strip())
+            continue
+        for pos, sentence in enumerate(doc_sentences):
+            sent_id = len(sentences)
+            sentences.append(sentence)
+            sent_doc.append(doc)
+            sent_pos.append(pos)
+            for token in TOKEN_RE.findall(sentence.lower()):
+                if token not in STOPWORDS:
+                    tok_ids.append(vocab.setdefault(token, len(vocab)))
+                    tok_sent.append(sent_id)
+
+    if not sentences:
+        return results
+
+    sent_doc = np.asarray(sent_doc, dtype=np.int64)
+    sent_pos = np.asarray(sent_pos, dtype=np.int64)
+    n_sent = len(sentences)
+    n_docs = len(texts)
+    scores = np.zeros(n_sent)
+
+    if tok_ids:
+        tok = np.asarray(tok_ids, dtype=np.int64)
+        sent = np.asarray(tok_sent, dtype=np.int64)
+        v = len(vocab)
+
+        # Term frequency per (doc, term) over every occurrence
+        dt_keys, tf = np.unique(sent_doc[sent] * v + tok, return_counts=True)
+
+        # Distinct terms per sentence, and in how many of its doc's sentences each term occurs
+        st_keys = np.unique(sent * v + tok)
+        st_sent, st_tok = st_keys // v, st_keys % v
+        dt_index = np.searchsorted(dt_keys, sent_doc[st_sent] * v + st_tok)
+        df = np.bincount(dt_index, minlength=len(dt_keys))
+
+        sentences_in_doc = np.bincount(sent_doc, minlength=n_docs)
+        idf = np.log1p(sentences_in_doc[dt_keys // v] / df)
+        weight = tf * idf
+
+        term_sum = np.bincount(st_sent, weights=weight[dt_index], minlength=n_sent)
+        term_count = np.bincount(st_sent, minlength=n_sent)
+        scores = term_sum / np.sqrt(np.maximum(term_count, 1))
+
+    scores = scores * (1.0 + POSITION_WEIGHT / (1.0 + sent_pos))
+
+    # Sort by doc, then score (desc), then position; keep the top k of each doc
+    order = np.lexsort((sent_pos, -scores, sent_doc))
+    ordered_docs = sent_doc[order]
+    first_of_doc = np.searchsorted(ordered_docs, ordered_docs)
+    rank = np.arange(n_sent) - first_of_doc
+    per_doc = np.bincount(sent_doc, minlength=n_docs)
+    keep = np.vectorize(_sentences_per_summary, otypes=[np.int64])(per_doc)
+    chosen = np.sort(order[rank < keep[ordered_docs]])
+
+    picked = {}
+    for sent_id in chosen:
+        picked.setdefault(int(sent_doc[sent_id]), []).append(sentences[sent_id])
+    for doc, doc_sentences in picked.items():
+        results[doc] = _format(" ".join(doc_sentences))
+    return results
 
 def summarize_text(text: str) -> str:
     """
-    Mock function to simulate an external summarization API.
-    In a real app, this would call OpenAI, HuggingFace, etc.
+    Offline extractive summary of a single task description.
+    Use summarize_many() when summarizing many texts at once.
     """
-    # Simple mock logic: take the first sentence or truncate.
-    doc_len = len(text)
-    if doc_len < 50:
-        return f"Summary: {text} (Short text)"
-    
-    sentences = text.split('.')
-    summary = sentences[0] + "." if sentences else text[:50] + "..."
-    
-    # Simulate some "AI" processing
-    return f"AI Generated Summary: {summary} [Analyzed {doc_len} chars]"
+    return summarize_many([text])[0]
@@ -0,0 +1,69 @@
+
+import hashlib
+import os
+from cache import LRUCache, SQLiteStore
+from summarizer import summarize_text, summarize_many, SUMMARIZER_VERSION
+
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "4096"))
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH")  # optional persistent tier
+
+_store = SQLiteStore(SUMMARY_CACHE_PATH, table="summaries") if SUMMARY_CACHE_PATH else None
+summary_cache = LRUCache(maxsize=SUMMARY_CACHE_SIZE, store=_store)
+
+def normalize_content(text: str) -> str:
+    """
+    Collapses spaces and tabs within each line and drops blank lines, so
+    trivially reformatted copies share a cache entry. Line breaks are kept:
+    the summarizer treats them as sentence boundaries.
+    """
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+def content_key(text: str, version: str = SUMMARIZER_VERSION) -> str:
+    """Cache key: summarizer version plus a SHA-256 of the normalized content."""
+    digest = hashlib.sha256(normalize_content(text).encode("utf-8")).hexdigest()
+    return f"{version}:{digest}"
+
+def cached_summarize(text: str, summarize=summarize_text) -> str:
+    """summarize_text() memoized on content; identical (cloned) tasks are summarized once."""
+    key = content_key(text)
+    summary = summary_cache.get(key)
+    if summary is None:
+        summary = summarize(text)
+        summary_cache.set(key, summary)
+    return summary
+
+def cached_summarize_many(texts, summarize_batch=summarize_many):
+    """
+    Batch variant: cache misses are summarized together in one
+    `summarize_batch` call, and each distinct content only once.
+    """
+    texts = list(texts)
+    keys = [content_key(text) for text in texts]
+    found = {}
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key in found or key in missing:
+            continue
+        summary = summary_cache.get(key)
+        if summary is None:
+            missing[key] = text
+        else:
+            found[key] = summary
+    if missing:
+        for key, summary in zip(missing, summarize_batch(list(missing.values()))):
+            summary_cache.set(key, summary)
+            found[key] = summary
+    return [found[key] for key in keys]
+
+def get_summary_cache_stats():
+    stats = summary_cache.stats()
+    stats["version"] = SUMMARIZER_VERSION
+    stats["persistent"] = _store is not None
+    return stats
+
+def prune_stale_summaries():
+    """Drops persisted entries written by other summarizer versions. Returns the count."""
+    if _store is None:
+        return 0
+    return _store.prune(f"{SUMMARIZER_VERSION}:")
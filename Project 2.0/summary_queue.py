@@ -0,0 +1,221 @@
+
+"""
+Background summarization queue.
+
+With SUMMARY_ASYNC=true, `create_task` inserts the task with an empty summary
+and a `summary_jobs` row in the same transaction. A `SummaryWorker` later
+claims pending jobs in batches, summarizes each batch with one
+`cached_summarize_many` call and writes `Task.summary`, retrying failures with exponential backoff. Done jobs
+are deleted SUMMARY_JOB_RETENTION_DAYS after they finished, hourly by a
+running worker or on demand.
+
+    python summary_queue.py            # run a worker in the foreground
+    python summary_queue.py --stats    # job counts by status
+    python summary_queue.py --purge    # delete old done jobs
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models import Task, SummaryJob
+from summary_cache import cached_summarize, cached_summarize_many
+from query_cache import TASKS, invalidate
+
+SUMMARY_ASYNC = os.getenv("SUMMARY_ASYNC", "false").lower() in ("1", "true", "yes")
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "50"))
+SUMMARY_MAX_ATTEMPTS = int(os.getenv("SUMMARY_MAX_ATTEMPTS", "3"))
+SUMMARY_JOB_RETENTION_DAYS = int(os.getenv("SUMMARY_JOB_RETENTION_DAYS", "7"))
+RETRY_BASE_SECONDS = 5
+PURGE_INTERVAL_SECONDS = 3600
+# Jobs left "running" longer than this (e.g. a worker crashed) are handed out again
+LEASE_SECONDS = 300
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def enqueue_summary(db: Session, task_id: int):
+    """Adds a pending job for `task_id` to the session (caller commits)."""
+    job = SummaryJob(task_id=task_id, status=PENDING, attempts=0, available_at=utcnow())
+    db.add(job)
+    return job
+
+def get_queue_stats(db: Session):
+    """Job counts by status, e.g. {"pending": 3, "done": 120}."""
+    return dict(db.query(SummaryJob.status, func.count(SummaryJob.id)).group_by(SummaryJob.status).all())
+
+def purge_finished_jobs(db: Session, retention_days: int = SUMMARY_JOB_RETENTION_DAYS, now: datetime = None):
+    """Deletes done jobs that finished more than `retention_days` ago. Returns the count."""
+    cutoff = (now or utcnow()) - timedelta(days=retention_days)
+    deleted = (
+        db.query(SummaryJob)
+        .filter(SummaryJob.status == DONE, SummaryJob.available_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+def get_summary_status(db: Session, task_id: int):
+    """Status of the latest summary job for a task, or None if it had none (or it was purged)."""
+    job = (
+        db.query(SummaryJob.status)
+        .filter(SummaryJob.task_id == task_id)
+        .order_by(SummaryJob.id.desc())
+        .first()
+    )
+    return job.status if job else None
+
+class SummaryWorker:
+    """
+    Fills in task summaries for queued jobs.
+
+    `run_once()` processes a single batch synchronously (handy for tests and
+    cron-style use); `start()` runs it in a background thread until `stop()`.
+    """
+
+    def __init__(self, session_factory, summarize=cached_summarize, summarize_batch=cached_summarize_many,
+                 batch_size: int = SUMMARY_BATCH_SIZE, max_attempts: int = SUMMARY_MAX_ATTEMPTS,
+                 poll_interval: float = 1.0, retention_days: int = SUMMARY_JOB_RETENTION_DAYS):
+        self.session_factory = session_factory
+        self.summarize = summarize
+        self.summarize_batch = summarize_batch
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.retention_days = retention_days
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_purge = None
+        self.processed = 0
+        self.failed = 0
+
+    def _claim(self, db: Session):
+        now = utcnow()
+        ready = (SummaryJob.status == PENDING) & (SummaryJob.available_at <= now)
+        stale = (SummaryJob.status == RUNNING) & (SummaryJob.available_at <= now - timedelta(seconds=LEASE_SECONDS))
+        jobs = (
+            db.query(SummaryJob)
+            .filter(ready | stale)
+            .order_by(SummaryJob.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for job in jobs:
+            job.status = RUNNING
+            job.attempts += 1
+            job.available_at = now  # lease start
+        db.commit()
+        return jobs
+
+    def _summarize(self, content: str):
+        try:
+            return self.summarize(content), None
+        except Exception as e:
+            return None, e
+
+    def _summarize_all(self, contents):
+        """
+        (summary, error) per content. The whole batch goes through one
+        `summarize_batch` call (the TF-IDF engine is CPU-bound and vectorized,
+        so threads would not help); if that raises, each content is retried
+        on its own so only the failing jobs are backed off.
+        """
+        try:
+            return [(summary, None) for summary in self.summarize_batch(contents)]
+        except Exception:
+            return [self._summarize(content) for content in contents]
+
+    def run_once(self):
+        """Claims and processes one batch. Returns the number of jobs handled."""
+        db = self.session_factory()
+        try:
+            jobs = self._claim(db)
+            if not jobs:
+                return 0
+            contents = dict(
+                db.query(Task.id, Task.content).filter(Task.id.in_([job.task_id for job in jobs])).all()
+            )
+            live = [job for job in jobs if job.task_id in contents]
+            outcomes = self._summarize_all([contents[job.task_id] for job in live]) if live else []
+
+            for job, (summary, error) in zip(live, outcomes):
+                if error is None:
+                    db.query(Task).filter(Task.id == job.task_id).update(
+                        {Task.summary: summary}, synchronize_session=False
+                    )
+                    job.status, job.last_error = DONE, None
+                    job.available_at = utcnow()  # finish time, for purge_finished_jobs
+                    self.processed += 1
+                elif job.attempts >= self.max_attempts:
+                    job.status, job.last_error = FAILED, str(error)
+                    self.failed += 1
+                else:
+                    backoff = RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+                    job.status, job.last_error = PENDING, str(error)
+                    job.available_at = utcnow() + timedelta(seconds=backoff)
+            for job in jobs:
+                if job.task_id not in contents:
+                    job.status, job.last_error = FAILED, "Task no longer exists"
+            db.commit()
+            invalidate(TASKS)  # summaries feed full-text search results
+            return len(jobs)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def purge(self):
+        """Deletes done jobs past the retention window. Returns the count."""
+        db = self.session_factory()
+        try:
+            return purge_finished_jobs(db, self.retention_days)
+        finally:
+            db.close()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if self._last_purge is None or time.monotonic() - self._last_purge >= PURGE_INTERVAL_SECONDS:
+                    self._last_purge = time.monotonic()
+                    self.purge()
+                handled = self.run_once()
+            except Exception:
+                handled = 0
+            if not handled:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="summary-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+if __name__ == "__main__":
+    from database import SessionLocal, session_scope
+    if "--stats" in sys.argv:
+        with session_scope() as db:
+            print(get_queue_stats(db))
+    elif "--purge" in sys.argv:
+        with session_scope() as db:
+            print(f"Purged {purge_finished_jobs(db)} done job(s).")
+    else:
+        worker = SummaryWorker(SessionLocal).start()
+        print("Summary worker running (Ctrl+C to stop)...")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            worker.stop()
+            print(f"Stopped: {worker.processed} summarized, {worker.failed} failed.")
@@ -0,0 +1,62 @@
+
+"""
+Projection-aware task reads.
+
+`content` and `summary` are unbounded Text columns and make up most of a
+task row, yet only the create form and the detail endpoint show them.
+
+- List views select LIST_COLUMNS and get `TaskRow` objects: plain
+  `__slots__` records that are not tracked by the session and pickle small
+  enough for the query cache.
+- Entity reads (`task_query`, `get_task`) defer the large columns; pass
+  `full=True` to load them in the same SELECT.
+"""
+from sqlalchemy.orm import Session, defer, undefer
+from models import Task
+
+LIST_COLUMNS = (Task.id, Task.title, Task.status, Task.priority, Task.due_date, Task.created_at)
+LARGE_COLUMNS = (Task.content, Task.summary)
+
+class TaskRow:
+    """One task as the listings show it; same attributes and `_asdict()` as the Row tuples it replaces."""
+    __slots__ = tuple(column.key for column in LIST_COLUMNS)
+
+    def __init__(self, id, title, status, priority, due_date, created_at):
+        self.id = id
+        self.title = title
+        self.status = status
+        self.priority = priority
+        self.due_date = due_date
+        self.created_at = created_at
+
+    def _asdict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        return isinstance(other, TaskRow) and self._asdict() == other._asdict()
+
+    def __repr__(self):
+        return f"TaskRow(id={self.id!r}, title={self.title!r}, status={self.status!r})"
+
+def to_task_rows(rows):
+    """Converts result rows of LIST_COLUMNS into TaskRow objects."""
+    return [TaskRow(*row) for row in rows]
+
+def list_query(db: Session):
+    """Query over LIST_COLUMNS only; filter, order and limit it like any other query."""
+    return db.query(*LIST_COLUMNS)
+
+def load_options(full: bool = False):
+    """Loader options deferring (or, with `full`, undeferring) content and summary."""
+    return [undefer(column) if full else defer(column) for column in LARGE_COLUMNS]
+
+def task_query(db: Session, full: bool = False):
+    """Query of `Task` entities with content and summary deferred unless `full`."""
+    return db.query(Task).options(*load_options(full))
+
+def get_task(db: Session, task_id: int, full: bool = False):
+    """
+    Returns the task or None. Without `full`, reading `content` or `summary`
+    later costs one extra SELECT each.
+    """
+    return db.get(Task, task_id, options=load_options(full))
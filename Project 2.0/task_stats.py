@@ -0,0 +1,155 @@
+"""
+Incrementally maintained task counts per (status, priority).
+
+Write paths call `apply_task_delta` / `apply_task_deltas` inside their own
+transaction, so the rollup commits (or rolls back) together with the change
+to `tasks`. Archival moves counts from `count` to `archived` with
+`apply_archive_deltas`, so all-time totals survive it. `rebuild_task_stats`
+recomputes both columns from scratch to fix drift.
+
+    python task_stats.py            # report drift without changing anything
+    python task_stats.py --rebuild  # recompute the rollup from tasks and archived_tasks
+"""
+import sys
+from collections import Counter
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from models import ArchivedTask, Task, TaskStat
+from query_cache import TASKS, invalidate
+
+DEFAULT_STATUS = "Todo"
+DEFAULT_PRIORITY = "Medium"
+
+def _key(status, priority):
+    return (status or DEFAULT_STATUS, priority or DEFAULT_PRIORITY)
+
+def apply_task_deltas(db: Session, deltas):
+    """
+    Adds {(status, priority): delta} to the rollup in the caller's
+    transaction. Uses a native upsert where the backend has one.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    dialect = db.get_bind().dialect.name
+    rows = [{"status": status, "priority": priority, "count": delta} for (status, priority), delta in deltas.items()]
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(TaskStat)
+        db.execute(stmt.on_duplicate_key_update(count=TaskStat.count + stmt.inserted["count"]), rows)
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(TaskStat)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[TaskStat.status, TaskStat.priority],
+            set_={"count": TaskStat.count + stmt.excluded["count"]},
+        ), rows)
+    else:
+        for row in rows:
+            updated = (
+                db.query(TaskStat)
+                .filter(TaskStat.status == row["status"], TaskStat.priority == row["priority"])
+                .update({TaskStat.count: TaskStat.count + row["count"]}, synchronize_session=False)
+            )
+            if not updated:
+                db.add(TaskStat(**row))
+
+def apply_task_delta(db: Session, status: str, priority: str, delta: int):
+    apply_task_deltas(db, {_key(status, priority): delta})
+
+def count_deltas(pairs, sign: int = 1):
+    """Counter of {(status, priority): +/-n} for an iterable of (status, priority)."""
+    deltas = Counter()
+    for status, priority in pairs:
+        deltas[_key(status, priority)] += sign
+    return deltas
+
+def apply_archive_deltas(db: Session, deltas):
+    """Moves {(status, priority): n} from `count` to `archived` (negative n moves back) in the caller's transaction."""
+    for (status, priority), n in deltas.items():
+        if not n:
+            continue
+        moved = (
+            db.query(TaskStat)
+            .filter(TaskStat.status == status, TaskStat.priority == priority)
+            .update({TaskStat.count: TaskStat.count - n, TaskStat.archived: TaskStat.archived + n},
+                    synchronize_session=False)
+        )
+        if not moved:
+            db.add(TaskStat(status=status, priority=priority, count=-n, archived=n))
+
+def get_stat_rows(db: Session):
+    """(status, priority, count, archived) rows from the rollup, skipping empty buckets."""
+    return (
+        db.query(TaskStat.status, TaskStat.priority, TaskStat.count, TaskStat.archived)
+        .filter(or_(TaskStat.count != 0, TaskStat.archived != 0))
+        .all()
+    )
+
+def get_stat_counts(db: Session, include_archived: bool = True):
+    """(status, priority, count) rows; counts are all-time unless `include_archived` is off."""
+    rows = []
+    for status, priority, count, archived in get_stat_rows(db):
+        total = count + archived if include_archived else count
+        if total:
+            rows.append((status, priority, total))
+    return rows
+
+def _actual_counts(db: Session, model=Task):
+    rows = db.query(model.status, model.priority, func.count(model.id)).group_by(model.status, model.priority).all()
+    actual = Counter()
+    for status, priority, count in rows:
+        actual[_key(status, priority)] += count
+    return actual
+
+def check_task_stats(db: Session, archived: bool = False):
+    """
+    Returns {(status, priority): (rollup_count, actual_count)} for every
+    bucket that drifted; with `archived`, checks the archived column against
+    archived_tasks instead of `count` against `tasks`.
+    """
+    actual = _actual_counts(db, ArchivedTask if archived else Task)
+    column = TaskStat.archived if archived else TaskStat.count
+    stored = {(s, p): c for s, p, c in db.query(TaskStat.status, TaskStat.priority, column).all()}
+    return {
+        key: (stored.get(key, 0), actual.get(key, 0))
+        for key in set(actual) | set(stored)
+        if stored.get(key, 0) != actual.get(key, 0)
+    }
+
+def _all_drift(db: Session):
+    drift = check_task_stats(db)
+    drift.update({(s, p, "archived"): v for (s, p), v in check_task_stats(db, archived=True).items()})
+    return drift
+
+def rebuild_task_stats(db: Session):
+    """
+    Recomputes the rollup from `tasks` and `archived_tasks` in one
+    transaction. Returns the drift that was fixed (archived buckets keyed
+    as (status, priority, "archived")).
+    """
+    drift = _all_drift(db)
+    hot = _actual_counts(db)
+    cold = _actual_counts(db, ArchivedTask)
+    db.query(TaskStat).delete(synchronize_session=False)
+    db.add_all(
+        TaskStat(status=key[0], priority=key[1], count=hot.get(key, 0), archived=cold.get(key, 0))
+        for key in set(hot) | set(cold)
+    )
+    db.commit()
+    invalidate(TASKS)
+    return drift
+
+if __name__ == "__main__":
+    from database import session_scope
+    with session_scope() as db:
+        if "--rebuild" in sys.argv:
+            drift = rebuild_task_stats(db)
+            print(f"Rebuilt task_stats ({len(drift)} bucket(s) corrected).")
+        else:
+            drift = _all_drift(db)
+            for key, (stored, actual) in sorted(drift.items()):
+                label = " (archived)" if len(key) == 3 else ""
+                print(f"{key[0]:<12} {key[1]:<8} rollup={stored} actual={actual}{label}")
+            print("No drift." if not drift else f"{len(drift)} bucket(s) drifted; run with --rebuild.")
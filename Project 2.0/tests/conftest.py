@@ -0,0 +1,17 @@
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+from database import create_app_engine
+import migrations
+
+@pytest.fixture
+def db():
+    # Embedded in-memory SQLite backend, so SQL-level logic is exercised offline
+    engine = create_app_engine("sqlite://")
+    migrations.upgrade(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
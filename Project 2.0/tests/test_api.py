@@ -0,0 +1,169 @@
+
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from api import app
+from database import create_app_engine, create_async_app_engine, get_async_db, get_db
+from instrumentation import reset_metrics
+from models import Task, WeatherLog
+from weather_service import InvalidAPIKey
+import migrations
+
+@pytest.fixture
+def engines(tmp_path):
+    # Sync and async endpoints share one SQLite file, as they share one database in production
+    url = f"sqlite:///{tmp_path / 'api.db'}"
+    sync_engine = create_app_engine(url)
+    migrations.upgrade(sync_engine)
+    async_engine = create_async_app_engine(url)
+    yield sync_engine, async_engine
+    asyncio.run(async_engine.dispose())
+    sync_engine.dispose()
+
+@pytest.fixture
+def db(engines):
+    session = sessionmaker(bind=engines[0])()
+    yield session
+    session.close()
+
+@pytest.fixture
+def client(db, engines):
+    AsyncSession = async_sessionmaker(engines[1], expire_on_commit=False)
+
+    async def async_db():
+        async with AsyncSession() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_async_db] = async_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+def test_shutdown_closes_async_resources():
+    with patch("api.close_async_http_client", AsyncMock()) as close_client, \
+            patch("api.dispose_async_engine", AsyncMock()) as dispose:
+        with TestClient(app):
+            assert not close_client.await_count
+        close_client.assert_awaited_once()
+        dispose.assert_awaited_once()
+
+def test_create_get_and_delete_task(client):
+    res = client.post("/tasks", json={"title": "API task", "content": "Created over HTTP.", "priority": "High"})
+    assert res.status_code == 201
+    task = res.json()
+    assert task["summary"].startswith("AI Generated Summary")
+
+    assert client.get(f"/tasks/{task['id']}").json()["title"] == "API task"
+    assert client.delete(f"/tasks/{task['id']}").status_code == 200
+    assert client.get(f"/tasks/{task['id']}").status_code == 404
+    assert client.delete(f"/tasks/{task['id']}").status_code == 404
+
+def test_batch_create_reports_invalid_rows(client):
+    payload = [{"title": f"T{i}", "content": "Body"} for i in range(3)] + [{"content": "no title"}]
+    res = client.post("/tasks/batch", json=payload)
+
+    assert res.status_code == 201
+    body = res.json()
+    assert (body["succeeded"], body["failed"]) == (3, 1)
+    assert body["errors"][0]["index"] == 3
+
+def test_cursor_pagination_and_gzip(client, db):
+    base = datetime(2024, 1, 1)
+    db.add_all([Task(title=f"Task {i}", content="x" * 40, summary="s", status="Todo", priority="Medium",
+                     created_at=base + timedelta(minutes=i)) for i in range(60)])
+    db.commit()
+
+    first = client.get("/tasks", params={"limit": 50}, headers={"Accept-Encoding": "gzip"})
+    assert first.headers.get("content-encoding") == "gzip"
+    page = first.json()
+    assert len(page["items"]) == 50 and page["next_cursor"]
+
+    rest = client.get("/tasks", params={"limit": 50, "after": page["next_cursor"]}).json()
+    assert len(rest["items"]) == 10
+    assert {t["id"] for t in page["items"]}.isdisjoint(t["id"] for t in rest["items"])
+    assert client.get("/tasks", params={"after": "garbage"}).status_code == 400
+
+def test_batch_delete(client):
+    client.post("/tasks/batch", json=[{"title": f"T{i}", "content": "Body"} for i in range(3)])
+    ids = [t["id"] for t in client.get("/tasks").json()["items"]]
+
+    body = client.post("/tasks/batch-delete", json={"ids": ids + [9999]}).json()
+
+    assert (body["succeeded"], body["failed"]) == (3, 1)
+    assert client.get("/tasks").json()["items"] == []
+
+def test_reads_see_writes_made_elsewhere(client, db):
+    assert client.get("/tasks").json()["items"] == []
+    # As if another API worker had handled the write: no invalidation reaches this process
+    db.add(Task(title="Elsewhere", content="Body", summary="s", status="Todo", priority="Low"))
+    db.commit()
+    assert [t["title"] for t in client.get("/tasks").json()["items"]] == ["Elsewhere"]
+
+def test_weather_batch_partial_failure(client):
+    results = {"London": ({"temperature": "1°C", "condition": "Fog", "source": "Open-Meteo"}, None),
+               "Atlantis": (None, "City 'Atlantis' not found.")}
+    with patch("api.get_weather_many", return_value=results):
+        body = client.post("/weather/batch", json={"cities": ["London", "Atlantis"]}).json()
+
+    assert body["London"]["data"]["condition"] == "Fog"
+    assert "not found" in body["Atlantis"]["error"]
+
+def test_weather_serves_stale_value_without_logging_it(client):
+    stale = {"temperature": "1°C", "condition": "Fog", "source": "Open-Meteo", "stale": True,
+             "as_of": "2026-01-01T10:00:00"}
+    with patch("crud_async.get_weather_async", AsyncMock(return_value=stale)), patch("crud_async.log_weather") as log:
+        body = client.get("/weather", params={"city": "London", "log": True}).json()
+
+    assert body["stale"] is True and body["as_of"].startswith("2026-01-01")
+    assert not log.called
+
+def test_bad_api_key_is_401_and_unknown_city_404(client):
+    with patch("api.get_weather_async", AsyncMock(side_effect=InvalidAPIKey("Invalid API Key."))):
+        assert client.get("/weather", params={"city": "London", "api_key": "x"}).status_code == 401
+    with patch("api.get_weather_async", AsyncMock(side_effect=ValueError("City 'Atlantis' not found."))):
+        assert client.get("/weather", params={"city": "Atlantis"}).status_code == 404
+    with patch("api.get_weather_many", side_effect=InvalidAPIKey("Invalid API Key.")):
+        assert client.post("/weather/batch", json={"cities": ["London"], "api_key": "x"}).status_code == 401
+
+def test_weather_is_logged_and_deleted_through_the_async_session(client, db):
+    fresh = {"temperature": "4.0°C", "condition": "Rain", "source": "Open-Meteo"}
+    with patch("crud_async.get_weather_async", AsyncMock(return_value=fresh)):
+        assert client.get("/weather", params={"city": "Oslo", "log": True}).json()["condition"] == "Rain"
+
+    log_id = db.query(WeatherLog.id).filter(WeatherLog.city == "Oslo").scalar()
+    assert client.get("/weather/logs").json()[0]["city"] == "Oslo"
+    assert client.delete(f"/weather/logs/{log_id}").status_code == 200
+    assert client.delete(f"/weather/logs/{log_id}").status_code == 404
+
+def test_export_streams_projected_csv(client, db):
+    db.add_all([Task(title=f"T{i}", content="secret", summary="s", status="Todo", priority="Low") for i in range(3)])
+    db.commit()
+
+    res = client.get("/export/tasks", params={"format": "csv", "columns": "id,title"})
+
+    assert res.status_code == 200
+    assert res.text.splitlines()[0] == "id,title"
+    assert len(res.text.splitlines()) == 4 and "secret" not in res.text
+    assert client.get("/export/tasks", params={"columns": "nope"}).status_code == 400
+
+def test_failed_parquet_export_removes_its_temp_file(client, tmp_path, monkeypatch):
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    with patch("api.export_table", side_effect=RuntimeError("Parquet export needs pyarrow")):
+        res = client.get("/export/tasks", params={"format": "parquet"})
+
+    assert res.status_code == 500 and "pyarrow" in res.json()["detail"]
+    assert not list(tmp_path.glob("*.parquet"))
+
+def test_metrics_endpoint_labels_requests_by_route(client):
+    reset_metrics()
+    client.post("/tasks", json={"title": "Timed", "content": "Body text"})
+    client.get("/tasks/1")
+
+    body = client.get("/metrics").text
+
+    assert 'app_view_duration_seconds_count{view="GET /tasks/{task_id}"} 1' in body
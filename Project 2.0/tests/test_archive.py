@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from archive import archive_done_tasks, get_archive_stats, restore_task
+from crud import create_task
+from dashboard_stats import get_dashboard_stats
+from models import ArchivedTask, SummaryJob, Task
+from search import search_tasks
+from summary_queue import enqueue_summary
+from task_stats import check_task_stats, rebuild_task_stats
+
+def _seed(db):
+    old = datetime.now() - timedelta(days=200)
+    for i in range(5):
+        db.add(Task(title=f"old report {i}", content="quarterly budget", status="Done", priority="Low",
+                    completed_at=old))
+    db.add(Task(title="recent", content="budget", status="Done", priority="Low"))
+    create_task(db, "open", "budget", "High", "Todo", None)
+    rebuild_task_stats(db)
+
+def test_archival_moves_old_done_tasks_in_batches(db):
+    _seed(db)
+    enqueue_summary(db, 1)
+    db.commit()
+    before = get_dashboard_stats(db)
+
+    assert archive_done_tasks(db, older_than_days=90, dry_run=True) == 5
+    assert archive_done_tasks(db, older_than_days=90, batch_size=2, max_batches=1) == 2
+    # Resumes where the interrupted run stopped
+    assert archive_done_tasks(db, older_than_days=90, batch_size=2) == 3
+
+    assert get_archive_stats(db) == {"hot": 2, "archived": 5, "eligible": 0}
+    assert db.query(SummaryJob).count() == 0
+    assert sorted(t.id for t in db.query(ArchivedTask)) == [1, 2, 3, 4, 5]
+    assert check_task_stats(db) == {} and check_task_stats(db, archived=True) == {}
+
+    after = get_dashboard_stats(db)
+    for key in ("total", "completed", "pending", "by_status", "by_priority"):
+        assert after[key] == before[key]
+    assert after["archived"] == 5
+
+def test_archived_tasks_stay_searchable(db):
+    _seed(db)
+    archive_done_tasks(db, older_than_days=90)
+
+    assert {row.title for row in search_tasks(db, "budget")} == {"recent", "open"}
+    archived = search_tasks(db, "quarterly budget", archived=True)
+    assert sorted(row.id for row in archived) == [1, 2, 3, 4, 5]
+
+def test_restore_returns_task_to_hot_table(db):
+    _seed(db)
+    archive_done_tasks(db, older_than_days=90)
+
+    task, error = restore_task(db, 3)
+    assert error is None and task.id == 3
+    assert db.get(Task, 3).completed_at > datetime.now() - timedelta(minutes=1)
+    assert archive_done_tasks(db, older_than_days=90) == 0
+    assert restore_task(db, 3)[1][0] == 404
+    assert check_task_stats(db) == {} and check_task_stats(db, archived=True) == {}
+    assert [row.id for row in search_tasks(db, "quarterly")] == [3]
+
+def test_completed_at_follows_status(db):
+    from bulk_ops import bulk_update_status
+    todo, _ = create_task(db, "a", "b", "Low", "Todo", None)
+    done, _ = create_task(db, "c", "d", "Low", "Done", None)
+    assert todo.completed_at is None and done.completed_at is not None
+
+    bulk_update_status(db, "Done", ids=[todo.id])
+    bulk_update_status(db, "Todo", ids=[done.id])
+    db.expire_all()
+    assert db.get(Task, todo.id).completed_at is not None
+    assert db.get(Task, done.id).completed_at is None
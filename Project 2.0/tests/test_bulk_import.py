@@ -0,0 +1,50 @@
+
+import json
+from models import Task
+from bulk_import import import_file, import_tasks
+
+def test_import_csv_reports_row_errors(db, tmp_path):
+    path = tmp_path / "tasks.csv"
+    path.write_text(
+        "title,content,priority,status,due_date\n"
+        "Task A,First task content.,High,Todo,2024-06-01\n"
+        "Task B,Second task content.,,,\n"
+        "Task C,Bad date,Low,Todo,not-a-date\n"
+        "Task D,Fourth task content.,Medium,Done,\n",
+        encoding="utf-8",
+    )
+
+    report = import_file(db, str(path), chunk_size=2)
+
+    assert report["imported"] == 3
+    assert report["failed"] == 1
+    assert report["errors"][0][0] == 4  # line number of "Task C"
+    assert "due_date" in report["errors"][0][1]
+    task_b = db.query(Task).filter(Task.title == "Task B").one()
+    assert task_b.priority == "Medium" and task_b.status == "Todo"
+    assert task_b.summary
+
+def test_import_jsonl_with_bad_line(db, tmp_path):
+    path = tmp_path / "tasks.jsonl"
+    path.write_text(
+        json.dumps({"title": "One", "content": "Body one."}) + "\n"
+        "{not json}\n"
+        "\n"
+        + json.dumps({"content": "Missing title"}) + "\n",
+        encoding="utf-8",
+    )
+
+    report = import_file(db, str(path))
+
+    assert report["imported"] == 1
+    assert [line for line, _ in report["errors"]] == [2, 4]
+
+def test_import_tasks_progress_per_chunk(db):
+    rows = ((i, {"title": f"T{i}", "content": "c"}) for i in range(1, 11))
+    seen = []
+
+    report = import_tasks(db, rows, chunk_size=4, progress=lambda r: seen.append(r["imported"]))
+
+    assert seen == [4, 8, 10]
+    assert db.query(Task).count() == 10
+    assert report["rows_per_second"] > 0
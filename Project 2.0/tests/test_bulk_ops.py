@@ -0,0 +1,57 @@
+
+from datetime import date, datetime
+import pytest
+from models import Task, WeatherLog, SummaryJob
+from bulk_ops import bulk_delete_tasks, bulk_update_status, bulk_delete_weather_logs
+from task_stats import check_task_stats, rebuild_task_stats
+from summary_queue import enqueue_summary
+
+def _seed(db):
+    for i in range(10):
+        db.add(Task(title=f"T{i}", content="Body", summary="s", status="Done" if i % 2 else "Todo",
+                    priority="High" if i < 5 else "Low", due_date=date(2024, 1, 1 + i)))
+    db.commit()
+    rebuild_task_stats(db)
+
+def test_bulk_delete_in_chunks_keeps_rollup(db):
+    _seed(db)
+    done = db.query(Task).filter(Task.status == "Done").first()
+    enqueue_summary(db, done.id)
+    db.commit()
+
+    assert bulk_delete_tasks(db, dry_run=True, status=["Done"]) == 5
+    assert bulk_delete_tasks(db, chunk_size=2, status=["Done"]) == 5
+
+    assert db.query(Task).filter(Task.status == "Done").count() == 0
+    assert db.query(SummaryJob).count() == 0
+    assert check_task_stats(db) == {}
+
+def test_bulk_delete_combines_filters(db):
+    _seed(db)
+    assert bulk_delete_tasks(db, priority=["High"], due_to=date(2024, 1, 3)) == 3
+    assert db.query(Task).count() == 7
+
+def test_bulk_update_status(db):
+    _seed(db)
+    ids = [t.id for t in db.query(Task.id).filter(Task.status == "Todo").limit(3)]
+
+    assert bulk_update_status(db, "Done", chunk_size=2, ids=ids) == 3
+    assert bulk_update_status(db, "Done", ids=ids) == 0
+
+    assert db.query(Task).filter(Task.status == "Done").count() == 8
+    assert check_task_stats(db) == {}
+
+def test_bulk_operations_require_a_filter(db):
+    with pytest.raises(ValueError):
+        bulk_delete_tasks(db)
+    with pytest.raises(ValueError):
+        bulk_update_status(db, "Archived", status=["Todo"])
+
+def test_bulk_delete_weather_logs(db):
+    db.add_all([WeatherLog(city=c, temperature="1°C", condition="Fog", timestamp=datetime(2024, 1, d))
+                for c, d in [("London", 1), ("London", 20), ("Paris", 2)]])
+    db.commit()
+
+    assert bulk_delete_weather_logs(db, before=datetime(2024, 1, 10), city="London") == 1
+    assert bulk_delete_weather_logs(db, before=datetime(2024, 1, 10)) == 1
+    assert db.query(WeatherLog).count() == 1
@@ -0,0 +1,60 @@
+
+from cache import LRUCache, SQLiteStore
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction_and_stats():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)           # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = LRUCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("k", "v")
+    clock.now += 59
+    assert cache.get("k") == "v"
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_store_survives_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = LRUCache(ttl=3600, store=SQLiteStore(path, table="geo"))
+    first.set(("city", "london"), [51.5, -0.12])
+
+    second = LRUCache(ttl=3600, store=SQLiteStore(path, table="geo"))
+    assert second.get(("city", "london")) == [51.5, -0.12]
+    assert second.stats()["store_hits"] == 1
+
+def test_store_drops_expired_and_evicted_rows(tmp_path):
+    clock = FakeClock()
+    store = SQLiteStore(str(tmp_path / "cache.db"), purge_every=2, clock=clock)
+    cache = LRUCache(maxsize=2, ttl=60, store=store, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)  # evicts "a" from memory and disk
+    assert store.get("a") is None and store.get("b") is not None
+
+    clock.now += 61
+    cache.set("d", 4)  # second write since the last purge: "b" and "c" have expired
+    rows = store._conn.execute("SELECT key FROM cache ORDER BY key").fetchall()
+    assert rows == [("d",)]
+
+    clock.now += 61
+    reopened = SQLiteStore(str(tmp_path / "cache.db"), clock=clock)
+    assert reopened._conn.execute("SELECT COUNT(*) FROM cache").fetchone() == (0,)
@@ -0,0 +1,89 @@
+import asyncio
+from unittest.mock import patch
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+import database
+from database import async_url, create_app_engine, create_async_app_engine
+from models import SummaryJob, Task, WeatherLog, WeatherRollup
+from task_stats import get_stat_counts
+import crud_async
+import migrations
+
+@pytest.fixture
+def engines(tmp_path):
+    # Both engines on one SQLite file: the sync side migrates and checks, the async side writes
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_app_engine(url)
+    migrations.upgrade(sync_engine)
+    async_engine = create_async_app_engine(url)
+    yield sessionmaker(bind=sync_engine), async_sessionmaker(async_engine, expire_on_commit=False)
+    asyncio.run(async_engine.dispose())
+    sync_engine.dispose()
+
+def test_async_url_swaps_driver():
+    assert async_url("mysql+pymysql://u:p@db/app").drivername == "mysql+aiomysql"
+    assert async_url("sqlite:///data/tasks.db").drivername == "sqlite+aiosqlite"
+    with pytest.raises(ValueError):
+        async_url("postgresql://db/app")
+
+def test_dispose_async_engine_resets_the_shared_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "_async_engine", create_async_app_engine(f"sqlite:///{tmp_path / 'a.db'}"))
+    asyncio.run(database.dispose_async_engine())
+    assert database._async_engine is None
+    asyncio.run(database.dispose_async_engine())  # nothing to do
+
+def test_create_and_delete_task_keep_stats(engines):
+    Session, AsyncSession = engines
+
+    async def scenario():
+        async with AsyncSession() as db:
+            task, error = await crud_async.create_task(db, "Async", "Body text.", "High", "Todo", None,
+                                                       defer_summary=True)
+            assert error is None
+            assert (await crud_async.create_task(db, None, "x", "High", "Todo", None))[1][0] == 422
+            return task.id
+
+    task_id = asyncio.run(scenario())
+    with Session() as db:
+        assert db.get(Task, task_id).summary is None
+        assert db.query(SummaryJob).filter(SummaryJob.task_id == task_id).count() == 1
+        assert dict(((s, p), c) for s, p, c in get_stat_counts(db)) == {("Todo", "High"): 1}
+
+    async def remove():
+        async with AsyncSession() as db:
+            assert await crud_async.delete_task(db, task_id) == (True, (200, "Task deleted"))
+            return await crud_async.delete_task(db, task_id)
+
+    assert asyncio.run(remove())[1][0] == 404
+    with Session() as db:
+        assert db.query(Task).count() == 0 and db.query(SummaryJob).count() == 0
+        assert all(c == 0 for _, _, c in get_stat_counts(db))
+
+def test_concurrent_weather_logging(engines):
+    Session, AsyncSession = engines
+
+    async def fake_weather(city, api_key=None):
+        await asyncio.sleep(0.01)
+        return {"temperature": "10.0°C", "condition": "Fog", "source": "stub"}
+
+    async def one(city):
+        async with AsyncSession() as db:
+            return await crud_async.fetch_and_log_weather(db, city)
+
+    async def run_all():
+        return await asyncio.gather(*(one(city) for city in ["London", "Paris"] * 5))
+
+    with patch("crud_async.get_weather_async", fake_weather):
+        assert len(asyncio.run(run_all())) == 10
+    with Session() as db:
+        assert db.query(WeatherLog).count() == 10
+        samples = {r.city: r.samples for r in db.query(WeatherRollup).filter(WeatherRollup.period == "day")}
+        assert samples == {"London": 5, "Paris": 5}
+
+    async def remove(log_id):
+        async with AsyncSession() as db:
+            return await crud_async.delete_weather_log(db, log_id)
+
+    assert asyncio.run(remove(1))[0] is True
+    assert asyncio.run(remove(1))[1][0] == 404
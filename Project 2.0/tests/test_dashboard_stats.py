@@ -0,0 +1,42 @@
+
+from datetime import datetime, timedelta
+from models import Task
+from dashboard_stats import get_dashboard_stats
+from task_stats import rebuild_task_stats
+
+def _add(db, title, status, priority, minutes_ago):
+    db.add(Task(
+        title=title, content="c", status=status, priority=priority,
+        created_at=datetime(2024, 1, 1) - timedelta(minutes=minutes_ago)
+    ))
+
+def test_dashboard_stats_counts(db):
+    _add(db, "a", "Todo", "High", 5)
+    _add(db, "b", "Todo", "Low", 4)
+    _add(db, "c", "Done", "High", 3)
+    _add(db, "d", "In Progress", "High", 2)
+    db.commit()
+    rebuild_task_stats(db)
+
+    stats = get_dashboard_stats(db)
+
+    assert stats["total"] == 4
+    assert stats["completed"] == 1
+    assert stats["pending"] == 3
+    assert stats["high_priority"] == 2
+    assert stats["by_status"] == {"Todo": 2, "Done": 1, "In Progress": 1}
+    assert stats["by_priority"] == {"High": 3, "Low": 1}
+
+def test_dashboard_stats_recent_limit(db):
+    for i in range(8):
+        _add(db, f"task {i}", "Todo", "Medium", i)
+    db.commit()
+
+    recent = get_dashboard_stats(db, recent_limit=5)["recent"]
+
+    assert [row.title for row in recent] == ["task 0", "task 1", "task 2", "task 3", "task 4"]
+
+def test_dashboard_stats_empty(db):
+    stats = get_dashboard_stats(db)
+    assert stats["total"] == 0
+    assert stats["recent"] == []
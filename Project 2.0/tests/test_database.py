@@ -0,0 +1,76 @@
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+import database
+from database import MeteredQueuePool, instrument_pool, pool_metrics, session_scope
+
+@pytest.fixture
+def metered_engine(tmp_path):
+    engine = instrument_pool(create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=MeteredQueuePool, pool_size=2, max_overflow=0
+    ))
+    pool_metrics.reset()
+    yield engine
+    engine.dispose()
+
+def test_session_scope_returns_connection_to_pool(metered_engine, monkeypatch):
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=metered_engine))
+
+    for _ in range(5):
+        with session_scope() as db:
+            db.execute(text("SELECT 1"))
+
+    metrics = pool_metrics.snapshot()
+    assert metrics["checkouts"] == 5
+    assert metrics["checkins"] == 5
+    assert metrics["checked_out"] == 0
+    assert metrics["connects"] == 1  # the pooled connection was reused
+
+def test_session_scope_closes_on_error(metered_engine, monkeypatch):
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=metered_engine))
+
+    with pytest.raises(RuntimeError):
+        with session_scope() as db:
+            db.execute(text("SELECT 1"))
+            raise RuntimeError("view failed")
+
+    assert pool_metrics.snapshot()["checked_out"] == 0
+
+def test_pool_tracks_peak_checkouts(metered_engine):
+    first = metered_engine.connect()
+    second = metered_engine.connect()
+    first.close()
+    second.close()
+
+    metrics = pool_metrics.snapshot()
+    assert metrics["peak_checked_out"] == 2
+    assert metrics["wait_seconds_max"] >= 0.0
+
+def test_sqlite_file_backend_uses_wal_and_tuned_pragmas(tmp_path):
+    engine = database.create_app_engine(f"sqlite:///{tmp_path / 'data' / 'tasks.db'}")
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        assert isinstance(engine.pool, MeteredQueuePool)
+    finally:
+        engine.dispose()
+
+def test_init_and_reset_on_sqlite(tmp_path, monkeypatch):
+    import reset_db
+    engine = database.create_app_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(reset_db, "engine", engine)
+
+    database.init_db()
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO tasks (title, content) VALUES ('t', 'c')"))
+    reset_db.reset_database()
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM tasks")).scalar() == 0
+        assert conn.execute(text("SELECT COUNT(*) FROM tasks_fts")).scalar() == 0
+        assert conn.execute(text("SELECT COUNT(*) FROM schema_migrations")).scalar() > 0
+    engine.dispose()
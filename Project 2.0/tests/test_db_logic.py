@@ -1,7 +1,7 @@
 
 import pytest
 from unittest.mock import MagicMock
-from app import create_task, delete_task
+from crud import create_task, delete_task
 from models import Task
 from datetime import date
 
@@ -30,9 +30,9 @@ def test_create_task_success():
 def test_delete_task_success():
     mock_db = MagicMock()
     
-    # Mock query return
+    # Mock lookup return
     mock_task = Task(id=1, title="Delete Me")
-    mock_db.query.return_value.filter.return_value.first.return_value = mock_task
+    mock_db.get.return_value = mock_task
     
     success, error = delete_task(mock_db, 1)
     
@@ -43,8 +43,8 @@ def test_delete_task_success():
 
 def test_delete_task_not_found():
     mock_db = MagicMock()
-    # Mock query return None
-    mock_db.query.return_value.filter.return_value.first.return_value = None
+    # Mock lookup return None
+    mock_db.get.return_value = None
     
     success, error = delete_task(mock_db, 999)
     
@@ -0,0 +1,80 @@
+
+import csv
+import json
+from datetime import date, datetime
+import pytest
+from models import ArchivedTask, Task, WeatherLog
+from export import export_table, iter_chunks, export_columns
+
+def _seed(db, n=7):
+    db.add_all([Task(title=f"T{i}", content="long body", summary="s", status="Todo", priority="Low",
+                     due_date=date(2024, 1, 1 + i), created_at=datetime(2024, 1, 1, 9, i)) for i in range(n)])
+    db.commit()
+
+def test_chunks_are_bounded(db):
+    _seed(db)
+    sizes = [len(rows) for rows in iter_chunks(db, export_columns("tasks", ["id"]), chunk_size=3)]
+    assert sizes == [3, 3, 1]
+
+def test_csv_export_with_projection(db, tmp_path):
+    _seed(db)
+    path = tmp_path / "tasks.csv"
+    reports = []
+
+    report = export_table(db, "tasks", str(path), columns=["id", "title", "due_date"], chunk_size=2,
+                          progress=lambda r: reports.append(r["rows"]))
+
+    rows = list(csv.DictReader(path.open()))
+    assert report["rows"] == 7 and reports == [2, 4, 6, 7]
+    assert list(rows[0]) == ["id", "title", "due_date"]
+    assert rows[0]["due_date"] == "2024-01-01"
+
+def test_jsonl_export(db, tmp_path):
+    db.add(WeatherLog(city="Oslo", temperature="1.5°C", temperature_c=1.5, condition="Fog",
+                      timestamp=datetime(2024, 1, 1, 10)))
+    db.commit()
+    path = tmp_path / "weather.jsonl"
+
+    export_table(db, "weather_logs", str(path))
+
+    (line,) = path.read_text(encoding="utf-8").splitlines()
+    assert json.loads(line)["temperature_c"] == 1.5
+
+def test_parquet_export(db, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    _seed(db)
+    path = tmp_path / "tasks.parquet"
+
+    export_table(db, "tasks", str(path), columns=["id", "title", "created_at"], chunk_size=3)
+
+    parquet = pq.ParquetFile(str(path))
+    assert parquet.metadata.num_rows == 7 and parquet.metadata.num_row_groups == 3
+    assert parquet.schema_arrow.names == ["id", "title", "created_at"]
+
+def test_tasks_export_includes_completed_at(db, tmp_path):
+    db.add(Task(title="Shipped", content="body", status="Done", completed_at=datetime(2024, 2, 1, 8)))
+    db.add(Task(title="Open", content="body", status="Todo"))
+    db.commit()
+    path = tmp_path / "tasks.csv"
+
+    export_table(db, "tasks", str(path), columns=["title", "completed_at"])
+
+    rows = list(csv.DictReader(path.open()))
+    assert [(r["title"], r["completed_at"]) for r in rows] == [("Shipped", "2024-02-01T08:00:00"), ("Open", "")]
+
+def test_archived_tasks_export(db, tmp_path):
+    db.add_all([ArchivedTask(id=task_id, title=f"Old {task_id}", content="body", status="Done",
+                             completed_at=datetime(2023, 1, 1), archived_at=datetime(2024, 1, 1))
+                for task_id in (9, 4)])
+    db.commit()
+    path = tmp_path / "archive.jsonl"
+
+    export_table(db, "archived_tasks", str(path))
+
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [(row["archive_id"], row["id"]) for row in rows] == [(1, 9), (2, 4)]
+    assert rows[0]["archived_at"] == "2024-01-01T00:00:00"
+
+def test_unknown_columns_are_rejected():
+    with pytest.raises(ValueError):
+        export_columns("tasks", ["id", "password"])
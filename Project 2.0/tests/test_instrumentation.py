@@ -0,0 +1,76 @@
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+import threading
+import pytest
+import instrumentation
+from instrumentation import (
+    Histogram, instrument_engine, metrics, normalize_sql, render_prometheus, track_view, write_prometheus,
+)
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+def _engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    return instrument_engine(engine)
+
+def test_normalize_sql_collapses_in_lists_and_whitespace():
+    assert normalize_sql("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?)"
+
+def test_histogram_quantiles():
+    h = Histogram()
+    for ms in [1] * 90 + [200] * 10:
+        h.observe(ms / 1000)
+    assert h.count == 100
+    assert h.quantile(0.5) <= 0.001
+    assert 0.1 < h.quantile(0.95) <= 0.25
+
+def test_queries_are_attributed_to_views_and_n_plus_one_flagged():
+    engine = _engine()
+    with engine.connect() as conn:
+        with track_view("Dashboard"):
+            for i in range(instrumentation.N_PLUS_ONE_THRESHOLD):
+                conn.execute(text("SELECT :i"), {"i": i})
+        conn.execute(text("SELECT 1"))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["views"]["Dashboard"]["queries_avg"] == instrumentation.N_PLUS_ONE_THRESHOLD
+    assert {(q["view"], q["kind"]) for q in snapshot["queries"]} == {("Dashboard", "SELECT"), ("-", "SELECT")}
+    assert snapshot["n_plus_one"][0]["view"] == "Dashboard"
+
+def test_prometheus_text_format():
+    engine = _engine()
+    with engine.connect() as conn, track_view('Process "View"'):
+        conn.execute(text("SELECT 1"))
+    instrumentation.observe_http("geocoding-api.open-meteo.com", 200, 0.05)
+
+    body = render_prometheus(gauges={"app_db_pool_checked_out": 0})
+
+    assert 'app_db_query_duration_seconds_bucket{view="Process \\"View\\"",kind="SELECT",le="+Inf"} 1' in body
+    assert 'app_http_request_duration_seconds_count{host="geocoding-api.open-meteo.com",status="200"} 1' in body
+    assert "# TYPE app_db_pool_checked_out gauge" in body
+
+def test_concurrent_metric_file_writes(tmp_path):
+    path = str(tmp_path / "app.prom")
+    errors = []
+
+    def rerun():
+        try:
+            for _ in range(20):
+                write_prometheus(path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=rerun) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert [p.name for p in tmp_path.iterdir()] == ["app.prom"]
+    assert open(path).read() == render_prometheus()
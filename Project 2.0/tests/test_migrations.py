@@ -0,0 +1,73 @@
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+import migrations
+
+def _legacy_engine():
+    # Schema as created by the original create_all(): no secondary indexes
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, "
+            "content TEXT NOT NULL, summary TEXT, status VARCHAR(50), priority VARCHAR(50), "
+            "due_date DATE, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE weather_logs (id INTEGER PRIMARY KEY, city VARCHAR(100) NOT NULL, "
+            "temperature VARCHAR(50) NOT NULL, condition VARCHAR(100) NOT NULL, "
+            "timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        conn.execute(text("INSERT INTO tasks (title, content, status) VALUES ('keep me', 'c', 'Todo')"))
+    return engine
+
+def test_upgrade_adds_indexes_and_keeps_data():
+    engine = _legacy_engine()
+
+    applied = migrations.upgrade(engine)
+
+    assert 1 in applied
+    insp = inspect(engine)
+    task_indexes = {ix["name"] for ix in insp.get_indexes("tasks")}
+    assert {"ix_tasks_status_priority_created_at", "ix_tasks_created_at"} <= task_indexes
+    assert "ix_weather_logs_timestamp" in {ix["name"] for ix in insp.get_indexes("weather_logs")}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT title FROM tasks")).scalar() == "keep me"
+
+def test_upgrade_is_idempotent():
+    engine = _legacy_engine()
+    migrations.upgrade(engine)
+
+    assert migrations.upgrade(engine) == []
+    assert all(is_applied for _, _, is_applied in migrations.status(engine))
+
+def test_upgrade_backfills_numeric_temperature_and_rollups():
+    engine = _legacy_engine()
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO weather_logs (city, temperature, condition, timestamp) VALUES "
+            "('Oslo', '-2.5°C', 'Snow', '2024-01-01 10:15:00'), ('Oslo', '1.5°C', 'Fog', '2024-01-01 10:45:00')"
+        ))
+
+    migrations.upgrade(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT temperature_c FROM weather_logs ORDER BY id")).scalars().all() == [-2.5, 1.5]
+        row = conn.execute(text(
+            "SELECT samples, temp_sum, temp_min, temp_max FROM weather_rollups WHERE period = 'day'"
+        )).one()
+    assert tuple(row) == (2, -1.0, -2.5, 1.5)
+
+def test_upgrade_backfills_completed_at_for_done_tasks():
+    engine = _legacy_engine()
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO tasks (title, content, status, created_at) VALUES ('finished', 'c', 'Done', '2023-05-01 09:00:00')"
+        ))
+
+    migrations.upgrade(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT title, completed_at FROM tasks ORDER BY id")).all()
+    assert [tuple(r) for r in rows] == [("keep me", None), ("finished", "2023-05-01 09:00:00")]
+    assert "archived" in {c["name"] for c in inspect(engine).get_columns("task_stats")}
+    assert inspect(engine).has_table("archived_tasks")
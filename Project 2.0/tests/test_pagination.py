@@ -0,0 +1,71 @@
+
+from datetime import datetime, timedelta
+import pytest
+from models import Task
+from pagination import paginate_tasks, estimate_task_count, encode_cursor, decode_cursor
+
+def _seed(db, n, status="Todo"):
+    base = datetime(2024, 1, 1)
+    for i in range(n):
+        # Pairs of tasks share a timestamp so the id tiebreaker is exercised
+        db.add(Task(title=f"task {i}", content="c", status=status,
+                    priority="Medium", created_at=base + timedelta(minutes=i // 2)))
+    db.commit()
+
+def test_pages_walk_forward_and_back(db):
+    _seed(db, 7)
+
+    first = paginate_tasks(db, page_size=3)
+    assert [t.title for t in first["items"]] == ["task 6", "task 5", "task 4"]
+    assert first["prev_cursor"] is None
+
+    second = paginate_tasks(db, page_size=3, after=first["next_cursor"])
+    assert [t.title for t in second["items"]] == ["task 3", "task 2", "task 1"]
+
+    last = paginate_tasks(db, page_size=3, after=second["next_cursor"])
+    assert [t.title for t in last["items"]] == ["task 0"]
+    assert last["next_cursor"] is None
+
+    back = paginate_tasks(db, page_size=3, before=last["prev_cursor"])
+    assert [t.title for t in back["items"]] == ["task 3", "task 2", "task 1"]
+    assert back["prev_cursor"] is not None
+
+    top = paginate_tasks(db, page_size=3, before=back["prev_cursor"])
+    assert [t.title for t in top["items"]] == ["task 6", "task 5", "task 4"]
+    assert top["prev_cursor"] is None
+
+def test_filters_apply_to_pages(db):
+    _seed(db, 4, status="Todo")
+    _seed(db, 2, status="Done")
+
+    page = paginate_tasks(db, status=["Done"], page_size=10)
+    assert len(page["items"]) == 2
+    assert page["next_cursor"] is None
+
+    page = paginate_tasks(db, search="task 3", page_size=10)
+    assert [t.title for t in page["items"]] == ["task 3"]
+
+def test_count_estimate_is_capped(db):
+    _seed(db, 5)
+    assert estimate_task_count(db, cap=10) == (5, True)
+    assert estimate_task_count(db, cap=3) == (3, False)
+
+def test_cursor_roundtrip_and_invalid():
+    ts = datetime(2024, 5, 1, 12, 30)
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_pages_with_default_timestamps(db):
+    # Rows created in the same second must still page by id without gaps or repeats
+    db.add_all([Task(title=f"T{i}", content="c", status="Todo", priority="Medium") for i in range(7)])
+    db.commit()
+
+    seen, after = [], None
+    for _ in range(5):
+        page = paginate_tasks(db, page_size=3, after=after)
+        seen += [row.id for row in page["items"]]
+        after = page["next_cursor"]
+        if not after:
+            break
+    assert sorted(seen) == list(range(1, 8)) and len(seen) == 7
@@ -0,0 +1,74 @@
+
+import threading
+from unittest.mock import MagicMock
+from crud import create_task, delete_task
+from query_cache import QueryCache, TASKS, WEATHER, query_cache, cached_query
+from weather_service import log_weather, get_recent_weather_logs
+
+def test_hits_and_namespace_invalidation():
+    cache = QueryCache(max_bytes=10_000)
+    loader = MagicMock(return_value={"total": 3})
+
+    assert cache.get_or_load(TASKS, "dash", loader) == {"total": 3}
+    assert cache.get_or_load(TASKS, "dash", loader) == {"total": 3}
+    cache.get_or_load(WEATHER, "logs", lambda: [1, 2])
+    cache.invalidate(TASKS)
+    cache.get_or_load(TASKS, "dash", loader)
+
+    assert loader.call_count == 2
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["entries"] == 2  # weather entry survived the tasks invalidation
+
+def test_entries_expire_after_ttl():
+    now = [0.0]
+    cache = QueryCache(ttl=5, clock=lambda: now[0])
+    cache.get_or_load(TASKS, "dash", lambda: "old")
+    now[0] = 4.9
+    assert cache.get_or_load(TASKS, "dash", lambda: "new") == "old"
+    now[0] = 5.0  # e.g. another process wrote in the meantime
+    assert cache.get_or_load(TASKS, "dash", lambda: "new") == "new"
+    assert cache.stats()["expirations"] == 1 and cache.stats()["entries"] == 1
+
+def test_memory_bound_evicts_lru():
+    cache = QueryCache(max_bytes=300)
+    for i in range(10):
+        cache.get_or_load(TASKS, i, lambda: "x" * 100)
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 300
+    assert stats["evictions"] > 0
+    assert cache.get_or_load(TASKS, 9, lambda: "reloaded") == "x" * 100
+
+def test_load_racing_with_invalidation_is_not_stored():
+    cache = QueryCache()
+    started, release = threading.Event(), threading.Event()
+
+    def slow_loader():
+        started.set()
+        release.wait(2)
+        return "stale"
+
+    t = threading.Thread(target=cache.get_or_load, args=(TASKS, "k", slow_loader))
+    t.start()
+    started.wait(2)
+    cache.invalidate(TASKS)
+    release.set()
+    t.join()
+
+    assert cache.get_or_load(TASKS, "k", lambda: "fresh") == "fresh"
+
+def test_write_paths_invalidate(db):
+    query_cache.invalidate()
+    create_task(db, "A", "Body", "Low", "Todo", None)
+    assert cached_query(TASKS, "n", lambda: 1) == 1
+    task, _ = create_task(db, "B", "Body", "Low", "Todo", None)
+    assert cached_query(TASKS, "n", lambda: 2) == 2
+
+    delete_task(db, task.id)
+    assert cached_query(TASKS, "n", lambda: 3) == 3
+
+    load_logs = lambda: get_recent_weather_logs(db)
+    assert cached_query(WEATHER, "logs", load_logs) == []
+    log_weather(db, "Oslo", "1.0°C", "Snow")
+    assert [row.city for row in cached_query(WEATHER, "logs", load_logs)] == ["Oslo"]
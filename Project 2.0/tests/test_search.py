@@ -0,0 +1,55 @@
+
+from models import Task
+from search import search_tasks, search_clause, tokenize
+
+def _add(db, title, content, summary=None, status="Todo"):
+    task = Task(title=title, content=content, summary=summary, status=status, priority="Medium")
+    db.add(task)
+    db.commit()
+    return task
+
+def test_search_matches_title_content_and_summary(db):
+    _add(db, "Quarterly budget", "Prepare numbers")
+    _add(db, "Team offsite", "Book a venue and budget for catering")
+    _add(db, "Hiring plan", "Interview loop", summary="Needs budget approval")
+    _add(db, "Unrelated", "Nothing to see")
+
+    titles = [row.title for row in search_tasks(db, "budget")]
+
+    assert set(titles) == {"Quarterly budget", "Team offsite", "Hiring plan"}
+    # Title matches are weighted above body matches
+    assert titles[0] == "Quarterly budget"
+
+def test_search_is_prefix_and_all_terms(db):
+    _add(db, "Deploy release", "Roll out the payments service")
+    _add(db, "Deploy docs", "Publish the handbook")
+
+    assert [r.title for r in search_tasks(db, "deploy pay")] == ["Deploy release"]
+
+def test_unindexed_fallback_also_requires_all_terms(db, monkeypatch):
+    monkeypatch.setattr("search._dialect", lambda db: "postgresql")
+    _add(db, "Deploy release", "Roll out the payments service")
+    _add(db, "Deploy docs", "Publish the handbook")
+
+    assert [r.title for r in search_tasks(db, "deploy pay")] == ["Deploy release"]
+
+def test_search_index_follows_updates_and_deletes(db):
+    task = _add(db, "Draft", "placeholder")
+    assert search_tasks(db, "kickoff") == []
+
+    task.summary = "Kickoff meeting notes"
+    db.commit()
+    assert [r.id for r in search_tasks(db, "kickoff")] == [task.id]
+
+    db.delete(task)
+    db.commit()
+    assert search_tasks(db, "kickoff") == []
+
+def test_search_filters_and_operator_input(db):
+    _add(db, "Ship it", "alpha", status="Done")
+    _add(db, "Ship more", "alpha", status="Todo")
+
+    assert [r.title for r in search_tasks(db, "alpha", status=["Todo"])] == ["Ship more"]
+    # FTS syntax characters are treated as plain text, not query operators
+    assert tokenize('alpha" OR (*') == ["alpha", "or"]
+    assert search_clause(db, "  ") is None
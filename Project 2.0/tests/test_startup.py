@@ -0,0 +1,18 @@
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _loaded_after(statement):
+    probe = f"import sys; {statement}; print(' '.join(sys.modules)); import database; print('engine' in vars(database))"
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    modules, engine_created = out.splitlines()[-2:]
+    return set(modules.split()), engine_created == "True"
+
+def test_logic_import_skips_ui_stack_and_engine():
+    modules, engine_created = _loaded_after("import crud")
+
+    assert not {"streamlit", "pandas", "altair", "requests"} & modules
+    assert not engine_created
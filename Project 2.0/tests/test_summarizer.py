@@ -1,5 +1,5 @@
 
-from summarizer import summarize_text
+from summarizer import summarize_text, summarize_many
 
 def test_summary_short_text():
     text = "Short text."
@@ -13,3 +13,22 @@ def test_summary_long_text():
     # Check if logic picks the first sentence
     assert "Sentence one." in result
     assert "AI Generated Summary" in result
+
+def test_summary_picks_most_representative_sentence():
+    text = (
+        "Lunch is at noon today. "
+        "Prepare the budget report for finance. "
+        "The budget report needs revenue figures. "
+        "Parking is closed."
+    )
+    result = summarize_text(text)
+    assert "budget report" in result
+    assert "Parking" not in result
+
+def test_summarize_many_matches_single_calls():
+    texts = [
+        "Deploy the release to staging. Run the smoke tests. Then deploy the release to production.",
+        "Tiny.",
+        "Call the vendor about the invoice. The invoice is overdue. Escalate the invoice if needed.",
+    ]
+    assert summarize_many(texts) == [summarize_text(t) for t in texts]
@@ -0,0 +1,53 @@
+
+from unittest.mock import MagicMock
+import pytest
+import summary_cache
+from cache import LRUCache, SQLiteStore
+from summary_cache import cached_summarize, cached_summarize_many, content_key
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(summary_cache, "summary_cache", LRUCache(maxsize=100))
+
+def test_identical_content_is_summarized_once():
+    summarize = MagicMock(side_effect=lambda text: f"S({text})")
+
+    first = cached_summarize("Clone me.  Weekly report.", summarize)
+    second = cached_summarize("Clone me. Weekly report.\n", summarize)
+
+    assert first == second
+    assert summarize.call_count == 1
+    assert summary_cache.get_summary_cache_stats()["hits"] == 1
+
+def test_line_breaks_are_part_of_the_key():
+    lines = "Fix the login page layout on mobile\nUpdate the billing service dependencies\nWrite release notes"
+    one_line = lines.replace("\n", " ")
+
+    assert content_key(lines) != content_key(one_line)
+    assert content_key(lines) == content_key("  Fix the login  page layout on mobile \r\n\n" + lines.split("\n", 1)[1])
+    assert cached_summarize(lines) != cached_summarize(one_line)  # real summarizer: one sentence vs. the whole text
+
+def test_version_change_invalidates_keys():
+    assert content_key("same text", version="v1") != content_key("same text", version="v2")
+    assert content_key("same text", version="v1").startswith("v1:")
+
+def test_batch_dedupes_and_summarizes_misses_together():
+    cached_summarize("b", str.upper)
+    summarize_batch = MagicMock(side_effect=lambda texts: [t.upper() for t in texts])
+
+    result = cached_summarize_many(["a", "b", "a", "b", "c"], summarize_batch)
+
+    assert result == ["A", "B", "A", "B", "C"]
+    summarize_batch.assert_called_once_with(["a", "c"])
+
+def test_persistent_tier_and_prune(tmp_path, monkeypatch):
+    store = SQLiteStore(str(tmp_path / "summaries.db"), table="summaries")
+    monkeypatch.setattr(summary_cache, "_store", store)
+    monkeypatch.setattr(summary_cache, "summary_cache", LRUCache(maxsize=10, store=store))
+    cached_summarize("persist me", str.upper)
+    store.set("old-version:abc", "stale", None)
+
+    # A fresh in-memory tier still finds the entry on disk
+    monkeypatch.setattr(summary_cache, "summary_cache", LRUCache(maxsize=10, store=store))
+    assert cached_summarize("persist me", MagicMock(side_effect=AssertionError)) == "PERSIST ME"
+    assert summary_cache.prune_stale_summaries() == 1
@@ -0,0 +1,94 @@
+
+from datetime import date, timedelta
+from sqlalchemy.orm import sessionmaker
+from crud import create_task, delete_task
+from models import Task, SummaryJob
+from summary_queue import SummaryWorker, get_queue_stats, get_summary_status, purge_finished_jobs, utcnow
+
+def _worker(db, summarize, **kwargs):
+    kwargs.setdefault("summarize_batch", lambda texts: [summarize(text) for text in texts])
+    return SummaryWorker(sessionmaker(bind=db.get_bind()), summarize=summarize, **kwargs)
+
+def test_deferred_task_is_summarized_by_worker(db):
+    task, error = create_task(db, "Queued", "Long body. Second sentence.", "Low", "Todo", date.today(),
+                              defer_summary=True)
+    assert error is None
+    assert task.summary is None
+    assert get_summary_status(db, task.id) == "pending"
+
+    handled = _worker(db, summarize=lambda text: f"S:{text[:4]}").run_once()
+
+    db.expire_all()
+    assert handled == 1
+    assert db.get(Task, task.id).summary == "S:Long"
+    assert get_queue_stats(db) == {"done": 1}
+
+def test_failed_jobs_retry_then_fail(db):
+    task, _ = create_task(db, "Flaky", "Body", "Low", "Todo", None, defer_summary=True)
+
+    def broken(text):
+        raise RuntimeError("model unavailable")
+
+    worker = _worker(db, summarize=broken, max_attempts=2)
+    worker.run_once()
+    job = db.query(SummaryJob).one()
+    assert (job.status, job.attempts) == ("pending", 1)
+    assert "model unavailable" in job.last_error
+
+    # Skip the backoff delay
+    job.available_at = job.created_at.replace(year=2000)
+    db.commit()
+    worker.run_once()
+
+    db.expire_all()
+    assert db.query(SummaryJob).one().status == "failed"
+    assert worker.failed == 1
+
+def test_batches_and_delete_cleans_up_jobs(db):
+    ids = [create_task(db, f"T{i}", "Body", "Low", "Todo", None, defer_summary=True)[0].id for i in range(5)]
+    delete_task(db, ids[0])
+
+    worker = _worker(db, summarize=str.upper, batch_size=3)
+    assert worker.run_once() == 3
+    assert worker.run_once() == 1
+    assert worker.run_once() == 0
+    assert db.query(SummaryJob).count() == 4
+
+def test_claimed_batch_is_summarized_in_one_call(db):
+    for i in range(3):
+        create_task(db, f"T{i}", f"Body {i}", "Low", "Todo", None, defer_summary=True)
+    batches = []
+
+    def summarize_batch(texts):
+        batches.append(list(texts))
+        return [text.upper() for text in texts]
+
+    assert _worker(db, summarize=None, summarize_batch=summarize_batch).run_once() == 3
+    assert batches == [["Body 0", "Body 1", "Body 2"]]
+    db.expire_all()
+    assert sorted(t.summary for t in db.query(Task)) == ["BODY 0", "BODY 1", "BODY 2"]
+
+def test_failed_batch_falls_back_to_single_jobs(db):
+    for body in ("good", "bad"):
+        create_task(db, body, body, "Low", "Todo", None, defer_summary=True)
+
+    def summarize(text):
+        if text == "bad":
+            raise RuntimeError("cannot summarize")
+        return text.upper()
+
+    worker = _worker(db, summarize=summarize)
+    worker.run_once()
+
+    db.expire_all()
+    assert {j.status for j in db.query(SummaryJob)} == {"done", "pending"}
+    assert db.query(Task).filter(Task.title == "good").one().summary == "GOOD"
+
+def test_purge_deletes_only_old_done_jobs(db):
+    ids = [create_task(db, f"T{i}", "Body", "Low", "Todo", None, defer_summary=True)[0].id for i in range(3)]
+    _worker(db, summarize=str.upper, batch_size=2).run_once()
+
+    assert purge_finished_jobs(db, retention_days=7) == 0
+    assert purge_finished_jobs(db, retention_days=7, now=utcnow() + timedelta(days=8)) == 2
+    assert get_queue_stats(db) == {"pending": 1}
+    assert get_summary_status(db, ids[0]) is None
@@ -0,0 +1,50 @@
+import pickle
+from sqlalchemy import event, inspect
+from models import Task
+from pagination import paginate_tasks
+from task_repository import TaskRow, get_task, list_query, task_query, to_task_rows
+
+def _seed(db):
+    db.add(Task(title="big", content="x" * 10000, summary="s" * 2000, status="Todo", priority="High"))
+    db.commit()
+    db.expunge_all()
+
+def _capture(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+def test_entity_reads_defer_large_columns(db):
+    _seed(db)
+    statements = _capture(db)
+
+    task = get_task(db, 1)
+    assert task.title == "big"
+    assert inspect(task).unloaded == {"content", "summary"}
+    assert "content" not in statements[0]
+
+    assert task_query(db).filter(Task.status == "Todo").count() == 1
+
+def test_full_opt_in_loads_everything_in_one_select(db):
+    _seed(db)
+    statements = _capture(db)
+
+    task = get_task(db, 1, full=True)
+    assert len(task.content) == 10000 and len(task.summary) == 2000
+    assert not inspect(task).unloaded
+    assert len(statements) == 1
+
+def test_list_rows_are_slotted_and_untracked(db):
+    _seed(db)
+    rows = to_task_rows(list_query(db).all())
+
+    assert rows == [TaskRow(1, "big", "Todo", "High", None, rows[0].created_at)]
+    assert not hasattr(rows[0], "__dict__")
+    assert len(db.identity_map) == 0
+    assert pickle.loads(pickle.dumps(rows)) == rows
+    assert set(rows[0]._asdict()) == {"id", "title", "status", "priority", "due_date", "created_at"}
+
+def test_paginate_returns_task_rows(db):
+    _seed(db)
+    page = paginate_tasks(db, page_size=10)
+    assert [type(item) for item in page["items"]] == [TaskRow]
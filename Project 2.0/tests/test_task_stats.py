@@ -0,0 +1,35 @@
+
+from crud import create_task, delete_task
+from models import Task, TaskStat
+from bulk_import import import_tasks
+from task_stats import check_task_stats, get_stat_counts, rebuild_task_stats
+
+def _counts(db):
+    return {(s, p): c for s, p, c in get_stat_counts(db)}
+
+def test_create_and_delete_keep_rollup_in_sync(db):
+    a, _ = create_task(db, "A", "Body", "High", "Todo", None)
+    create_task(db, "B", "Body", "High", "Todo", None)
+    create_task(db, "C", "Body", "Low", "Done", None)
+    assert _counts(db) == {("Todo", "High"): 2, ("Done", "Low"): 1}
+
+    delete_task(db, a.id)
+
+    assert _counts(db) == {("Todo", "High"): 1, ("Done", "Low"): 1}
+    assert check_task_stats(db) == {}
+
+def test_bulk_import_updates_rollup(db):
+    rows = [(i, {"title": f"T{i}", "content": "c", "priority": "Low"}) for i in range(1, 6)]
+    import_tasks(db, rows, chunk_size=2)
+    assert _counts(db) == {("Todo", "Low"): 5}
+
+def test_rebuild_fixes_drift(db):
+    create_task(db, "A", "Body", "Medium", "Todo", None)
+    db.add(Task(title="raw insert", content="c", status="Done", priority="Low"))
+    db.query(TaskStat).filter(TaskStat.status == "Todo").update({TaskStat.count: 7})
+    db.commit()
+
+    drift = rebuild_task_stats(db)
+
+    assert drift == {("Todo", "Medium"): (7, 1), ("Done", "Low"): (0, 1)}
+    assert _counts(db) == {("Todo", "Medium"): 1, ("Done", "Low"): 1}
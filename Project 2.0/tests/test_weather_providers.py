@@ -0,0 +1,177 @@
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import weather_service
+from weather_providers import CircuitBreaker, Provider, ProvidersUnavailable, fetch_weather, fetch_weather_async
+from weather_stub_server import OPEN_METEO, OPENWEATHERMAP, StubWeatherServer
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def _provider(name, result=None, delay=0.0, error=None):
+    calls = []
+
+    def fetch(city, api_key):
+        calls.append(city)
+        time.sleep(delay)
+        if error:
+            raise error
+        return {"temperature": "1°C", "condition": "Clear sky", "source": result or name}
+
+    async def fetch_async(city, api_key):
+        calls.append(city)
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return {"temperature": "1°C", "condition": "Clear sky", "source": result or name}
+
+    provider = Provider(name, fetch, fetch_async)
+    provider.calls = calls
+    return provider
+
+@pytest.fixture
+def stub():
+    weather_service.clear_weather_cache()
+    weather_service.reset_weather_providers()
+    with StubWeatherServer(seed=1) as server, server.patched():
+        yield server
+    weather_service.clear_weather_cache()
+    weather_service.reset_weather_providers()
+
+def test_breaker_opens_then_lets_one_trial_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_after=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow() and not breaker.allow()  # a single half-open trial
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.snapshot() == {"state": "closed", "failures": 0, "trips": 2}
+
+def test_fails_over_and_counts_the_failure():
+    primary = _provider("primary", error=ConnectionError("down"))
+    backup = _provider("backup")
+    assert fetch_weather([primary, backup], "London")["source"] == "backup"
+    assert primary.breaker.failures == 1 and backup.breaker.failures == 0
+
+def test_hedges_a_slow_provider():
+    slow, fast = _provider("slow", delay=0.5), _provider("fast")
+    start = time.perf_counter()
+    assert fetch_weather([slow, fast], "London", budget_ms=2000, hedge_after_ms=50)["source"] == "fast"
+    assert time.perf_counter() - start < 0.4
+
+def test_budget_bounds_the_wait_and_trips_the_breaker():
+    slow = _provider("slow", delay=0.5)
+    slow.breaker.failure_threshold = 1
+    start = time.perf_counter()
+    with pytest.raises(ProvidersUnavailable):
+        fetch_weather([slow], "London", budget_ms=100)
+    assert time.perf_counter() - start < 0.4
+    assert slow.breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(ProvidersUnavailable, match="circuit open"):
+        fetch_weather([slow], "London")
+    assert len(slow.calls) == 1
+
+def test_slow_primary_under_load_fails_over_instead_of_out():
+    slow, backup = _provider("slow", delay=0.6), _provider("backup", delay=0.01)
+    lookups = slow.workers * 2  # more concurrent lookups than one provider has workers
+
+    with ThreadPoolExecutor(lookups) as callers:
+        results = list(callers.map(
+            lambda i: fetch_weather([slow, backup], f"City {i}", budget_ms=400, hedge_after_ms=50), range(lookups)
+        ))
+    assert {r["source"] for r in results} == {"backup"}
+    assert backup.breaker.snapshot() == {"state": "closed", "failures": 0, "trips": 0}
+
+    slow._executor.shutdown(wait=True)
+    assert len(slow.calls) == slow.workers  # queued attempts were cancelled, not run
+    assert slow.breaker.state == CircuitBreaker.OPEN  # answers after the budget count as failures
+
+def test_unknown_city_is_an_answer_not_an_outage():
+    primary, backup = _provider("primary", error=ValueError("City 'Atlantis' not found.")), _provider("backup")
+    with pytest.raises(ValueError):
+        fetch_weather([primary, backup], "Atlantis")
+    assert primary.breaker.failures == 0 and not backup.calls
+
+def test_async_hedge_cancels_the_loser():
+    slow, fast = _provider("slow", delay=1.0), _provider("fast")
+    result = asyncio.run(fetch_weather_async([slow, fast], "London", budget_ms=2000, hedge_after_ms=50))
+    assert result["source"] == "fast"
+    assert slow.breaker.state == CircuitBreaker.CLOSED and slow.breaker.failures == 0
+
+def test_stub_failover_to_open_meteo(stub):
+    stub.configure(OPENWEATHERMAP, failure_rate=1.0, status=501)
+    data = weather_service.get_weather("London", api_key="key")
+    assert data["source"] == "Open-Meteo"
+    assert weather_service.get_weather_provider_stats()["OpenWeatherMap"]["failures"] == 1
+
+def test_stub_slow_provider_is_hedged(stub, monkeypatch):
+    monkeypatch.setattr("weather_providers.WEATHER_HEDGE_AFTER_MS", 100)
+    stub.configure(OPENWEATHERMAP, latency_ms=1500)
+    start = time.perf_counter()
+    assert weather_service.get_weather("Oslo", api_key="key")["source"] == "Open-Meteo"
+    assert time.perf_counter() - start < 1.0
+
+def test_stub_outage_serves_last_known_value(stub, monkeypatch):
+    monkeypatch.setattr(weather_service.OPEN_METEO.breaker, "failure_threshold", 1)
+    fresh = weather_service.get_weather("London")
+    stub.configure(OPEN_METEO, failure_rate=1.0, status=501)
+    weather_service.current_weather_cache.clear()
+
+    stale = weather_service.get_weather("London")
+    assert stale["stale"] is True and stale["as_of"]
+    assert {k: stale[k] for k in fresh} == fresh
+
+    served = stub.requests[OPEN_METEO]
+    assert weather_service.get_weather("London")["stale"]  # breaker open: no request at all
+    assert stub.requests[OPEN_METEO] == served
+    with pytest.raises(ProvidersUnavailable):
+        weather_service.get_weather("Paris")
+
+def test_stub_batch_respects_breakers_and_falls_back(stub, monkeypatch):
+    monkeypatch.setattr(weather_service.OPEN_METEO.breaker, "failure_threshold", 1)
+    weather_service.get_weather_many(["London", "Oslo"])
+    weather_service.current_weather_cache.clear()
+    stub.configure(OPEN_METEO, failure_rate=1.0, status=501)
+
+    results = weather_service.get_weather_many(["London", "Paris"])
+    assert results["London"][0]["stale"] is True
+    assert results["Paris"][0] is None and "circuit open" in results["Paris"][1]
+    assert weather_service.get_weather_provider_stats()["Open-Meteo"]["state"] == "open"
+
+    served = stub.requests[OPEN_METEO]
+    assert weather_service.get_weather_many(["Oslo"])["Oslo"][0]["stale"]  # breaker open: no request at all
+    assert stub.requests[OPEN_METEO] == served
+
+def test_stub_batch_with_key_fails_over_per_city(stub):
+    stub.configure(OPENWEATHERMAP, failure_rate=1.0, status=501)
+    results = weather_service.get_weather_many(["London", "Paris"], api_key="key")
+    assert {data["source"] for data, _ in results.values()} == {"Open-Meteo"}
+    assert weather_service.get_weather_provider_stats()["OpenWeatherMap"]["failures"] == 2
+
+def test_stub_rejected_key_fails_the_whole_batch(stub):
+    with pytest.raises(weather_service.InvalidAPIKey):
+        weather_service.get_weather_many(["London", "Paris"], api_key="invalid")
+    assert weather_service.get_weather_provider_stats()["OpenWeatherMap"]["failures"] == 0
+
+def test_stub_async_lookup_uses_the_same_fallbacks(stub):
+    stub.configure(OPENWEATHERMAP, failure_rate=1.0, status=501)
+    data = asyncio.run(weather_service.get_weather_async("London", api_key="key"))
+    assert data["source"] == "Open-Meteo"
+    with pytest.raises(ValueError):
+        asyncio.run(weather_service.get_weather_async("Atlantis"))
@@ -0,0 +1,60 @@
+
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from models import WeatherLog, WeatherRollup
+from weather_rollups import (
+    parse_temperature, apply_weather_samples, get_weather_history, prune_hourly_rollups, prune_weather,
+    rebuild_weather_rollups,
+)
+from weather_service import log_weather
+
+@pytest.mark.parametrize("text, expected", [
+    ("12.3°C", 12.3), ("-4°C", -4.0), ("212°F", 100.0), ("None°C", None), ("", None),
+])
+def test_parse_temperature(text, expected):
+    assert parse_temperature(text) == expected
+
+def test_samples_fold_into_hour_and_day_buckets(db):
+    apply_weather_samples(db, [
+        ("Oslo", 1.0, datetime(2024, 1, 1, 9, 5)),
+        ("Oslo", 3.0, datetime(2024, 1, 1, 9, 55)),
+    ])
+    apply_weather_samples(db, [("Oslo", -1.0, datetime(2024, 1, 1, 14, 0)), ("Rome", 15.0, datetime(2024, 1, 1, 9, 0))])
+    db.commit()
+
+    hours = get_weather_history(db, "Oslo", "hour")
+    assert [(h.bucket_start.hour, h.samples, h.temp_avg) for h in hours] == [(9, 2, 2.0), (14, 1, -1.0)]
+    (day,) = get_weather_history(db, "Oslo", "day")
+    assert (day.samples, day.temp_min, day.temp_max, day.temp_avg) == (3, -1.0, 3.0, 1.0)
+
+def test_log_weather_stores_numeric_temperature_and_rollup(db):
+    log = log_weather(db, "Oslo", "4.5°C", "Clear")
+
+    assert log.temperature_c == 4.5
+    assert db.query(WeatherRollup).filter(WeatherRollup.city == "Oslo").count() == 2
+
+def test_prune_keeps_rollups_and_recent_rows(db):
+    now = datetime(2024, 6, 1, 12)
+    db.add_all([
+        WeatherLog(city="Oslo", temperature="1°C", temperature_c=1.0, condition="Fog", timestamp=datetime(2023, 1, 1)),
+        WeatherLog(city="Oslo", temperature="9°C", temperature_c=9.0, condition="Sun", timestamp=datetime(2024, 5, 30)),
+    ])
+    db.flush()
+    rebuild_weather_rollups(db)
+
+    deleted = prune_weather(db, retention_days=30, hourly_retention_days=90, now=now)
+
+    assert deleted == {"raw": 1, "hourly": 1}
+    assert db.query(WeatherLog).count() == 1
+    assert len(get_weather_history(db, "Oslo", "day")) == 2
+    assert len(get_weather_history(db, "Oslo", "hour")) == 1
+
+def test_hourly_rollups_are_pruned_in_chunks(db):
+    apply_weather_samples(db, [(city, 1.0, datetime(2024, 1, 1, hour)) for city in ("Oslo", "Rome") for hour in range(5)])
+    db.commit()
+    with patch.object(db, "commit", wraps=db.commit) as commit:
+        assert prune_hourly_rollups(db, datetime(2024, 1, 1, 4), chunk_size=3) == 8
+    assert commit.call_count == 3  # 3 + 3 + 2 rows, one transaction each
+    assert [h.bucket_start.hour for h in get_weather_history(db, "Rome", "hour")] == [4]
+    assert len(get_weather_history(db, "Oslo", "day")) == 1
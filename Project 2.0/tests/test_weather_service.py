@@ -0,0 +1,122 @@
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+import weather_service
+from weather_service import get_weather, get_weather_cache_stats
+
+def _response(payload, status_code=200):
+    res = MagicMock()
+    res.status_code = status_code
+    res.json.return_value = payload
+    return res
+
+GEO = {"results": [{"latitude": 51.5, "longitude": -0.12}]}
+FORECAST = {"current_weather": {"temperature": 12.3, "weathercode": 0}}
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    weather_service.clear_weather_cache()
+    weather_service.reset_weather_providers()
+    yield
+    weather_service.clear_weather_cache()
+
+def test_openmeteo_repeat_lookup_is_cached():
+    hits = get_weather_cache_stats()["geocode"]["hits"]
+    with patch("weather_service.http_get", side_effect=[_response(GEO), _response(FORECAST)]) as get:
+        first = get_weather("London")
+        second = get_weather("  london ")
+
+    assert first == second == {"temperature": "12.3°C", "condition": "Clear sky", "source": "Open-Meteo"}
+    assert get.call_count == 2
+    assert get_weather_cache_stats()["geocode"]["hits"] == hits + 1
+
+def test_expired_conditions_refetch_forecast_only():
+    with patch("weather_service.http_get", side_effect=[_response(GEO), _response(FORECAST), _response(FORECAST)]) as get:
+        get_weather("London")
+        weather_service.current_weather_cache.clear()
+        get_weather("London")
+
+    urls = [call.args[0] for call in get.call_args_list]
+    assert sum("geocoding-api" in url for url in urls) == 1
+    assert sum("/v1/forecast" in url for url in urls) == 2
+
+def test_unknown_city_is_not_cached():
+    with patch("weather_service.http_get", return_value=_response({})) as get:
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                get_weather("Atlantis")
+    assert get.call_count == 2
+
+def test_openweathermap_is_cached():
+    payload = {"main": {"temp": 20.0}, "weather": [{"description": "light rain"}]}
+    with patch("weather_service.http_get", return_value=_response(payload)) as get:
+        get_weather("Paris", api_key="key")
+        data = get_weather("Paris", api_key="key")
+
+    assert data["condition"] == "Light rain"
+    assert get.call_count == 1
+
+def _fake_http(geo_by_city, forecast_for):
+    def fake_get(url, params=None, timeout=5):
+        if url == weather_service.GEOCODING_URL:
+            coords = geo_by_city.get(params["name"])
+            return _response({"results": [{"latitude": coords[0], "longitude": coords[1]}]} if coords else {})
+        lats = str(params["latitude"]).split(",")
+        body = [forecast_for(float(lat)) for lat in lats]
+        return _response(body if len(body) > 1 else body[0])
+    return fake_get
+
+def test_get_weather_many_batches_forecasts_and_reports_partial_failures():
+    geo = {"London": (51.5, -0.12), "Paris": (48.85, 2.35), "Oslo": (59.9, 10.7)}
+    forecast = lambda lat: {"current_weather": {"temperature": lat, "weathercode": 61}}
+
+    with patch("weather_service.http_get", side_effect=_fake_http(geo, forecast)) as get:
+        results = weather_service.get_weather_many(["London", "Paris", "Atlantis", "Oslo", "London"])
+
+    assert list(results) == ["London", "Paris", "Atlantis", "Oslo"]
+    assert results["Paris"] == ({"temperature": "48.85°C", "condition": "Rain", "source": "Open-Meteo"}, None)
+    assert results["Atlantis"][0] is None and "not found" in results["Atlantis"][1]
+    forecast_calls = [c for c in get.call_args_list if c.args[0] == weather_service.FORECAST_URL]
+    assert len(forecast_calls) == 1  # one round-trip for all found cities
+
+def test_get_weather_many_uses_cache():
+    geo = {"London": (51.5, -0.12)}
+    forecast = lambda lat: {"current_weather": {"temperature": 10, "weathercode": 0}}
+    with patch("weather_service.http_get", side_effect=_fake_http(geo, forecast)) as get:
+        weather_service.get_weather_many(["London"])
+        results = weather_service.get_weather_many(["London"])
+
+    assert results["London"][1] is None
+    assert get.call_count == 2
+
+def test_get_weather_many_failed_batch_counts_against_the_breaker():
+    geo = {"London": (51.5, -0.12)}
+
+    def down(lat):
+        raise ConnectionError("forecast down")
+
+    with patch("weather_service.http_get", side_effect=_fake_http(geo, down)):
+        results = weather_service.get_weather_many(["London"])
+
+    assert results["London"][0] is None and "forecast down" in results["London"][1]
+    # The batch and the single-city retry each count
+    assert weather_service.get_weather_provider_stats()["Open-Meteo"]["failures"] == 2
+
+def test_async_lookup_shares_caches_with_sync():
+    with patch("weather_service.http_get_async", AsyncMock(side_effect=[_response(GEO), _response(FORECAST)])) as get:
+        first = asyncio.run(weather_service.get_weather_async("London"))
+    assert get.await_count == 2
+    with patch("weather_service.http_get") as sync_get:
+        assert get_weather("London") == first
+    assert not sync_get.called
+
+def test_shared_async_client_is_closed_per_loop():
+    async def scenario():
+        client = weather_service.get_async_http_client()
+        assert weather_service.get_async_http_client() is client
+        await weather_service.close_async_http_client()
+        assert client.is_closed and weather_service.get_async_http_client() is not client
+        await weather_service.close_async_http_client()
+
+    asyncio.run(scenario())
@@ -0,0 +1,279 @@
+
+"""
+Failover between interchangeable weather providers.
+
+Each Provider wraps one upstream behind its own CircuitBreaker. A lookup asks
+the preferred provider first; if it fails, or has not answered within
+WEATHER_HEDGE_AFTER_MS, the next provider is asked as well and the first good
+answer wins. The caller never waits longer than WEATHER_LATENCY_BUDGET_MS:
+after that the lookup fails with ProvidersUnavailable, and the slow attempt
+counts against its provider's breaker, as does a losing hedge that only
+answers after the budget. Each provider runs its attempts on its own pool of
+WEATHER_PROVIDER_WORKERS threads, so a slow upstream cannot starve the
+backup of workers; attempts still queued when a lookup ends are cancelled
+and do not count. Providers whose breaker is open are
+skipped without a network call until WEATHER_BREAKER_RESET_SECONDS have
+passed, when a single trial request is let through.
+
+ValueError (unknown city, bad API key) is an answer rather than an outage:
+it is raised as is and does not count against the breaker.
+
+    providers = [Provider("Open-Meteo", fetch_openmeteo), Provider("OpenWeatherMap", fetch_owm, requires_key=True)]
+    data = fetch_weather(providers, "London")
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+WEATHER_LATENCY_BUDGET_MS = float(os.getenv("WEATHER_LATENCY_BUDGET_MS", "3000"))
+WEATHER_HEDGE_AFTER_MS = float(os.getenv("WEATHER_HEDGE_AFTER_MS", "1000"))
+WEATHER_BREAKER_FAILURES = int(os.getenv("WEATHER_BREAKER_FAILURES", "3"))
+WEATHER_BREAKER_RESET_SECONDS = float(os.getenv("WEATHER_BREAKER_RESET_SECONDS", "30"))
+WEATHER_PROVIDER_WORKERS = int(os.getenv("WEATHER_PROVIDER_WORKERS", "8"))
+
+class ProvidersUnavailable(RuntimeError):
+    """No provider produced an answer within the latency budget."""
+
+class CircuitBreaker:
+    """
+    Thread-safe closed / open / half-open breaker. Opens after
+    `failure_threshold` consecutive failures; after `reset_after` seconds one
+    trial call is allowed, which closes it again on success or re-opens it.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = WEATHER_BREAKER_FAILURES,
+                 reset_after: float = WEATHER_BREAKER_RESET_SECONDS, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self.trips = 0
+            self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only one at a time."""
+        with self._lock:
+            if self.state == self.OPEN and self._clock() - self.opened_at >= self.reset_after:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = self._clock()
+
+    def release(self):
+        """Gives back a half-open trial whose outcome is unknown (a cancelled call)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            return {"state": self.state, "failures": self.failures, "trips": self.trips}
+
+class Provider:
+    """
+    One upstream: `fetch(city, api_key)` and optionally an awaitable
+    `fetch_async(city, api_key)`, both returning the usual weather dict.
+    """
+
+    def __init__(self, name: str, fetch, fetch_async=None, requires_key: bool = False, breaker: CircuitBreaker = None,
+                 workers: int = WEATHER_PROVIDER_WORKERS):
+        self.name = name
+        self.fetch = fetch
+        self.fetch_async = fetch_async
+        self.requires_key = requires_key
+        self.breaker = breaker or CircuitBreaker()
+        self.workers = workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def usable(self, api_key: str = None) -> bool:
+        return bool(api_key) or not self.requires_key
+
+    def submit(self, city: str, api_key: str = None):
+        """Starts `fetch` on this provider's own worker pool; returns the Future."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix=f"weather-{self.name}")
+        return self._executor.submit(self.fetch, city, api_key)
+
+    def __repr__(self):
+        return f"Provider({self.name!r}, {self.breaker.state})"
+
+def _settle(provider: Provider, future, errors: list):
+    """
+    Records a finished attempt on the provider's breaker. Returns
+    (True, result) on success and (False, None) on failure; re-raises ValueError.
+    """
+    try:
+        result = future.result()
+    except ValueError:
+        provider.breaker.record_success()  # the upstream answered; the question was bad
+        raise
+    except Exception as e:
+        provider.breaker.record_failure()
+        errors.append(f"{provider.name}: {str(e) or type(e).__name__}")
+        return False, None
+    provider.breaker.record_success()
+    return True, result
+
+def _settle_late(provider: Provider, future, deadline: float):
+    """Done-callback for an abandoned attempt: past the budget it counts as a failure, whatever it returned."""
+    if time.monotonic() > deadline:
+        provider.breaker.record_failure()
+        return
+    try:
+        _settle(provider, future, [])
+    except ValueError:
+        pass
+
+def _next_allowed(pending: list, errors: list):
+    """Pops the next provider whose breaker lets a call through."""
+    while pending:
+        provider = pending.pop(0)
+        if provider.breaker.allow():
+            return provider
+        errors.append(f"{provider.name}: circuit open")
+    return None
+
+def _unavailable(errors: list, budget_ms: float, timed_out: list):
+    for provider in timed_out:
+        provider.breaker.record_failure()
+        errors.append(f"{provider.name}: no answer within {budget_ms:.0f} ms")
+    return ProvidersUnavailable("All weather providers failed (" + "; ".join(errors or ["none usable"]) + ").")
+
+def _limits(budget_ms, hedge_after_ms):
+    return (WEATHER_LATENCY_BUDGET_MS if budget_ms is None else budget_ms,
+            WEATHER_HEDGE_AFTER_MS if hedge_after_ms is None else hedge_after_ms)
+
+def fetch_weather(providers, city: str, api_key: str = None, budget_ms: float = None,
+                  hedge_after_ms: float = None):
+    """
+    First good answer from `providers` (in order of preference), hedging to
+    the next one after `hedge_after_ms` and giving up after `budget_ms`
+    (defaults: WEATHER_HEDGE_AFTER_MS, WEATHER_LATENCY_BUDGET_MS).
+    Attempts run on each provider's worker pool. One that already started
+    keeps its thread until its own HTTP timeout when abandoned; its answer
+    still fills the provider's caches, but counts as a failure if it came
+    after the budget.
+    """
+    budget_ms, hedge_after_ms = _limits(budget_ms, hedge_after_ms)
+    pending = [p for p in providers if p.usable(api_key)]
+    errors = []
+    running = {}  # future -> provider
+    deadline = time.monotonic() + budget_ms / 1000
+
+    def launch():
+        provider = _next_allowed(pending, errors)
+        if provider:
+            running[provider.submit(city, api_key)] = provider
+
+    def cancel_queued():
+        """Cancels attempts that never got a worker; they say nothing about their provider."""
+        for future, provider in list(running.items()):
+            if future.cancel():
+                provider.breaker.release()
+                del running[future]
+
+    def abandon():
+        # Losing hedges still report to their breaker when they finish
+        cancel_queued()
+        for future, provider in running.items():
+            future.add_done_callback(lambda f, p=provider: _settle_late(p, f, deadline))
+
+    launch()
+    try:
+        while running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                cancel_queued()
+                timed_out = list(running.values())
+                running.clear()
+                raise _unavailable(errors, budget_ms, timed_out)
+            timeout = min(remaining, hedge_after_ms / 1000) if pending else remaining
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()  # hedge: the current attempts keep running
+                continue
+            for future in done:
+                ok, result = _settle(running.pop(future), future, errors)
+                if ok:
+                    return result
+            if not running:
+                launch()  # failover
+        raise _unavailable(errors, budget_ms, [])
+    finally:
+        abandon()
+
+async def fetch_weather_async(providers, city: str, api_key: str = None, budget_ms: float = None,
+                              hedge_after_ms: float = None):
+    """
+    Async fetch_weather over `Provider.fetch_async`; attempts are tasks on
+    the running loop, so losing or timed-out ones are simply cancelled.
+    """
+    budget_ms, hedge_after_ms = _limits(budget_ms, hedge_after_ms)
+    loop = asyncio.get_running_loop()
+    pending = [p for p in providers if p.usable(api_key) and p.fetch_async]
+    errors = []
+    running = {}  # task -> provider
+    deadline = loop.time() + budget_ms / 1000
+
+    def launch():
+        provider = _next_allowed(pending, errors)
+        if provider:
+            running[asyncio.ensure_future(provider.fetch_async(city, api_key))] = provider
+
+    launch()
+    try:
+        while running:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                timed_out = list(running.values())
+                for task in running:
+                    task.cancel()
+                running.clear()
+                raise _unavailable(errors, budget_ms, timed_out)
+            timeout = min(remaining, hedge_after_ms / 1000) if pending else remaining
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for task in done:
+                ok, result = _settle(running.pop(task), task, errors)
+                if ok:
+                    return result
+            if not running:
+                launch()
+        raise _unavailable(errors, budget_ms, [])
+    finally:
+        for task, provider in running.items():
+            task.cancel()
+            provider.breaker.release()
@@ -0,0 +1,195 @@
+
+"""
+Hourly and daily per-city temperature rollups, plus raw log retention.
+
+`log_weather` adds each sample to its hour and day buckets in the same
+transaction as the raw row, so history charts read a few compact rows per
+city instead of scanning and parsing `weather_logs`. Raw rows older than
+WEATHER_RETENTION_DAYS and hourly buckets older than
+WEATHER_HOURLY_RETENTION_DAYS are pruned in batches; daily buckets are kept.
+Deleting raw rows never changes the rollups.
+
+    python weather_rollups.py --prune     # apply the retention policy
+    python weather_rollups.py --rebuild   # recompute rollups from the raw rows still kept
+"""
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+from models import WeatherLog, WeatherRollup
+from bulk_ops import BULK_CHUNK_SIZE, bulk_delete_weather_logs
+from query_cache import WEATHER, invalidate
+
+WEATHER_RETENTION_DAYS = int(os.getenv("WEATHER_RETENTION_DAYS", "30"))
+WEATHER_HOURLY_RETENTION_DAYS = int(os.getenv("WEATHER_HOURLY_RETENTION_DAYS", "365"))
+
+HOUR, DAY = "hour", "day"
+PERIODS = (HOUR, DAY)
+
+TEMPERATURE_RE = re.compile(r"(-?\d+(?:\.\d+)?)\s*°?\s*([CF])?", re.IGNORECASE)
+
+def parse_temperature(text):
+    """Degrees Celsius from display text like "12.3°C" or "54°F"; None if it has no number."""
+    found = TEMPERATURE_RE.search(text or "")
+    if not found:
+        return None
+    value = float(found.group(1))
+    if (found.group(2) or "C").upper() == "F":
+        value = (value - 32) * 5 / 9
+    return round(value, 2)
+
+def bucket_start(timestamp: datetime, period: str) -> datetime:
+    timestamp = timestamp.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+    return timestamp.replace(hour=0) if period == DAY else timestamp
+
+def aggregate_samples(samples):
+    """{(city, period, bucket_start): [samples, sum, min, max]} for (city, temperature_c, timestamp) tuples."""
+    buckets = {}
+    for city, temperature_c, timestamp in samples:
+        if temperature_c is None or timestamp is None:
+            continue
+        for period in PERIODS:
+            key = (city, period, bucket_start(timestamp, period))
+            agg = buckets.get(key)
+            if agg is None:
+                buckets[key] = [1, temperature_c, temperature_c, temperature_c]
+            else:
+                agg[0] += 1
+                agg[1] += temperature_c
+                agg[2] = min(agg[2], temperature_c)
+                agg[3] = max(agg[3], temperature_c)
+    return buckets
+
+def apply_weather_samples(db: Session, samples):
+    """
+    Folds (city, temperature_c, timestamp) samples into the rollups in the
+    caller's transaction. Uses a native upsert where the backend has one.
+    """
+    buckets = aggregate_samples(samples)
+    if not buckets:
+        return
+    rows = [
+        {"city": city, "period": period, "bucket_start": start,
+         "samples": n, "temp_sum": total, "temp_min": low, "temp_max": high}
+        for (city, period, start), (n, total, low, high) in buckets.items()
+    ]
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(WeatherRollup)
+        db.execute(stmt.on_duplicate_key_update(
+            samples=WeatherRollup.samples + stmt.inserted.samples,
+            temp_sum=WeatherRollup.temp_sum + stmt.inserted.temp_sum,
+            temp_min=func.least(WeatherRollup.temp_min, stmt.inserted.temp_min),
+            temp_max=func.greatest(WeatherRollup.temp_max, stmt.inserted.temp_max),
+        ), rows)
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(WeatherRollup)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[WeatherRollup.city, WeatherRollup.period, WeatherRollup.bucket_start],
+            set_={
+                "samples": WeatherRollup.samples + stmt.excluded.samples,
+                "temp_sum": WeatherRollup.temp_sum + stmt.excluded.temp_sum,
+                # Two-argument min()/max() are scalar functions in SQLite
+                "temp_min": func.min(WeatherRollup.temp_min, stmt.excluded.temp_min),
+                "temp_max": func.max(WeatherRollup.temp_max, stmt.excluded.temp_max),
+            },
+        ), rows)
+    else:
+        for row in rows:
+            existing = db.get(WeatherRollup, (row["city"], row["period"], row["bucket_start"]))
+            if existing is None:
+                db.add(WeatherRollup(**row))
+            else:
+                existing.samples += row["samples"]
+                existing.temp_sum += row["temp_sum"]
+                existing.temp_min = min(existing.temp_min, row["temp_min"])
+                existing.temp_max = max(existing.temp_max, row["temp_max"])
+
+def get_weather_history(db: Session, city: str, period: str = HOUR, since: datetime = None):
+    """(bucket_start, samples, temp_avg, temp_min, temp_max) rows for one city, oldest first."""
+    query = db.query(
+        WeatherRollup.bucket_start,
+        WeatherRollup.samples,
+        (WeatherRollup.temp_sum / WeatherRollup.samples).label("temp_avg"),
+        WeatherRollup.temp_min,
+        WeatherRollup.temp_max,
+    ).filter(WeatherRollup.city == city, WeatherRollup.period == period)
+    if since is not None:
+        query = query.filter(WeatherRollup.bucket_start >= bucket_start(since, period))
+    return query.order_by(WeatherRollup.bucket_start).all()
+
+def get_rollup_cities(db: Session):
+    return [city for (city,) in db.query(WeatherRollup.city).filter(WeatherRollup.period == DAY).distinct()]
+
+def rollup_raw_logs(db: Session, chunk_size: int = BULK_CHUNK_SIZE):
+    """Replaces every rollup with one recomputed from `weather_logs` (caller commits)."""
+    db.query(WeatherRollup).delete(synchronize_session=False)
+    rows = (
+        db.query(WeatherLog.city, WeatherLog.temperature_c, WeatherLog.timestamp)
+        .filter(WeatherLog.temperature_c.isnot(None))
+        .execution_options(yield_per=chunk_size)
+    )
+    apply_weather_samples(db, rows)
+
+def rebuild_weather_rollups(db: Session):
+    """
+    Recomputes the rollups from the raw rows that are still kept. History
+    older than the raw retention window is lost, so use it only to repair.
+    """
+    rollup_raw_logs(db)
+    db.commit()
+    invalidate(WEATHER)
+
+def prune_weather(db: Session, retention_days: int = WEATHER_RETENTION_DAYS,
+                  hourly_retention_days: int = WEATHER_HOURLY_RETENTION_DAYS,
+                  chunk_size: int = BULK_CHUNK_SIZE, now: datetime = None):
+    """Applies the retention policy. Returns {"raw": n, "hourly": m} rows deleted."""
+    now = now or datetime.now()
+    raw = bulk_delete_weather_logs(db, chunk_size=chunk_size, before=now - timedelta(days=retention_days))
+    hourly = prune_hourly_rollups(db, bucket_start(now - timedelta(days=hourly_retention_days), HOUR), chunk_size)
+    return {"raw": raw, "hourly": hourly}
+
+def prune_hourly_rollups(db: Session, before: datetime, chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    """Deletes hourly buckets starting before `before`, `chunk_size` rows per transaction. Returns the count."""
+    key = tuple_(WeatherRollup.city, WeatherRollup.bucket_start)
+    deleted = 0
+    try:
+        while True:
+            rows = (
+                db.query(WeatherRollup.city, WeatherRollup.bucket_start)
+                .filter(WeatherRollup.period == HOUR, WeatherRollup.bucket_start < before)
+                .order_by(WeatherRollup.bucket_start, WeatherRollup.city)
+                .limit(chunk_size)
+                .with_for_update()
+                .all()
+            )
+            if not rows:
+                break
+            deleted += (
+                db.query(WeatherRollup)
+                .filter(WeatherRollup.period == HOUR, key.in_([tuple(row) for row in rows]))
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            invalidate(WEATHER)
+    except Exception:
+        db.rollback()
+        raise
+    return deleted
+
+if __name__ == "__main__":
+    from database import session_scope
+    with session_scope() as db:
+        if "--rebuild" in sys.argv:
+            rebuild_weather_rollups(db)
+            print("Rebuilt weather rollups.")
+        elif "--prune" in sys.argv:
+            deleted = prune_weather(db)
+            print(f"Pruned {deleted['raw']} raw log(s) and {deleted['hourly']} hourly bucket(s).")
+        else:
+            print(__doc__)
@@ -1,102 +1,482 @@
 
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from sqlalchemy.orm import Session
 from models import WeatherLog
+from cache import LRUCache, SQLiteStore
+from query_cache import WEATHER, invalidate
+from instrumentation import observe_http
+from weather_rollups import apply_weather_samples, parse_temperature
+from weather_providers import Provider, ProvidersUnavailable, fetch_weather, fetch_weather_async
+
+# Overridable so tests, benchmarks or a staging setup can point at weather_stub_server
+GEOCODING_URL = os.getenv("WEATHER_GEOCODING_URL", "https://geocoding-api.open-meteo.com/v1/search")
+FORECAST_URL = os.getenv("WEATHER_FORECAST_URL", "https://api.open-meteo.com/v1/forecast")
+OPENWEATHERMAP_URL = os.getenv("WEATHER_OPENWEATHERMAP_URL", "http://api.openweathermap.org/data/2.5/weather")
+
+# --- HTTP ---
+# One keep-alive session per process so repeated calls reuse TCP/TLS connections.
+WEATHER_MAX_PER_HOST = int(os.getenv("WEATHER_MAX_PER_HOST", "4"))
+WEATHER_MAX_WORKERS = int(os.getenv("WEATHER_MAX_WORKERS", "8"))
+WEATHER_RETRIES = int(os.getenv("WEATHER_RETRIES", "2"))
+WEATHER_HTTP_TIMEOUT = float(os.getenv("WEATHER_HTTP_TIMEOUT", "5"))
+FORECAST_BATCH_SIZE = 50  # coordinates per multi-location forecast request
+
+_http_session = None
+_http_lock = threading.Lock()
+_host_limits = {}
+
+def get_http_session() -> requests.Session:
+    """Shared requests.Session with connection pooling and retry/backoff."""
+    global _http_session
+    with _http_lock:
+        if _http_session is None:
+            retry = Retry(
+                total=WEATHER_RETRIES, backoff_factor=0.3,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET",), raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=WEATHER_MAX_WORKERS, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+def _host_semaphore(url: str):
+    host = urlsplit(url).netloc
+    with _http_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(WEATHER_MAX_PER_HOST)
+        return _host_limits[host]
+
+def http_get(url: str, params: dict = None, timeout: float = WEATHER_HTTP_TIMEOUT):
+    """GET through the shared session, limited to WEATHER_MAX_PER_HOST concurrent calls per host."""
+    host = urlsplit(url).netloc
+    with _host_semaphore(url):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = get_http_session().get(url, params=params, timeout=timeout)
+            status = response.status_code
+            return response
+        finally:
+            observe_http(host, status, time.perf_counter() - start)
+
+class InvalidAPIKey(ValueError):
+    """The provider rejected the API key: a problem with the request, not with one city."""
+
+def _check_upstream(res, provider: str):
+    """Treats throttling and server errors (after retries) as the provider being down."""
+    if res.status_code == 429 or res.status_code >= 500:
+        raise ConnectionError(f"{provider} unavailable (HTTP {res.status_code}).")
+
+# --- CACHES ---
+# City coordinates practically never change; current conditions go stale quickly.
+GEOCODE_TTL = int(os.getenv("WEATHER_GEOCODE_TTL", str(30 * 24 * 3600)))
+CURRENT_WEATHER_TTL = int(os.getenv("WEATHER_CURRENT_TTL", "600"))
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "1024"))
+WEATHER_CACHE_PATH = os.getenv("WEATHER_CACHE_PATH")  # optional on-disk persistence
+# Served, marked stale, when every provider is down
+WEATHER_LAST_KNOWN_TTL = int(os.getenv("WEATHER_LAST_KNOWN_TTL", str(24 * 3600)))
+
+geocode_cache = LRUCache(
+    maxsize=WEATHER_CACHE_SIZE, ttl=GEOCODE_TTL,
+    store=SQLiteStore(WEATHER_CACHE_PATH, table="geocode") if WEATHER_CACHE_PATH else None,
+)
+current_weather_cache = LRUCache(
+    maxsize=WEATHER_CACHE_SIZE, ttl=CURRENT_WEATHER_TTL,
+    store=SQLiteStore(WEATHER_CACHE_PATH, table="current_weather") if WEATHER_CACHE_PATH else None,
+)
+last_known_cache = LRUCache(
+    maxsize=WEATHER_CACHE_SIZE, ttl=WEATHER_LAST_KNOWN_TTL,
+    store=SQLiteStore(WEATHER_CACHE_PATH, table="last_known_weather") if WEATHER_CACHE_PATH else None,
+)
+
+def _city_key(city: str) -> str:
+    return " ".join(city.split()).lower()
+
+def get_weather_cache_stats():
+    """Hit/miss counters for the geocoding, current-conditions and last-known caches."""
+    return {"geocode": geocode_cache.stats(), "current_weather": current_weather_cache.stats(),
+            "last_known": last_known_cache.stats()}
+
+def clear_weather_cache():
+    geocode_cache.clear()
+    current_weather_cache.clear()
+    last_known_cache.clear()
+
+def geocode_city(city: str):
+    """
+    Resolves a city name to (latitude, longitude) via Open-Meteo geocoding.
+    Results are cached for WEATHER_GEOCODE_TTL seconds.
+    """
+    key = _city_key(city)
+    cached = geocode_cache.get(key)
+    if cached is not None:
+        return tuple(cached)
+
+    geo_res = http_get(GEOCODING_URL, params=_geocode_params(city))
+    _check_upstream(geo_res, "Open-Meteo geocoding")
+    coords = _geocode_result(city, geo_res.json())
+    geocode_cache.set(key, coords)
+    return coords
+
+def _geocode_params(city: str):
+    return {"name": city, "count": 1, "language": "en", "format": "json"}
+
+def _geocode_result(city: str, geo_data: dict):
+    if not geo_data.get("results"):
+        raise ValueError(f"City '{city}' not found.")
+    return (geo_data["results"][0]["latitude"], geo_data["results"][0]["longitude"])
 
 def get_weather_openmeteo(city: str):
     """
     Fetches weather data from Open-Meteo API (Free, No Key).
     """
     try:
-        # 1. Geocoding
-        geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={city}&count=1&language=en&format=json"
-        geo_res = requests.get(geo_url, timeout=5)
-        geo_data = geo_res.json()
-
-        if not geo_data.get("results"):
-            raise ValueError(f"City '{city}' not found.")
+        # 1. Geocoding (cached)
+        lat, lon = geocode_city(city)
 
-        lat = geo_data["results"][0]["latitude"]
-        lon = geo_data["results"][0]["longitude"]
+        cache_key = ("open-meteo", round(lat, 4), round(lon, 4))
+        cached = current_weather_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
 
         # 2. Weather
-        weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true"
-        weather_res = requests.get(weather_url, timeout=5)
-        weather_data = weather_res.json()
-        
-        current = weather_data.get("current_weather", {})
-        temp = current.get("temperature")
-        code = current.get("weathercode")
-        
-        # Code mapping
-        condition = "Unknown"
-        if code == 0: condition = "Clear sky"
-        elif code in [1, 2, 3]: condition = "Partly cloudy"
-        elif code in [45, 48]: condition = "Fog"
-        elif code in [51, 53, 55]: condition = "Drizzle"
-        elif code in [61, 63, 65]: condition = "Rain"
-        elif code in [71, 73, 75]: condition = "Snow"
-        elif code in [95, 96, 99]: condition = "Thunderstorm"
-        
-        return {
-            "temperature": f"{temp}°C",
-            "condition": condition,
-            "source": "Open-Meteo"
-        }
+        weather_res = http_get(FORECAST_URL, params={"latitude": lat, "longitude": lon, "current_weather": "true"})
+        _check_upstream(weather_res, "Open-Meteo")
+        result = _openmeteo_result(weather_res.json())
+        current_weather_cache.set(cache_key, result)
+        return dict(result)
     except Exception as e:
         raise e
 
+def _describe_weathercode(code):
+    # Code mapping
+    condition = "Unknown"
+    if code == 0: condition = "Clear sky"
+    elif code in [1, 2, 3]: condition = "Partly cloudy"
+    elif code in [45, 48]: condition = "Fog"
+    elif code in [51, 53, 55]: condition = "Drizzle"
+    elif code in [61, 63, 65]: condition = "Rain"
+    elif code in [71, 73, 75]: condition = "Snow"
+    elif code in [95, 96, 99]: condition = "Thunderstorm"
+    return condition
+
+def _openmeteo_result(weather_data: dict):
+    current = weather_data.get("current_weather", {})
+    return {
+        "temperature": f"{current.get('temperature')}°C",
+        "condition": _describe_weathercode(current.get("weathercode")),
+        "source": "Open-Meteo"
+    }
+
 def get_weather_openweathermap(city: str, api_key: str):
     """
     Fetches weather data from OpenWeatherMap API (Requires Key).
     """
+    cache_key = ("openweathermap", _city_key(city))
+    cached = current_weather_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+
     try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-        res = requests.get(url, timeout=5)
-        
-        if res.status_code == 401:
-            raise ValueError("Invalid API Key.")
-        if res.status_code == 404:
-            raise ValueError(f"City '{city}' not found.")
-            
-        data = res.json()
-        temp = data["main"]["temp"]
-        condition = data["weather"][0]["description"].capitalize()
-        
-        return {
-            "temperature": f"{temp}°C",
-            "condition": condition,
-            "source": "OpenWeatherMap"
-        }
+        res = http_get(OPENWEATHERMAP_URL, params={"q": city, "appid": api_key, "units": "metric"})
+        result = _openweathermap_result(city, res)
+        current_weather_cache.set(cache_key, result)
+        return dict(result)
     except requests.exceptions.Timeout:
         raise TimeoutError("OpenWeatherMap API timed out.")
     except Exception as e:
         raise e
 
+def _openweathermap_result(city: str, res):
+    _check_upstream(res, "OpenWeatherMap")
+    if res.status_code == 401:
+        raise InvalidAPIKey("Invalid API Key.")
+    if res.status_code == 404:
+        raise ValueError(f"City '{city}' not found.")
+
+    data = res.json()
+    temp = data["main"]["temp"]
+    condition = data["weather"][0]["description"].capitalize()
+
+    return {
+        "temperature": f"{temp}°C",
+        "condition": condition,
+        "source": "OpenWeatherMap"
+    }
+
+# --- PROVIDERS ---
+# Looked up by name at call time, so patching the functions above still takes effect.
+OPEN_METEO = Provider(
+    "Open-Meteo",
+    lambda city, api_key: get_weather_openmeteo(city),
+    lambda city, api_key: get_weather_openmeteo_async(city),
+)
+OPENWEATHERMAP = Provider(
+    "OpenWeatherMap",
+    lambda city, api_key: get_weather_openweathermap(city, api_key),
+    lambda city, api_key: get_weather_openweathermap_async(city, api_key),
+    requires_key=True,
+)
+
+def weather_providers(api_key: str = None):
+    """Providers in order of preference: the keyed OpenWeatherMap first when a key is given."""
+    return [OPENWEATHERMAP, OPEN_METEO] if api_key else [OPEN_METEO, OPENWEATHERMAP]
+
+def get_weather_provider_stats():
+    """Circuit breaker state per provider."""
+    return {provider.name: provider.breaker.snapshot() for provider in (OPEN_METEO, OPENWEATHERMAP)}
+
+def reset_weather_providers():
+    for provider in (OPEN_METEO, OPENWEATHERMAP):
+        provider.breaker.reset()
+
+def _remember(city: str, result: dict):
+    last_known_cache.set(_city_key(city), {"data": dict(result), "as_of": datetime.now().isoformat(timespec="seconds")})
+    return result
+
+def _last_known(city: str, error: ProvidersUnavailable):
+    known = last_known_cache.get(_city_key(city))
+    if known is None:
+        raise error
+    return dict(known["data"], stale=True, as_of=known["as_of"])
+
 def get_weather(city: str, api_key: str = None):
     """
-    Facade to switch between providers.
+    Current weather from the preferred provider, failing over (or hedging
+    after WEATHER_HEDGE_AFTER_MS) to the other one within
+    WEATHER_LATENCY_BUDGET_MS; see weather_providers. When every provider is
+    down, the last known value for the city is returned with
+    `stale=True` and its `as_of` time.
+    """
+    try:
+        return _remember(city, fetch_weather(weather_providers(api_key), city, api_key))
+    except ProvidersUnavailable as e:
+        return _last_known(city, e)
+
+def _forecast_many(coords):
+    """
+    Current weather for many (lat, lon) pairs using Open-Meteo's
+    multi-location request: one round-trip per FORECAST_BATCH_SIZE coordinates.
+    """
+    results = []
+    for start in range(0, len(coords), FORECAST_BATCH_SIZE):
+        batch = coords[start:start + FORECAST_BATCH_SIZE]
+        res = http_get(FORECAST_URL, params={
+            "latitude": ",".join(str(lat) for lat, _ in batch),
+            "longitude": ",".join(str(lon) for _, lon in batch),
+            "current_weather": "true",
+        })
+        _check_upstream(res, "Open-Meteo")
+        data = res.json()
+        # A single location comes back as an object, several as a list
+        results.extend(data if isinstance(data, list) else [data])
+    return results
+
+def _openmeteo_many(cities, results: dict, max_workers: int):
+    """
+    Batched Open-Meteo lookups for `cities`, counted as one call on the
+    provider's breaker (the caller holds `allow()`). Fills `results` and
+    returns the cities that hit an outage, to be looked up one by one.
     """
-    if api_key:
-        return get_weather_openweathermap(city, api_key)
+    failed, pending = [], []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(cities)))) as pool:
+        futures = {city: pool.submit(geocode_city, city) for city in cities}
+        for city, future in futures.items():
+            try:
+                lat, lon = future.result()
+            except ValueError as e:
+                results[city] = (None, str(e))
+                continue
+            except Exception:
+                failed.append(city)
+                continue
+            cache_key = ("open-meteo", round(lat, 4), round(lon, 4))
+            cached = current_weather_cache.get(cache_key)
+            if cached is not None:
+                results[city] = (_remember(city, dict(cached)), None)
+            else:
+                pending.append((city, (lat, lon), cache_key))
+
+    forecasts = []
+    if pending:
+        try:
+            forecasts = _forecast_many([coords for _, coords, _ in pending])
+        except Exception:
+            failed.extend(city for city, _, _ in pending)
+            pending = []
+    for i, (city, _, cache_key) in enumerate(pending):
+        if i < len(forecasts) and forecasts[i].get("current_weather"):
+            result = _openmeteo_result(forecasts[i])
+            current_weather_cache.set(cache_key, result)
+            results[city] = (_remember(city, dict(result)), None)
+        else:
+            results[city] = (None, "Forecast missing from response.")
+
+    if failed:
+        OPEN_METEO.breaker.record_failure()
+    elif pending:
+        OPEN_METEO.breaker.record_success()
     else:
-        return get_weather_openmeteo(city)
+        OPEN_METEO.breaker.release()  # answered from the caches: nothing learned about the upstream
+    return failed
+
+def get_weather_many(cities, api_key: str = None, max_workers: int = WEATHER_MAX_WORKERS):
+    """
+    Fetches weather for many cities at once.
+
+    Without an API key, geocoding runs concurrently on a thread pool,
+    bounded per host, and Open-Meteo forecasts for all cities share one
+    batched request, as long as Open-Meteo's breaker is closed. Cities the
+    batch could not serve (an outage, or the breaker open), and every city
+    when a key is given, go through `get_weather` one by one, with its
+    failover and last-known fallback. Returns {city: (data, None)} or
+    {city: (None, error_message)} per city, so one failure does not fail
+    the batch; a rejected API key (InvalidAPIKey) fails all of it.
+    """
+    cities = list(dict.fromkeys(cities))
+    results = {}
+    if not cities:
+        return results
+
+    single = cities
+    if not api_key and OPEN_METEO.breaker.allow():
+        single = _openmeteo_many(cities, results, max_workers)
+    if single:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(single)))) as pool:
+            futures = {city: pool.submit(get_weather, city, api_key) for city in single}
+            for city, future in futures.items():
+                try:
+                    results[city] = (future.result(), None)
+                except InvalidAPIKey:
+                    for other in futures.values():
+                        other.cancel()
+                    raise
+                except Exception as e:
+                    results[city] = (None, str(e))
+
+    return {city: results[city] for city in cities}
+
+# --- ASYNC HTTP ---
+# Same providers, caches and result format as above, but the HTTP round-trips are
+# awaited on an httpx.AsyncClient so one event loop can overlap many of them.
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+def get_async_http_client():
+    """Shared keep-alive AsyncClient for the running event loop."""
+    import httpx
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        limits = httpx.Limits(max_connections=WEATHER_MAX_WORKERS, max_keepalive_connections=WEATHER_MAX_WORKERS)
+        transport = httpx.AsyncHTTPTransport(retries=WEATHER_RETRIES)
+        client = _async_clients[loop] = httpx.AsyncClient(limits=limits, transport=transport)
+    return client
+
+async def close_async_http_client():
+    """Closes the running loop's shared AsyncClient, e.g. on application shutdown."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+async def http_get_async(url: str, params: dict = None, timeout: float = WEATHER_HTTP_TIMEOUT):
+    """Awaitable http_get; connection limits come from the shared client."""
+    host = urlsplit(url).netloc
+    start = time.perf_counter()
+    status = "error"
+    try:
+        response = await get_async_http_client().get(url, params=params, timeout=timeout)
+        status = response.status_code
+        return response
+    finally:
+        observe_http(host, status, time.perf_counter() - start)
+
+async def geocode_city_async(city: str):
+    key = _city_key(city)
+    cached = geocode_cache.get(key)
+    if cached is not None:
+        return tuple(cached)
+    geo_res = await http_get_async(GEOCODING_URL, params=_geocode_params(city))
+    _check_upstream(geo_res, "Open-Meteo geocoding")
+    coords = _geocode_result(city, geo_res.json())
+    geocode_cache.set(key, coords)
+    return coords
+
+async def get_weather_openmeteo_async(city: str):
+    lat, lon = await geocode_city_async(city)
+    cache_key = ("open-meteo", round(lat, 4), round(lon, 4))
+    cached = current_weather_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+    res = await http_get_async(FORECAST_URL, params={"latitude": lat, "longitude": lon, "current_weather": "true"})
+    _check_upstream(res, "Open-Meteo")
+    result = _openmeteo_result(res.json())
+    current_weather_cache.set(cache_key, result)
+    return dict(result)
+
+async def get_weather_openweathermap_async(city: str, api_key: str):
+    cache_key = ("openweathermap", _city_key(city))
+    cached = current_weather_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+    import httpx
+    try:
+        res = await http_get_async(OPENWEATHERMAP_URL, params={"q": city, "appid": api_key, "units": "metric"})
+    except httpx.TimeoutException:
+        raise TimeoutError("OpenWeatherMap API timed out.")
+    result = _openweathermap_result(city, res)
+    current_weather_cache.set(cache_key, result)
+    return dict(result)
+
+async def get_weather_async(city: str, api_key: str = None):
+    """Async get_weather: same providers, breakers, budget and last-known fallback."""
+    try:
+        return _remember(city, await fetch_weather_async(weather_providers(api_key), city, api_key))
+    except ProvidersUnavailable as e:
+        return _last_known(city, e)
 
 def log_weather(db: Session, city: str, temperature: str, condition: str):
-    """Logs the weather inquiry to the database."""
-    log = WeatherLog(city=city, temperature=temperature, condition=condition)
+    """Logs the weather inquiry and folds it into the hourly/daily rollups."""
+    temperature_c = parse_temperature(temperature)
+    log = WeatherLog(city=city, temperature=temperature, temperature_c=temperature_c,
+                     condition=condition, timestamp=datetime.now())
     db.add(log)
+    apply_weather_samples(db, [(city, temperature_c, log.timestamp)])
     db.commit()
+    invalidate(WEATHER)
     return log
 
+def get_recent_weather_logs(db: Session, limit: int = 10):
+    """Latest weather lookups as plain rows (safe to cache across sessions)."""
+    return (
+        db.query(WeatherLog.id, WeatherLog.city, WeatherLog.temperature, WeatherLog.temperature_c,
+                 WeatherLog.condition, WeatherLog.timestamp)
+        .order_by(WeatherLog.timestamp.desc(), WeatherLog.id.desc())
+        .limit(limit)
+        .all()
+    )
+
 def delete_weather_log(db: Session, log_id: int):
     """Deletes a weather log by ID."""
     try:
-        log = db.query(WeatherLog).filter(WeatherLog.id == log_id).first()
-        if not log:
+        deleted = db.query(WeatherLog).filter(WeatherLog.id == log_id).delete(synchronize_session=False)
+        if not deleted:
+            db.rollback()
             return False, (404, "Log not found")
-        db.delete(log)
         db.commit()
+        invalidate(WEATHER)
         return True, (200, "Log deleted")
     except Exception as e:
         return False, (500, f"Database Error: {str(e)}")
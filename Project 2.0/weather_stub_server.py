@@ -0,0 +1,222 @@
+
+"""
+Local stand-in for the Open-Meteo and OpenWeatherMap APIs with injectable
+latency and failures, for tests, benchmarks and trying out failover.
+
+Each provider listens on its own port (so the per-host limits in
+weather_service apply as they would in production). Cities resolve to
+deterministic coordinates and temperatures; "Atlantis" is never found and
+the OpenWeatherMap key "invalid" is rejected.
+
+    python weather_stub_server.py --port 8765 --latency-ms open-meteo=2000 --failure-rate openweathermap=0.3
+
+    with StubWeatherServer() as stub, stub.patched():
+        stub.configure("open-meteo", failure_rate=1.0)
+        get_weather("London", api_key="any")   # served by OpenWeatherMap
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+OPEN_METEO, OPENWEATHERMAP = "open-meteo", "openweathermap"
+UNKNOWN_CITY = "atlantis"
+INVALID_KEY = "invalid"
+
+def _coords(city: str):
+    seed = zlib.crc32(" ".join(city.split()).lower().encode())
+    return round((seed % 1600) / 10 - 80, 4), round((seed // 1600 % 3600) / 10 - 180, 4)
+
+def _temperature(lat: float):
+    return round(30 - abs(float(lat)) / 3, 1)
+
+class Faults:
+    """What one provider does to each request: delay, then fail with `status` at `failure_rate`."""
+
+    def __init__(self, latency_ms: float = 0, failure_rate: float = 0, status: int = 503):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.status = status
+
+class StubWeatherServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, seed: int = None):
+        """`port` 0 picks free ports; otherwise Open-Meteo gets `port` and OpenWeatherMap `port + 1`."""
+        self.faults = {OPEN_METEO: Faults(), OPENWEATHERMAP: Faults()}
+        self.requests = Counter()  # provider -> requests received
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._servers = {
+            name: ThreadingHTTPServer((host, port + i if port else 0), self._handler(name))
+            for i, name in enumerate((OPEN_METEO, OPENWEATHERMAP))
+        }
+        for server in self._servers.values():
+            server.daemon_threads = True
+        self._threads = []
+
+    def configure(self, provider: str, latency_ms: float = None, failure_rate: float = None, status: int = None):
+        """Changes the faults of one provider; takes effect for the next request."""
+        faults = self.faults[provider]
+        if latency_ms is not None: faults.latency_ms = latency_ms
+        if failure_rate is not None: faults.failure_rate = failure_rate
+        if status is not None: faults.status = status
+
+    def base_url(self, provider: str) -> str:
+        host, port = self._servers[provider].server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self):
+        """weather_service URL settings pointing at this server."""
+        return {
+            "GEOCODING_URL": f"{self.base_url(OPEN_METEO)}/v1/search",
+            "FORECAST_URL": f"{self.base_url(OPEN_METEO)}/v1/forecast",
+            "OPENWEATHERMAP_URL": f"{self.base_url(OPENWEATHERMAP)}/data/2.5/weather",
+        }
+
+    @contextmanager
+    def patched(self):
+        """Points weather_service at this server for the duration of the block."""
+        import weather_service
+        previous = {name: getattr(weather_service, name) for name in self.urls()}
+        for name, url in self.urls().items():
+            setattr(weather_service, name, url)
+        try:
+            yield self
+        finally:
+            for name, url in previous.items():
+                setattr(weather_service, name, url)
+
+    def start(self):
+        for server in self._servers.values():
+            thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in self._servers.values():
+            server.shutdown()
+            server.server_close()
+        self._threads.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _should_fail(self, faults: Faults) -> bool:
+        with self._lock:
+            return self._random.random() < faults.failure_rate
+
+    def _handler(self, provider: str):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests[provider] += 1
+                faults = stub.faults[provider]
+                if faults.latency_ms:
+                    time.sleep(faults.latency_ms / 1000)
+                if stub._should_fail(faults):
+                    return self._send(faults.status, {"error": True, "reason": "injected failure"})
+                url = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                route = {
+                    (OPEN_METEO, "/v1/search"): stub._geocode,
+                    (OPEN_METEO, "/v1/forecast"): stub._forecast,
+                    (OPENWEATHERMAP, "/data/2.5/weather"): stub._openweathermap,
+                }.get((provider, url.path))
+                if route is None:
+                    return self._send(404, {"error": True, "reason": "not found"})
+                self._send(*route(params))
+
+            def _send(self, status: int, payload):
+                body = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up waiting
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @staticmethod
+    def _geocode(params):
+        city = params.get("name", "")
+        if " ".join(city.split()).lower() == UNKNOWN_CITY:
+            return 200, {"generationtime_ms": 0.1}
+        lat, lon = _coords(city)
+        return 200, {"results": [{"name": city, "latitude": lat, "longitude": lon}]}
+
+    @staticmethod
+    def _forecast(params):
+        lats = params.get("latitude", "0").split(",")
+        lons = params.get("longitude", "0").split(",")
+        body = [
+            {"latitude": float(lat), "longitude": float(lon),
+             "current_weather": {"temperature": _temperature(lat), "weathercode": int(float(lon)) % 4}}
+            for lat, lon in zip(lats, lons)
+        ]
+        return 200, body if len(body) > 1 else body[0]
+
+    @staticmethod
+    def _openweathermap(params):
+        if params.get("appid") == INVALID_KEY:
+            return 401, {"cod": 401, "message": "Invalid API key."}
+        city = params.get("q", "")
+        if " ".join(city.split()).lower() == UNKNOWN_CITY:
+            return 404, {"cod": "404", "message": "city not found"}
+        lat, _ = _coords(city)
+        return 200, {"name": city, "main": {"temp": _temperature(lat)}, "weather": [{"description": "scattered clouds"}]}
+
+def _per_provider(values, cast):
+    settings = {}
+    for value in values or []:
+        name, _, amount = value.partition("=")
+        if name not in (OPEN_METEO, OPENWEATHERMAP):
+            raise SystemExit(f"Unknown provider '{name}' (use {OPEN_METEO} or {OPENWEATHERMAP}).")
+        settings[name] = cast(amount)
+    return settings
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake weather APIs with injected latency and failures.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="Open-Meteo port; OpenWeatherMap uses the next one")
+    parser.add_argument("--latency-ms", action="append", metavar="PROVIDER=MS", help="e.g. open-meteo=1500")
+    parser.add_argument("--failure-rate", action="append", metavar="PROVIDER=RATE", help="e.g. openweathermap=0.2")
+    parser.add_argument("--status", type=int, default=503, help="HTTP status of injected failures")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    stub = StubWeatherServer(args.host, args.port, args.seed)
+    for name, latency in _per_provider(args.latency_ms, float).items():
+        stub.configure(name, latency_ms=latency)
+    for name, rate in _per_provider(args.failure_rate, float).items():
+        stub.configure(name, failure_rate=rate)
+    for name in stub.faults:
+        stub.configure(name, status=args.status)
+
+    with stub:
+        print("Point the app at the stub with:")
+        for name, url in stub.urls().items():
+            print(f"  export WEATHER_{name}={url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()